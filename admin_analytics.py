@@ -0,0 +1,109 @@
+import streamlit as st
+from datetime import datetime, timedelta
+from common import get_connection, day_range
+import analytics
+import profiling
+
+con = get_connection()
+
+# --------------------------------------------------
+# 데이터 (일별 집계만 읽음)
+# --------------------------------------------------
+
+@st.cache_data(ttl=60, show_spinner=False)
+def load_frames(lo, hi):
+    return analytics.inspection_frame(lo, hi), analytics.work_frame(lo, hi), analytics.product_first_month()
+
+@st.cache_data(ttl=300, show_spinner=False)
+def name_maps():
+    products = dict(con.execute("SELECT id, product_name FROM products").fetchall())
+    users = dict(con.execute("SELECT id, username FROM users").fetchall())
+    return products, users
+
+# --------------------------------------------------
+# 메인
+# --------------------------------------------------
+
+@profiling.page("admin_analytics")
+def main():
+    st.title("관리자 – 불량률 분석")
+
+    # 권한 체크
+    if st.session_state.get("user_role") != "admin":
+        st.warning("접근 권한이 없습니다. (관리자 전용)")
+        st.stop()
+
+    # 변경된 날짜만 다시 집계 (보통 수 ms)
+    with profiling.span("refresh"):
+        if analytics.refresh():
+            load_frames.clear()
+
+    now_dt = datetime.now()
+    c1, c2, c3 = st.columns(3)
+    start = c1.date_input("시작일", value=now_dt - timedelta(days=365))
+    end = c2.date_input("종료일", value=now_dt)
+    freq = {"일": "D", "주": "W", "월": "M"}[c3.radio("단위", ["일", "주", "월"], index=1, horizontal=True)]
+    if start > end:
+        st.error("시작일이 종료일보다 클 수 없습니다.")
+        st.stop()
+
+    with profiling.span("load"):
+        df, wf, first_month = load_frames(*day_range(start, end))
+        products, users = name_maps()
+    if df.empty and wf.empty:
+        st.info("해당 기간에 집계된 데이터가 없습니다.")
+        return
+
+    # ---------------- 요약 ----------------
+    tot, dfc = int(df["total_qty"].sum()), int(df["defect_qty"].sum())
+    m = st.columns(4)
+    m[0].metric("검수 수량", f"{tot:,}")
+    m[1].metric("불량", f"{dfc:,}")
+    m[2].metric("불량률", f"{dfc / tot * 100:.2f}%" if tot else "-")
+    m[3].metric("작업 정상 처리", f"{int(wf['repaired_qty'].sum()):,}" if not wf.empty else "0")
+
+    tab_trend, tab_pareto, tab_cohort, tab_worker = st.tabs(["📈 추세", "📊 파레토", "🧬 코호트", "🧑‍🔧 작업자"])
+
+    # ---------------- 추세 ----------------
+    with tab_trend:
+        by = {"브랜드": "brand", "도매처": "vendor"}[st.radio("구분", ["브랜드", "도매처"], horizontal=True)]
+        st.line_chart(analytics.trend(df, freq, by))
+
+    # ---------------- 파레토 ----------------
+    with tab_pareto:
+        dim = {"상품": "product_id", "브랜드": "brand", "도매처": "vendor"}[
+            st.radio("기준", ["상품", "브랜드", "도매처"], horizontal=True)]
+        top, n80 = analytics.pareto(df, dim)
+        if top.empty:
+            st.info("불량 기록이 없습니다.")
+        else:
+            if dim == "product_id":
+                top.insert(1, "상품명", top["product_id"].map(products))
+            st.caption(f"불량의 80%가 상위 {n80}개 항목에서 발생")
+            st.bar_chart(top.set_index(top.columns[1] if dim == "product_id" else dim)["defect_qty"])
+            st.dataframe(top.round({"share": 1, "cum_share": 1}), use_container_width=True)
+
+    # ---------------- 코호트 ----------------
+    with tab_cohort:
+        st.caption("행: 상품 첫 검수 월 · 열: 경과 개월 · 값: 불량률(%)")
+        table = analytics.cohort(df, first_month)
+        st.dataframe(table.round(1), use_container_width=True)
+
+    # ---------------- 작업자 ----------------
+    with tab_worker:
+        ws = analytics.worker_summary(wf, freq)
+        if ws.empty:
+            st.info("작업 기록이 없습니다.")
+        else:
+            ws.columns = [users.get(w, f"작업자 {w}") for w in ws.columns]
+            st.bar_chart(ws)
+            extra = wf.groupby("worker_id")[["orders", "repaired_qty", "defect_qty", "steam", "repair", "wash"]].sum()
+            extra.index = [users.get(w, f"작업자 {w}") for w in extra.index]
+            st.dataframe(
+                extra.rename(columns={"orders": "작업 건수", "repaired_qty": "정상", "defect_qty": "추가불량",
+                                      "steam": "스팀", "repair": "수선", "wash": "세탁"}),
+                use_container_width=True,
+            )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+import os
+import streamlit as st
+import pandas as pd
+import profiling
+
+# --------------------------------------------------
+# 메인
+# --------------------------------------------------
+
+@profiling.page("admin_profiling")
+def main():
+    st.title("관리자 – 페이지 렌더링 프로파일")
+
+    # 권한 체크
+    if st.session_state.get("user_role") != "admin":
+        st.warning("접근 권한이 없습니다. (관리자 전용)")
+        st.stop()
+
+    # ---------------- 설정 ----------------
+    c1, c2, c3 = st.columns([1, 1, 2])
+    on = c1.toggle("구간 기록", value=profiling.enabled())
+    if on != profiling.enabled():
+        profiling.enable(on)
+    prof = c2.toggle("cProfile 저장", value=profiling.cprofile_enabled(),
+                     help="rerun 마다 .prof 파일 저장 (느려짐 – 원인 조사 때만)")
+    if prof != profiling.cprofile_enabled():
+        profiling.enable_cprofile(prof)
+    limit = c3.select_slider("분석할 최근 레코드 수", [500, 1000, 5000, 20000], value=5000)
+
+    records = profiling.read_trace(limit)
+    if not records:
+        st.info(f"기록된 트레이스가 없습니다. ({profiling.TRACE_PATH})")
+        return
+    pages, phases = profiling.summarize(records)
+
+    # ---------------- 느린 페이지 ----------------
+    st.subheader("페이지별 rerun 시간 (p95 순)")
+    st.dataframe(pd.DataFrame([{
+        "페이지": r["page"], "rerun": r["n"], "p50(ms)": round(r["p50_ms"], 1),
+        "p95(ms)": round(r["p95_ms"], 1), "최대(ms)": round(r["max_ms"], 1),
+    } for r in pages]), use_container_width=True, hide_index=True)
+
+    # ---------------- 느린 구간 ----------------
+    st.subheader("구간별 시간 (p95 순)")
+    st.dataframe(pd.DataFrame([{
+        "페이지": r["page"], "구간": r["span"], "횟수": r["n"], "p50(ms)": round(r["p50_ms"], 1),
+        "p95(ms)": round(r["p95_ms"], 1), "최대(ms)": round(r["max_ms"], 1),
+        "누적(ms)": round(r["total_ms"], 1),
+    } for r in phases]), use_container_width=True, hide_index=True)
+
+    # ---------------- 가장 느린 rerun ----------------
+    st.subheader("가장 느린 rerun 20건")
+    slow = sorted((r for r in records if r.get("kind") == "page"), key=lambda r: r["total_ms"], reverse=True)[:20]
+    for r in slow:
+        with st.expander(f"{r['total_ms']:.0f}ms · {r['page']} · {r['outcome']} · {r['ts']}"):
+            st.text("\n".join(f"{'  ' * s['depth']}{s['name']:<20} +{s['start_ms']:>8.1f}ms  {s['ms']:>8.1f}ms"
+                              for s in r["spans"]) or "(구간 없음)")
+            if r.get("profile") and os.path.exists(r["profile"]):
+                with open(r["profile"], "rb") as f:
+                    st.download_button("📥 cProfile (.prof)", f.read(),
+                                       file_name=os.path.basename(r["profile"]), key=f"prof_{r['profile']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+import os
+import json
+import streamlit as st
+import pandas as pd
+import common
+import sql_trace
+import profiling
+
+# --------------------------------------------------
+# 느린 쿼리 로그 (최근 N줄)
+# --------------------------------------------------
+
+def tail_slow_log(n=50):
+    if not os.path.exists(sql_trace.SLOW_LOG_PATH):
+        return []
+    with open(sql_trace.SLOW_LOG_PATH, encoding="utf-8") as f:
+        lines = f.readlines()[-n:]
+    out = []
+    for line in reversed(lines):
+        try:
+            out.append(json.loads(line))
+        except ValueError:
+            continue
+    return out
+
+# --------------------------------------------------
+# 메인
+# --------------------------------------------------
+
+@profiling.page("admin_sql_trace")
+def main():
+    st.title("관리자 – SQL 추적")
+
+    # 권한 체크
+    if st.session_state.get("user_role") != "admin":
+        st.warning("접근 권한이 없습니다. (관리자 전용)")
+        st.stop()
+
+    # ---------------- 설정 ----------------
+    c1, c2, c3 = st.columns([1, 2, 1])
+    on = c1.toggle("추적 사용", value=sql_trace.enabled())
+    if on != sql_trace.enabled():
+        sql_trace.enable(on)
+        common.reset_pool()          # 새로 여는 커넥션부터 계측/해제
+        st.rerun()
+    ms = c2.number_input("느린 쿼리 기준 (ms)", min_value=1.0, value=float(sql_trace.SLOW_QUERY_MS), step=10.0)
+    if ms != sql_trace.SLOW_QUERY_MS:
+        sql_trace.set_threshold(ms)
+    if c3.button("통계 초기화"):
+        sql_trace.reset()
+        st.rerun()
+
+    if not sql_trace.enabled():
+        st.info("추적이 꺼져 있습니다. 켜면 이후 열리는 커넥션의 쿼리부터 집계됩니다. (환경변수 SQL_TRACE=1 로 시작해도 됨)")
+
+    # ---------------- 누적 시간 상위 문장 ----------------
+    order = st.radio("정렬", ["누적 시간", "평균 시간", "호출 수"], horizontal=True)
+    key = {"누적 시간": "total_ms", "평균 시간": "avg_ms", "호출 수": "calls"}[order]
+    rows = sql_trace.statements(order=key, limit=100)
+    if not rows:
+        st.caption("집계된 쿼리가 없습니다.")
+    else:
+        df = pd.DataFrame([{
+            "전체 스캔": "⚠️" if s["full_scan"] else "",
+            "호출": s["calls"],
+            "누적(ms)": round(s["total_ms"], 1),
+            "평균(ms)": round(s["avg_ms"], 2),
+            "최대(ms)": round(s["max_ms"], 2),
+            "행 수": s["rows"],
+            "인자 수": s["params"],
+            "SQL": s["sql"],
+        } for s in rows])
+        st.dataframe(df, use_container_width=True, hide_index=True)
+
+        # ---------------- 전체 스캔 경고 ----------------
+        scans = [s for s in rows if s["full_scan"]]
+        st.subheader(f"전체 테이블 스캔 ({len(scans)}건)")
+        for s in scans:
+            with st.expander(f"{s['total_ms']:.0f}ms · {s['calls']}회 · {s['sql'][:80]}"):
+                st.code(s["sql"], language="sql")
+                st.text("\n".join(s["plan"]))
+                st.caption("SCAN 단계: " + ", ".join(s["full_scan"]))
+
+    # ---------------- 느린 쿼리 로그 ----------------
+    st.subheader("느린 쿼리 로그 (최근 50건)")
+    slow = tail_slow_log()
+    if not slow:
+        st.caption(f"기록 없음 ({sql_trace.SLOW_LOG_PATH})")
+    else:
+        st.dataframe(pd.DataFrame([{
+            "시각": r["ts"], "ms": r["ms"], "행 수": r["rows"],
+            "계획": " / ".join(r["plan"] or []), "SQL": r["sql"],
+        } for r in slow]), use_container_width=True, hide_index=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+################################################################################
+# analytics.py  –  일별 집계(daily_inspection / daily_work) 갱신 + 추세·파레토·코호트 계산
+#
+#   원본 행이 바뀐 날짜는 트리거가 rollup_dirty 에 표시 → refresh() 가 그 날짜만 다시 계산.
+#   화면 계산은 항상 집계 테이블에서 (원본 행을 읽지 않음).
+################################################################################
+import logging
+from datetime import datetime, timedelta
+import numpy as np
+import pandas as pd
+import retention
+from common import get_connection, transaction
+from migrations import rebuild_daily_rollup
+
+ROLLUP_SOURCE = {"inspection": "inspection_results", "work": "work_orders"}
+
+logger = logging.getLogger(__name__)
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+#  집계 갱신
+# ══════════════════════════════════════════════════════════════════════════════
+def _archived_before(cur):
+    """{kind: (보관 정리 기준일, 콜드로 옮긴 월 집합)} – 이 날짜들의 삭제는 보관 이동이라 집계를 유지"""
+    policies = retention.load_policies()
+    out = {}
+    for kind, table in ROLLUP_SOURCE.items():
+        months = {m for (m,) in cur.execute(
+            "SELECT DISTINCT month FROM cold_partitions WHERE table_name=?", (table,))}
+        out[kind] = (retention.cutoff_for(policies[table]), months)
+    return out
+
+
+def refresh():
+    """표시된 날짜만 다시 계산 → 처리한 (kind, day) 수
+
+    콜드 보관·보관 정리로 원본이 빠진 날짜는 다시 계산하지 않는다 (집계는 이력으로 남김).
+    """
+    with transaction() as cur:
+        dirty = cur.execute("SELECT kind, day FROM rollup_dirty").fetchall()
+        if not dirty:
+            return 0
+        archived = _archived_before(cur)
+        for kind, day in dirty:
+            cutoff, months = archived[kind]
+            if day < cutoff or day[:7] in months:
+                continue
+            nxt = (datetime.strptime(day, "%Y-%m-%d") + timedelta(days=1)).strftime("%Y-%m-%d")
+            rebuild_daily_rollup(cur, kind, day, nxt)
+        cur.executemany("DELETE FROM rollup_dirty WHERE kind=? AND day=?", dirty)
+    logger.info("analytics: %d일 집계 갱신", len(dirty))
+    return len(dirty)
+
+
+def pending_days():
+    return get_connection().execute("SELECT COUNT(*) FROM rollup_dirty").fetchone()[0]
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+#  집계 읽기
+# ══════════════════════════════════════════════════════════════════════════════
+def inspection_frame(lo, hi):
+    """daily_inspection [lo, hi) → DataFrame (day 는 datetime)"""
+    df = pd.read_sql_query(
+        "SELECT * FROM daily_inspection WHERE day >= ? AND day < ?", get_connection(), params=(lo, hi))
+    df["day"] = pd.to_datetime(df["day"])
+    return df
+
+
+def work_frame(lo, hi):
+    df = pd.read_sql_query(
+        "SELECT * FROM daily_work WHERE day >= ? AND day < ?", get_connection(), params=(lo, hi))
+    df["day"] = pd.to_datetime(df["day"])
+    return df
+
+
+def product_first_month():
+    """상품별 첫 검수 월 (코호트 기준, 전체 기간)"""
+    df = pd.read_sql_query(
+        "SELECT product_id, MIN(day) AS first_day FROM daily_inspection GROUP BY product_id", get_connection())
+    df["cohort"] = pd.to_datetime(df["first_day"]).dt.to_period("M")
+    return df[["product_id", "cohort"]]
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+#  계산 (벡터 연산)
+# ══════════════════════════════════════════════════════════════════════════════
+def _rate(num, den):
+    num, den = np.asarray(num, dtype=float), np.asarray(den, dtype=float)
+    return np.divide(num, den, out=np.zeros_like(num), where=den > 0) * 100
+
+
+def trend(df, freq="W", by="brand", top=8):
+    """기간(freq)별 불량률(%) – 행: 기간 시작일, 열: by 상위 top 개 + '전체'"""
+    if df.empty:
+        return pd.DataFrame()
+    period = df["day"].dt.to_period(freq).dt.start_time
+    keys = df.groupby(by)["total_qty"].sum().nlargest(top).index
+    g = df.assign(period=period, key=df[by].where(df[by].isin(keys), "기타"))
+    sums = g.groupby(["period", "key"])[["defect_qty", "total_qty"]].sum()
+    rates = pd.Series(_rate(sums["defect_qty"], sums["total_qty"]), index=sums.index).unstack("key")
+    total = g.groupby("period")[["defect_qty", "total_qty"]].sum()
+    rates["전체"] = _rate(total["defect_qty"], total["total_qty"])
+    return rates
+
+
+def pareto(df, by="product_id", value="defect_qty", top=30):
+    """by 별 value 합계 내림차순 + 누적 비율(%) → (상위 top DataFrame, 누적 80% 까지 필요한 항목 수)"""
+    s = df.groupby(by)[value].sum()
+    s = s[s > 0].sort_values(ascending=False)
+    if s.empty:
+        return pd.DataFrame(columns=[by, value, "share", "cum_share"]), 0
+    v = s.to_numpy(dtype=float)
+    share = v / v.sum() * 100
+    cum = np.cumsum(share)
+    out = pd.DataFrame({by: s.index, value: v, "share": share, "cum_share": cum})
+    return out.head(top), int(min(np.searchsorted(cum, 80.0) + 1, len(v)))
+
+
+def cohort(df, first_month):
+    """상품 첫 검수 월(코호트) × 경과 개월 불량률(%) 표"""
+    if df.empty:
+        return pd.DataFrame()
+    g = df.merge(first_month, on="product_id", how="left")
+    month = g["day"].dt.to_period("M")
+    # Period 차이 → 경과 개월 수 (정수 연산)
+    age = (month.dt.year - g["cohort"].dt.year) * 12 + (month.dt.month - g["cohort"].dt.month)
+    g = g.assign(cohort=g["cohort"].astype(str), age=age)
+    sums = g.groupby(["cohort", "age"])[["defect_qty", "total_qty"]].sum()
+    rates = pd.Series(_rate(sums["defect_qty"], sums["total_qty"]), index=sums.index)
+    return rates.unstack("age").sort_index()
+
+
+def worker_summary(wf, freq="W"):
+    """작업자 × 기간 정상 처리 수량"""
+    if wf.empty:
+        return pd.DataFrame()
+    period = wf["day"].dt.to_period(freq).dt.start_time
+    return wf.assign(period=period).pivot_table(
+        index="period", columns="worker_id", values="repaired_qty", aggfunc="sum", fill_value=0)
@@ -1,8 +1,15 @@
 ################################################################################
 # app.py  –  프로젝트 메인 엔트리 (Streamlit 멀티페이지)
 ################################################################################
+import logging
 import streamlit as st
-from common import init_db, get_connection
+from common import init_db, get_connection, activity_log_queue_depth
+import slip_cache
+import retention
+import duplicate_index
+import image_similarity
+
+logger = logging.getLogger(__name__)
 
 # ───────── 초기 설정 ─────────
 st.set_page_config(
@@ -11,10 +18,30 @@ st.set_page_config(
     layout="wide",
 )
 
-# DB 준비
-init_db()
+# DB 준비 (마이그레이션은 프로세스당 1회 – 적용된 항목이 있으면 표시)
+for ver, name in init_db():
+    logger.info("migration %03d applied: %s", ver, name)
+    st.toast(f"DB 마이그레이션 {ver:03d} 적용: {name}")
 con = get_connection()
 
+# 작업자 스캔용 오늘 전표 캐시 (프로세스당 1회) – 다른 프로세스 변경은 백그라운드 갱신
+@st.cache_resource(show_spinner=False)
+def warm_slip_cache():
+    n = slip_cache.warm()
+    slip_cache.start_refresher()
+    return n
+
+warm_slip_cache()
+
+# 보관 기간 지난 작업·검수·감사 로그 정리 (백그라운드, 프로세스당 1회)
+retention.start_scheduler()
+
+# 중복 상품 감지용 이미지 해시 색인 – 아직 해시 없는 이미지 채우기 (백그라운드, 프로세스당 1회)
+duplicate_index.start_background_sync()
+
+# 사진 검색용 임베딩 색인 – 새 이미지 추가·삭제 반영 (백그라운드, 프로세스당 1회)
+image_similarity.start_background_sync()
+
 # ───────── 세션 기본값 ─────────
 if "user_role" not in st.session_state:
     st.session_state["user_role"] = None     # 'admin' / 'operator' / 'inspector' / 'worker'
@@ -50,6 +77,10 @@ def main():
 
     # 로그인 후 첫 화면
     st.sidebar.success(f"권한: {st.session_state['user_role']}")
+    if st.session_state["user_role"] == "admin":
+        st.sidebar.caption(f"감사 로그 기록 대기: {activity_log_queue_depth()}건")
+        sc = slip_cache.stats()
+        st.sidebar.caption(f"전표 캐시: {sc['size']}건 · 적중 {sc['hits']} / 미스 {sc['misses']}")
     st.sidebar.write("사이드바에서 페이지를 선택하세요.")
 
     st.write(
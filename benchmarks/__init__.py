@@ -0,0 +1,6 @@
+################################################################################
+# benchmarks  –  합성 데이터 생성기 + 화면별 조회 성능 측정
+#
+#   python -m benchmarks.generate --out bench.db --scale 0.01
+#   INSPECTION_DB=bench.db python -m benchmarks.run --out result.json [--compare base.json]
+################################################################################
@@ -0,0 +1,226 @@
+################################################################################
+# benchmarks/generate.py  –  운영 규모 합성 데이터 생성 (시드 + 기준 시각 고정 → 같은 인자면 같은 DB)
+#
+#   python -m benchmarks.generate --out bench.db            # SKU 1M / 검수 5M / 작업 20M
+#   python -m benchmarks.generate --out small.db --scale 0.01
+#   python -m benchmarks.generate --out a.db --now "2026-01-15 09:00:00"   # 다른 날에도 같은 DB
+#
+#   모든 시각은 --now(기본: 오늘 12시) 기준으로 만든다. run.py 의 '오늘' 구간 측정이 맞도록 기본값은
+#   오늘이라, 날짜가 바뀌면 같은 DB 를 다시 만들려면 --now 를 지정할 것. 날짜만 주면 그날 12시.
+#   (오늘 몫 검수는 기준 시각 전 0.3일 안에 만들므로 12시면 모두 같은 날에 들어감)
+#   schema_version.applied_at 만 실제 생성 시각으로 남는다.
+#
+#   트리거(검색 색인·진행 합계·일별 집계)를 잠시 내리고 대량 INSERT 후 한 번에 재구성한다.
+################################################################################
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import time
+from datetime import datetime, timedelta
+
+FULL_SKUS = 1_000_000
+FULL_INSPECTIONS = 5_000_000
+FULL_WORK_ORDERS = 20_000_000
+SKUS_PER_PRODUCT = (1, 9)          # 상품당 SKU 수 범위 (평균 5)
+HISTORY_DAYS = 730                 # 검수 일자 분포 기간
+TODAY_SHARE = 0.002                # 오늘 날짜 검수 비율 (작업자 스캔 측정용)
+WORKERS = 60
+INSPECTORS = 12
+BATCH = 50_000
+
+GENDER = ["여성", "남성", "공용", "키즈"]
+STYLE = ["오버핏", "슬림핏", "루즈핏", "크롭", "롱", "베이직", "빈티지", "데일리", "세미", "와이드"]
+MATERIAL = ["린넨", "코튼", "울", "니트", "데님", "레더", "시폰", "쭈리", "기모", "골덴", "트위드", "스판"]
+ITEM = ["티셔츠", "셔츠", "블라우스", "원피스", "슬랙스", "팬츠", "스커트", "가디건", "자켓", "코트",
+        "후드티", "맨투맨", "조끼", "점퍼", "트레이닝복", "레깅스", "청바지", "니트티"]
+COLORS = ["블랙", "화이트", "아이보리", "베이지", "네이비", "그레이", "차콜", "카키", "브라운", "핑크",
+          "스카이블루", "레드", "옐로우", "민트"]
+SIZES = ["XS", "S", "M", "L", "XL", "FREE", "55", "66", "77"]
+VENDOR_PREFIX = ["동대문", "남대문", "청평화", "디오트", "APM", "누죤", "테크노", "광희", "신평화", "유어스"]
+BRAND_SYLL = ["라", "온", "미", "채", "하", "담", "솔", "린", "결", "비", "아", "르", "모", "엘", "도"]
+DIFFICULTY = ["양품화1", "양품화2", "프리미엄양품화1"]
+EXTRAS = ["", "", "", "스팀", "수선", "세탁", "스팀,수선", "스팀,세탁", "수선,세탁,스팀"]
+
+
+def _names(rng, n, make):
+    out = set()
+    while len(out) < n:
+        out.add(make())
+    return sorted(out)
+
+
+def _ts(base, rng, days):
+    return (base - timedelta(days=rng.random() * days)).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _batched(rows, size=BATCH):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _insert(con, sql, rows, label, total):
+    t0, n = time.perf_counter(), 0
+    for batch in _batched(rows):
+        con.execute("BEGIN")
+        con.executemany(sql, batch)
+        con.execute("COMMIT")
+        n += len(batch)
+        print(f"\r  {label}: {n:,}/{total:,}", end="", flush=True)
+    print(f"  ({time.perf_counter() - t0:.1f}s)")
+
+
+def generate(path, scale=1.0, seed=42, now=None):
+    """now: 합성 시각의 기준 (datetime, 기본 오늘 12시) – seed 와 함께 결과 DB 를 결정"""
+    # 스키마·마이그레이션은 앱과 같은 코드로 (환경변수로 대상 DB 지정 후 import)
+    os.environ["INSPECTION_DB"] = path
+    import common
+    import migrations
+    common.init_db()
+
+    rng = random.Random(seed)
+    n_skus = max(10, int(FULL_SKUS * scale))
+    n_ir = max(10, int(FULL_INSPECTIONS * scale))
+    n_wo = max(10, int(FULL_WORK_ORDERS * scale))
+    now = now or datetime.now().replace(hour=12, minute=0, second=0, microsecond=0)
+
+    con = sqlite3.connect(path, isolation_level=None)
+    con.execute("PRAGMA journal_mode=WAL")
+    con.execute("PRAGMA synchronous=OFF")
+    con.execute("PRAGMA cache_size=-262144")
+
+    triggers = con.execute("SELECT name, sql FROM sqlite_master WHERE type='trigger'").fetchall()
+    for name, _sql in triggers:
+        con.execute(f"DROP TRIGGER {name}")
+
+    # ---------------- 사용자 ----------------
+    con.execute("UPDATE users SET created_at=?", (now.strftime("%Y-%m-%d %H:%M:%S"),))   # init_db 기본 계정
+    con.executemany(
+        "INSERT INTO users(username, password, role, created_at) VALUES (?,?,?,?)",
+        [(f"worker{i}", "bench", "worker", now.strftime("%Y-%m-%d %H:%M:%S")) for i in range(2, WORKERS + 1)]
+        + [(f"insp{i}", "bench", "inspector", now.strftime("%Y-%m-%d %H:%M:%S")) for i in range(2, INSPECTORS + 1)],
+    )
+    worker_ids = [r[0] for r in con.execute("SELECT id FROM users WHERE role='worker'")]
+    inspector_ids = [r[0] for r in con.execute("SELECT id FROM users WHERE role='inspector'")]
+
+    vendors = _names(rng, 300, lambda: f"{rng.choice(VENDOR_PREFIX)} {rng.randint(1, 9)}층 {rng.randint(1, 300)}호")
+    brands = _names(rng, 60, lambda: "".join(rng.choices(BRAND_SYLL, k=rng.randint(2, 3))))
+
+    # ---------------- 상품 / SKU ----------------
+    print(f"generating into {path} (scale={scale}, seed={seed}, now={now:%Y-%m-%d %H:%M:%S})")
+    products = []                    # (pid, 이름, 도매처, 브랜드, 로케이션, 등록일, [바코드])
+    sku_rows = []
+    barcode_seq = 8800000000000
+    pid = 0
+    while len(sku_rows) < n_skus:
+        pid += 1
+        name = f"{rng.choice(GENDER)} {rng.choice(STYLE)} {rng.choice(MATERIAL)} {rng.choice(ITEM)}"
+        if rng.random() < 0.3:
+            name += f" {rng.randint(1, 99):02d}"
+        brand, vendor = rng.choice(brands), rng.choice(vendors)
+        loc = f"{rng.choice('ABCDEFGH')}-{rng.randint(1, 40):02d}-{rng.randint(1, 12):02d}"
+        created = _ts(now, rng, HISTORY_DAYS)
+        codes = []
+        for color in rng.sample(COLORS, k=min(len(COLORS), rng.randint(*SKUS_PER_PRODUCT))):
+            barcode_seq += 1
+            codes.append(str(barcode_seq))
+            sku_rows.append((pid, str(barcode_seq), vendor, "정상", created, color, rng.choice(SIZES)))
+        products.append((pid, name, vendor, brand, loc, created, codes))
+    sku_rows = sku_rows[:n_skus]
+
+    _insert(con, "INSERT INTO products(id, product_name, vendor_id, operator_id, location, created_at) "
+                 "VALUES (?,?,?,?,?,?)",
+            ((p, n, v, b, l, c) for p, n, v, b, l, c, _ in products), "products", len(products))
+    _insert(con, "INSERT INTO skus(product_id, barcode, vendor, status, created_at, color, size) "
+                 "VALUES (?,?,?,?,?,?,?)", iter(sku_rows), "skus", len(sku_rows))
+
+    # ---------------- 검수 결과 ----------------
+    def inspections():
+        for i in range(1, n_ir + 1):
+            pid_, _n, _v, brand, _l, _c, codes = products[rng.randrange(len(products))]
+            total = rng.randint(1, 40)
+            defect = rng.randint(0, total // 4) if rng.random() < 0.35 else 0
+            pending = rng.randint(0, total - defect) if rng.random() < 0.05 else 0
+            normal = total - defect - pending
+            when = _ts(now, rng, 0.3) if rng.random() < TODAY_SHARE else _ts(now, rng, HISTORY_DAYS)
+            status = "보류" if pending else "불량" if defect else "정상"
+            sim = round(rng.uniform(60, 99.9), 1) if rng.random() < 0.6 else None
+            yield (i, "", pid_, rng.choice(inspector_ids), codes[rng.randrange(len(codes))], brand, sim,
+                   normal, defect, pending, total, "", when, status)
+
+    _insert(con, "INSERT INTO inspection_results(id, image_name, product_id, inspector_id, barcode, operator, "
+                 "similarity_pct, normal_qty, defect_qty, pending_qty, total_qty, comment, inspected_at, status) "
+                 "VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?)", inspections(), "inspection_results", n_ir)
+
+    # ---------------- 작업 기록 ----------------
+    def work_orders():
+        for _ in range(n_wo):
+            ir_id = rng.randint(1, n_ir)
+            when = _ts(now, rng, HISTORY_DAYS)
+            yield (ir_id, rng.choice(worker_ids), rng.choice((0, 0, 0, 1, 2)), rng.randint(1, 10), 0,
+                   rng.choice(DIFFICULTY), rng.choice(EXTRAS), when)
+
+    _insert(con, "INSERT INTO work_orders(inspection_id, worker_id, additional_defect_qty, repaired_qty, "
+                 "repaired_approved, difficulty, extra_tasks, created_at) VALUES (?,?,?,?,?,?,?,?)",
+            work_orders(), "work_orders", n_wo)
+
+    # ---------------- 파생 테이블 재구성 + 트리거 복구 ----------------
+    t0 = time.perf_counter()
+    con.execute("BEGIN")
+    cur = con.cursor()
+    migrations.m004_product_search(cur)               # 검색 색인 전체 재작성
+    migrations.rebuild_slip_progress(cur)
+    migrations.rebuild_daily_rollup(cur, "inspection")
+    migrations.rebuild_daily_rollup(cur, "work")
+    existing = {r[0] for r in con.execute("SELECT name FROM sqlite_master WHERE type='trigger'")}
+    for name, sql in triggers:
+        if name not in existing:                      # m004 가 다시 만든 검색 트리거는 제외
+            con.execute(sql)
+    con.execute("COMMIT")
+    con.execute("ANALYZE")
+    print(f"  derived tables + ANALYZE ({time.perf_counter() - t0:.1f}s)")
+    con.close()
+
+
+def _anchor(text):
+    try:
+        return datetime.strptime(text, "%Y-%m-%d %H:%M:%S")
+    except ValueError:
+        pass
+    try:
+        return datetime.strptime(text, "%Y-%m-%d").replace(hour=12)
+    except ValueError:
+        pass
+    raise argparse.ArgumentTypeError(f"시각 형식 오류: {text}")
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="벤치마크용 합성 DB 생성")
+    ap.add_argument("--out", required=True, help="생성할 DB 파일 (이미 있으면 --force 필요)")
+    ap.add_argument("--scale", type=float, default=1.0, help="1.0 = SKU 1M / 검수 5M / 작업 20M")
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--now", type=_anchor, default=None,
+                    help="합성 시각 기준 'YYYY-MM-DD[ HH:MM:SS]' (기본: 오늘 12시)")
+    ap.add_argument("--force", action="store_true", help="기존 파일 덮어쓰기")
+    args = ap.parse_args(argv)
+
+    if os.path.exists(args.out):
+        if not args.force:
+            print(f"{args.out} 이(가) 이미 있습니다 (--force 로 덮어쓰기)")
+            return 2
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(args.out + suffix):
+                os.remove(args.out + suffix)
+    generate(args.out, args.scale, args.seed, args.now)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
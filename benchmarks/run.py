@@ -0,0 +1,253 @@
+################################################################################
+# benchmarks/run.py  –  화면별 조회 함수 응답시간 측정 (p50/p95/p99 → JSON)
+#
+#   INSPECTION_DB=bench.db python -m benchmarks.run --out result.json
+#   INSPECTION_DB=bench.db python -m benchmarks.run --compare base.json --only worker_scan
+#
+#   pandas / streamlit 이 필요한 항목(검수 결과 리스트 등)은 없으면 skipped 로 기록.
+################################################################################
+import argparse
+import json
+import os
+import platform
+import random
+import sqlite3
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta
+
+WARMUP = 3
+CASES = []          # (이름, 반복 횟수, fn(ctx, rng))
+
+
+def case(name, n=200):
+    def deco(fn):
+        CASES.append((name, n, fn))
+        return fn
+    return deco
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+#  측정 항목 – 각 화면이 실제로 호출하는 함수
+# ══════════════════════════════════════════════════════════════════════════════
+@case("product_list.count")
+def _(ctx, rng):
+    from product_pager import count_products
+    count_products(ctx["cur"])
+
+
+@case("product_list.count_by_vendor")
+def _(ctx, rng):
+    from product_pager import count_products
+    count_products(ctx["cur"], "vendor_id", rng.choice(ctx["vendors"]))
+
+
+@case("product_list.first_page")
+def _(ctx, rng):
+    from product_pager import fetch_page, main_images
+    rows, _next = fetch_page(ctx["cur"], None, 20)
+    main_images(ctx["cur"], [r[0] for r in rows])
+
+
+@case("product_list.jump_page", n=50)
+def _(ctx, rng):
+    from product_pager import page_anchor, fetch_page
+    anchor = page_anchor(ctx["cur"], rng.randrange(max(1, ctx["products"] // 20)), 20)
+    fetch_page(ctx["cur"], anchor, 20)
+
+
+@case("product_list.search_3plus")
+def _(ctx, rng):
+    from product_search import search_products
+    search_products(ctx["cur"], rng.choice(ctx["keywords_long"]))
+
+
+@case("product_list.search_short")
+def _(ctx, rng):
+    from product_search import search_products
+    search_products(ctx["cur"], rng.choice(ctx["keywords_short"]))
+
+
+@case("worker_scan.lookup_miss", n=500)
+def _(ctx, rng):
+    import slip_cache
+    bc = rng.choice(ctx["today_barcodes"])
+    slip_cache.invalidate(barcodes=[bc])
+    slip_cache.lookup(ctx["cur"], bc)
+
+
+@case("worker_scan.lookup_hit", n=2000)
+def _(ctx, rng):
+    import slip_cache
+    slip_cache.lookup(ctx["cur"], rng.choice(ctx["today_barcodes"]))
+
+
+@case("worker_scan.progress", n=500)
+def _(ctx, rng):
+    from slip_progress import slip_totals, slip_workers
+    sid = rng.choice(ctx["slip_ids"])
+    slip_totals(ctx["cur"], sid)
+    slip_workers(ctx["cur"], sid)
+
+
+@case("result_list.load", n=3)
+def _(ctx, rng):
+    from inspector_result_list import load_results
+    load_results()
+
+
+def _period_case(label, days_back, month_start=False):
+    @case(f"worker_task_list.{label}", n=50)
+    def _(ctx, rng):
+        from inspector_worker_task_list import load_work_rows
+        from common import day_range
+        now = datetime.now()
+        start = now.replace(day=1) if month_start else now - timedelta(days=days_back)
+        load_work_rows(rng.choice(ctx["workers"]), *day_range(start, now))
+
+
+_period_case("today", 0)
+_period_case("last_7_days", 6)
+_period_case("this_month", 0, month_start=True)
+_period_case("last_30_days", 29)
+
+
+@case("analytics.trend_12m", n=10)
+def _(ctx, rng):
+    import analytics
+    from common import day_range
+    now = datetime.now()
+    df = analytics.inspection_frame(*day_range(now - timedelta(days=365), now))
+    analytics.trend(df, "W", "brand")
+    analytics.pareto(df, "product_id")
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+#  실행
+# ══════════════════════════════════════════════════════════════════════════════
+def _samples(cur, rng):
+    """측정 입력값 – 시드 고정으로 같은 DB 면 같은 입력"""
+    from common import day_range
+    lo, hi = day_range(datetime.now())
+    today = [r[0] for r in cur.execute(
+        "SELECT barcode FROM inspection_results WHERE inspected_at >= ? AND inspected_at < ? ORDER BY id LIMIT 2000",
+        (lo, hi))]
+    slips = [r[0] for r in cur.execute("SELECT inspection_id FROM slip_progress ORDER BY inspection_id DESC LIMIT 2000")]
+    ids = [r[0] for r in cur.execute("SELECT id FROM products ORDER BY id")]
+    pick = rng.sample(ids, min(500, len(ids)))              # SQL random() 대신 시드 고정 rng
+    names = [r[0] for r in cur.execute(
+        f"SELECT product_name FROM products WHERE id IN ({','.join('?' * len(pick))})", pick)]
+    words = sorted({w for n in names if n for w in n.split()})
+    return {
+        "today_barcodes": today or [r[0] for r in cur.execute("SELECT barcode FROM skus LIMIT 100")],
+        "slip_ids": slips or [0],
+        "keywords_long": [w for w in words if len(w) >= 3] or ["없음없음"],
+        "keywords_short": [w[:2] for w in words if len(w) >= 2] or ["없음"],
+        "vendors": [r[0] for r in cur.execute(
+            "SELECT DISTINCT vendor_id FROM products ORDER BY vendor_id LIMIT 300")] or [""],
+        "workers": [r[0] for r in cur.execute("SELECT id FROM users WHERE role='worker' ORDER BY id")] or [0],
+        "products": cur.execute("SELECT COUNT(*) FROM products").fetchone()[0],
+    }
+
+
+def _pct(sorted_ms, p):
+    """nearest-rank 백분위"""
+    k = max(0, min(len(sorted_ms) - 1, int(round(p / 100 * len(sorted_ms) + 0.5)) - 1))
+    return sorted_ms[k]
+
+
+def run_case(fn, n, ctx, seed):
+    rng = random.Random(seed)
+    for _ in range(min(WARMUP, n)):
+        fn(ctx, rng)
+    times = []
+    for _ in range(n):
+        t0 = time.perf_counter_ns()
+        fn(ctx, rng)
+        times.append((time.perf_counter_ns() - t0) / 1e6)
+    times.sort()
+    return {
+        "n": n,
+        "p50_ms": round(_pct(times, 50), 4),
+        "p95_ms": round(_pct(times, 95), 4),
+        "p99_ms": round(_pct(times, 99), 4),
+        "mean_ms": round(sum(times) / n, 4),
+        "max_ms": round(times[-1], 4),
+    }
+
+
+def _meta(cur):
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    from common import DB_PATH
+    return {
+        "commit": commit,
+        "db": DB_PATH,
+        "started_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "rows": {t: cur.execute(f"SELECT COUNT(*) FROM {t}").fetchone()[0]
+                 for t in ("products", "skus", "inspection_results", "work_orders")},
+    }
+
+
+def compare(base, new):
+    """두 결과의 p50/p95 비교표 출력 (비율 > 1 이면 느려짐)"""
+    print(f"{'case':36} {'p50 base':>10} {'p50 new':>10} {'ratio':>7} {'p95 base':>10} {'p95 new':>10} {'ratio':>7}")
+    for name, r in new["cases"].items():
+        b = base["cases"].get(name)
+        if not b or "p50_ms" not in b or "p50_ms" not in r:
+            continue
+        rat50 = r["p50_ms"] / b["p50_ms"] if b["p50_ms"] else float("inf")
+        rat95 = r["p95_ms"] / b["p95_ms"] if b["p95_ms"] else float("inf")
+        print(f"{name:36} {b['p50_ms']:10.3f} {r['p50_ms']:10.3f} {rat50:7.2f} "
+              f"{b['p95_ms']:10.3f} {r['p95_ms']:10.3f} {rat95:7.2f}")
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="화면별 조회 성능 측정 (INSPECTION_DB 로 대상 DB 지정)")
+    ap.add_argument("--out", help="결과 JSON 파일")
+    ap.add_argument("--compare", help="비교할 이전 결과 JSON")
+    ap.add_argument("--only", default="", help="이름에 이 문자열이 들어간 항목만")
+    ap.add_argument("--repeat", type=float, default=1.0, help="반복 횟수 배율")
+    ap.add_argument("--seed", type=int, default=7)
+    args = ap.parse_args(argv)
+
+    if not os.path.exists(os.environ.get("INSPECTION_DB", "inspection_data.db")):
+        print("대상 DB 가 없습니다 – python -m benchmarks.generate 로 먼저 생성하세요")
+        return 2
+    import common
+    common.init_db()
+    cur = common.get_connection().cursor()
+    ctx = {"cur": cur, **_samples(cur, random.Random(args.seed))}
+    result = {"meta": _meta(cur), "cases": {}}
+
+    for name, n, fn in CASES:
+        if args.only not in name:
+            continue
+        n = max(1, int(n * args.repeat))
+        try:
+            r = run_case(fn, n, ctx, args.seed)
+        except ImportError as e:
+            r = {"skipped": str(e)}
+        result["cases"][name] = r
+        if "skipped" in r:
+            print(f"{name:36} skipped ({r['skipped']})")
+        else:
+            print(f"{name:36} p50 {r['p50_ms']:9.3f} ms  p95 {r['p95_ms']:9.3f} ms  p99 {r['p99_ms']:9.3f} ms")
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            compare(json.load(f), result)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
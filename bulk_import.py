@@ -0,0 +1,290 @@
+################################################################################
+# bulk_import.py  –  상품/SKU/1차 검수 수량 대량 등록 (CSV·XLSX 스트리밍, 청크 단위 트랜잭션)
+################################################################################
+import csv
+import io
+import json
+import sqlite3
+from datetime import date, datetime, timedelta
+from itertools import islice
+from common import transaction, now_str, log_activity
+import slip_cache
+
+CHUNK_SIZE = 5000
+MAX_REJECT_ROWS = 10000          # 보고서에 원본을 보관하는 거부 행 수 (건수는 전부 셈)
+
+# 표준 컬럼명 ← 허용하는 헤더 (한글/영문)
+COLUMNS = {
+    "product_name": ("product_name", "제품명", "상품명"),
+    "vendor":       ("vendor", "도매처"),
+    "operator":     ("operator", "브랜드", "운영자"),
+    "location":     ("location", "로케이션", "보관위치"),
+    "color":        ("color", "색상"),
+    "size":         ("size", "사이즈"),
+    "barcode":      ("barcode", "바코드"),
+    "normal_qty":   ("normal_qty", "정상"),
+    "defect_qty":   ("defect_qty", "불량"),
+    "pending_qty":  ("pending_qty", "보류"),
+    "comment":      ("comment", "코멘트", "보류 코멘트"),
+    "inspected_at": ("inspected_at", "검수일시", "검수일"),
+}
+REQUIRED = ("product_name", "barcode")
+_ALIASES = {alias.strip().lower(): key for key, names in COLUMNS.items() for alias in names}
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+#  파일 → 행(dict) 스트림
+# ══════════════════════════════════════════════════════════════════════════════
+def _normalize_header(header):
+    keys = [_ALIASES.get(str(h or "").strip().lower()) for h in header]
+    missing = [c for c in REQUIRED if c not in keys]
+    if missing:
+        raise ValueError(f"필수 컬럼 누락: {', '.join(missing)}")
+    return keys
+
+
+def _iter_csv(fileobj, encoding):
+    text = io.TextIOWrapper(fileobj, encoding=encoding, newline="")
+    try:
+        reader = csv.reader(text)
+        keys = _normalize_header(next(reader, []))
+        for values in reader:
+            yield {k: v for k, v in zip(keys, values) if k}
+    finally:
+        text.detach()                                 # 업로드 버퍼는 닫지 않음
+
+
+def _iter_xlsx(fileobj):
+    try:
+        from openpyxl import load_workbook
+    except ImportError as e:
+        raise ImportError("XLSX 업로드에는 openpyxl 이 필요합니다 (pip install openpyxl)") from e
+    wb = load_workbook(fileobj, read_only=True, data_only=True)
+    try:
+        rows = wb.worksheets[0].iter_rows(values_only=True)
+        keys = _normalize_header(next(rows, ()))
+        for values in rows:
+            yield {k: v for k, v in zip(keys, values) if k}
+    finally:
+        wb.close()
+
+
+def iter_rows(fileobj, filename, encoding="utf-8-sig"):
+    """업로드 파일을 한 행씩 읽는 제너레이터 (전체를 메모리에 올리지 않음)"""
+    if filename.lower().endswith((".xlsx", ".xlsm")):
+        return _iter_xlsx(fileobj)
+    return _iter_csv(fileobj, encoding)
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+#  검증
+# ══════════════════════════════════════════════════════════════════════════════
+def _text(v):
+    return "" if v is None else str(v).strip()
+
+
+def _qty(v):
+    v = _text(v)
+    if not v:
+        return 0
+    q = int(float(v))
+    if q < 0:
+        raise ValueError
+    return q
+
+
+def _when(v):
+    """검수일시 → 'YYYY-MM-DD HH:MM:SS' / 날짜만 있으면 'YYYY-MM-DD' / 비어 있으면 ''"""
+    if isinstance(v, datetime):                      # XLSX 셀
+        return v.strftime("%Y-%m-%d %H:%M:%S")
+    if isinstance(v, date):
+        return v.strftime("%Y-%m-%d")
+    v = _text(v)
+    if not v:
+        return ""
+    for fmt in ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M"):
+        try:
+            return datetime.strptime(v, fmt).strftime("%Y-%m-%d %H:%M:%S")
+        except ValueError:
+            pass
+    return datetime.strptime(v, "%Y-%m-%d").strftime("%Y-%m-%d")
+
+
+def _clean(raw):
+    """raw dict → 정리된 dict, 문제가 있으면 (None, 사유)"""
+    row = {k: _text(raw.get(k)) for k in COLUMNS
+           if k not in ("normal_qty", "defect_qty", "pending_qty", "inspected_at")}
+    if not row["product_name"]:
+        return None, "제품명 없음"
+    if not row["barcode"]:
+        return None, "바코드 없음"
+    try:
+        for k in ("normal_qty", "defect_qty", "pending_qty"):
+            row[k] = _qty(raw.get(k))
+    except (ValueError, OverflowError):
+        return None, "수량 형식 오류"
+    try:
+        row["inspected_at"] = _when(raw.get("inspected_at"))
+    except ValueError:
+        return None, "검수일시 형식 오류"
+    return row, None
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+#  등록
+# ══════════════════════════════════════════════════════════════════════════════
+def _existing_barcodes(cur, barcodes):
+    """skus 바코드 인덱스로 이미 등록된 바코드 → product_id"""
+    out = {}
+    bcs = list(barcodes)
+    for i in range(0, len(bcs), 900):                 # SQLite 변수 개수 제한
+        part = bcs[i:i + 900]
+        qmarks = ",".join("?" * len(part))
+        out.update(cur.execute(
+            f"SELECT barcode, product_id FROM skus WHERE barcode IN ({qmarks})", part))
+    return out
+
+
+def _product_id(cur, row, state, report, now):
+    """(제품명, 도매처, 브랜드) 가 같은 기존 상품이 있으면 그 id, 없으면 새로 등록"""
+    key = (row["product_name"], row["vendor"], row["operator"])
+    pid = state["products"].get(key)
+    if pid is not None:
+        return pid
+    found = cur.execute(
+        "SELECT id FROM products WHERE product_name=? AND COALESCE(vendor_id,'')=? "
+        "AND COALESCE(operator_id,'')=? ORDER BY id LIMIT 1", key).fetchone()
+    if found:
+        pid = found[0]
+        report["existing_products"] += 1
+    else:
+        cur.execute(
+            "INSERT INTO products(product_name,vendor_id,operator_id,location,created_at) "
+            "VALUES(?,?,?,?,?)",
+            (row["product_name"], row["vendor"] or None, row["operator"] or None,
+             row["location"] or None, now),
+        )
+        pid = cur.lastrowid
+        report["products"] += 1
+    state["products"][key] = pid
+    return pid
+
+
+def _recorded(cur, barcode, at, day):
+    """이미 같은 검수 기록이 있는지 – 시각이 있으면 (바코드, 시각), 없으면 (바코드, 그날) 기준"""
+    if len(at) > 10:
+        sql, args = "inspected_at = ?", (at,)
+    else:
+        nxt = (datetime.strptime(day, "%Y-%m-%d") + timedelta(days=1)).strftime("%Y-%m-%d")
+        sql, args = "inspected_at >= ? AND inspected_at < ?", (day, nxt)
+    return cur.execute(
+        f"SELECT 1 FROM inspection_results WHERE barcode = ? AND {sql} LIMIT 1", (barcode, *args)
+    ).fetchone() is not None
+
+
+def _write_chunk(chunk, state, report, user_id):
+    """청크 1개를 단일 트랜잭션으로 기록
+
+    같은 파일을 다시 올려도 중복되지 않도록 이미 있는 검수 기록(바코드 + 검수일시, 일시가 없으면
+    바코드 + 오늘)은 건너뛰고, 새 바코드는 이름·도매처·브랜드가 같은 기존 상품에 붙인다.
+    """
+    with transaction() as cur:
+        existing = _existing_barcodes(cur, {row["barcode"] for _line, row in chunk})
+        sku_rows, ir_rows = [], []
+        now = now_str()
+        for line, row in chunk:
+            bc, at = row["barcode"], row["inspected_at"]
+            day = (at or now)[:10]
+            if (bc, at or day) in state["seen"]:
+                report["rejected"] += 1
+                if len(report["rejects"]) < MAX_REJECT_ROWS:
+                    report["rejects"].append((line, "파일 내 중복 바코드", row))
+                continue
+            state["seen"].add((bc, at or day))
+
+            if bc in existing:
+                # 이미 등록된 SKU → SKU 는 그대로, 검수 수량만 해당 상품으로 기록
+                pid = existing[bc]
+                report["existing_skus"] += 1
+            elif bc in state["skus"]:                 # 이 파일 앞쪽(다른 검수일)에서 만든 SKU
+                pid = state["skus"][bc]
+            else:
+                pid = state["skus"][bc] = _product_id(cur, row, state, report, now)
+                sku_rows.append((pid, bc, row["vendor"], "정상", now, row["color"], row["size"]))
+
+            n, d, p = row["normal_qty"], row["defect_qty"], row["pending_qty"]
+            if n + d + p:
+                if _recorded(cur, bc, at, day):
+                    report["existing_inspections"] += 1
+                    continue
+                status = "보류" if p else "불량" if d else "정상"
+                when = at if len(at) > 10 else f"{at} 00:00:00" if at else now
+                ir_rows.append(("", pid, user_id, bc, row["operator"], None,
+                                n, d, p, n + d + p, row["comment"], when, status))
+
+        cur.executemany(
+            "INSERT INTO skus(product_id,barcode,vendor,status,created_at,color,size) "
+            "VALUES(?,?,?,?,?,?,?)", sku_rows)
+        cur.executemany(
+            "INSERT INTO inspection_results("
+            "image_name,product_id,inspector_id,barcode,operator,similarity_pct,"
+            "normal_qty,defect_qty,pending_qty,total_qty,comment,inspected_at,status) "
+            "VALUES(?,?,?,?,?,?,?,?,?,?,?,?,?)", ir_rows)
+        report["skus"] += len(sku_rows)
+        report["inspections"] += len(ir_rows)
+    slip_cache.invalidate(barcodes=[r[3] for r in ir_rows])
+
+
+def import_rows(rows, user_id=None, chunk_size=CHUNK_SIZE, progress=None):
+    """행 스트림을 chunk_size 단위로 검증·중복제거 후 청크별 트랜잭션으로 등록
+
+    progress(처리 행 수) 콜백은 청크마다 호출된다. 반환: 보고서 dict
+    (rejects 에는 (행 번호, 사유, 값) 을 최대 MAX_REJECT_ROWS 건 보관)
+
+    파일 읽기·저장이 도중에 실패하면 예외 대신 그때까지의 보고서에 error 와 saved_rows
+    (커밋된 행 수 – 실패한 청크는 롤백)를 담아 돌려준다. 같은 파일을 다시 올리면 저장된 행은 건너뛴다.
+    """
+    report = {"read": 0, "saved_rows": 0, "products": 0, "existing_products": 0, "skus": 0,
+              "existing_skus": 0, "inspections": 0, "existing_inspections": 0,
+              "rejected": 0, "rejects": [], "error": None}
+    state = {"seen": set(), "products": {}, "skus": {}}
+    numbered = enumerate(rows, start=2)               # 1행은 헤더
+    try:
+        while True:
+            batch = list(islice(numbered, chunk_size))
+            if not batch:
+                break
+            chunk = []
+            for line, raw in batch:
+                row, reason = _clean(raw)
+                if row is None:
+                    report["rejected"] += 1
+                    if len(report["rejects"]) < MAX_REJECT_ROWS:
+                        report["rejects"].append((line, reason, raw))
+                else:
+                    chunk.append((line, row))
+            report["read"] += len(batch)
+            if chunk:
+                before = dict(report, rejects=len(report["rejects"]))
+                try:
+                    _write_chunk(chunk, state, report, user_id)
+                except sqlite3.Error:
+                    # 롤백된 청크의 집계는 되돌림 (읽은 행·검증 거부는 그대로)
+                    report.update({k: v for k, v in before.items() if k != "rejects"})
+                    del report["rejects"][before["rejects"]:]
+                    raise
+            report["saved_rows"] = report["read"]
+            if progress:
+                progress(report["read"])
+    except (ValueError, ImportError, sqlite3.Error) as e:   # UnicodeDecodeError 는 ValueError
+        report["error"] = str(e)
+
+    log_activity(
+        user_id=user_id,
+        action_type="IMPORT",
+        table_name="products",
+        record_id=None,
+        old_data="{}",
+        new_data=json.dumps({k: v for k, v in report.items() if k != "rejects"}, ensure_ascii=False),
+    )
+    return report
@@ -0,0 +1,276 @@
+################################################################################
+# cold_storage.py  –  지난 달 이력 Parquet 콜드 보관 (월·브랜드 파티션) + hot/cold 통합 조회
+#
+#   python cold_storage.py tier              # HOT_MONTHS 이전 달을 Parquet 로 옮김
+#   python cold_storage.py list              # 파티션 목록
+#   python cold_storage.py restore <테이블>  # 콜드 파티션을 SQLite 로 되돌림
+#
+#   pandas / pyarrow 는 이 모듈을 실제로 쓸 때만 import (없으면 ImportError 안내)
+################################################################################
+import logging
+import os
+import sys
+import time
+from datetime import datetime
+from urllib.parse import quote
+from common import get_connection, transaction, now_str, init_db
+
+COLD_DIR = os.path.join(os.getcwd(), "cold")
+HOT_MONTHS = 6          # 이번 달 포함 최근 N 개월은 SQLite 에 유지 (그 이전 달은 '마감'으로 보고 이동)
+BATCH_SIZE = 500        # 삭제 트랜잭션 1개(쓰기 잠금 1회)당 행 수
+BATCH_PAUSE = 0.2       # 배치 사이 대기(초) – 화면·스캐너 쓰기가 끼어들 수 있게
+
+# 테이블별: 시각 컬럼, 브랜드 식(t = 대상 테이블 별칭, 없으면 None → 브랜드 '' 파티션 하나)
+# work_orders 는 급여 정산·작업 수정 화면이 SQLite 에서 직접 읽고 고치므로 옮기지 않음
+# (보관 기한은 retention.py 정책을 따름)
+TABLES = {
+    "inspection_results": {"column": "inspected_at", "brand": "t.operator"},
+    "activity_log":       {"column": "created_at", "brand": None},
+}
+
+# 원본 테이블 → 일별 집계 종류 (analytics.ROLLUP_SOURCE 의 역)
+_ROLLUP_KIND = {"inspection_results": "inspection", "work_orders": "work"}
+
+logger = logging.getLogger(__name__)
+
+
+def _pandas():
+    try:
+        import pandas as pd
+        import pyarrow  # noqa: F401  (to_parquet / read_parquet 엔진)
+    except ImportError as e:
+        raise ImportError("콜드 보관에는 pandas, pyarrow 가 필요합니다 (pip install pandas pyarrow)") from e
+    return pd
+
+
+def available():
+    """pandas/pyarrow 설치 여부"""
+    try:
+        _pandas()
+        return True
+    except ImportError:
+        return False
+
+
+def _month_shift(month, n):
+    y, m = divmod(int(month[:4]) * 12 + int(month[5:7]) - 1 + n, 12)
+    return f"{y:04d}-{m + 1:02d}"
+
+
+def hot_start(now=None):
+    """이 달('YYYY-MM') 이전이 콜드 대상"""
+    return _month_shift((now or datetime.now()).strftime("%Y-%m"), -(HOT_MONTHS - 1))
+
+
+def _brand_sql(spec):
+    return f"COALESCE({spec['brand']}, '')" if spec["brand"] else "''"
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+#  hot → cold 이동
+# ══════════════════════════════════════════════════════════════════════════════
+def tier_month(table, month):
+    """table 의 한 달치 행을 브랜드별 Parquet 파일로 쓰고 manifest 등록 후 SQLite 에서 배치 삭제 → 이동 건수
+
+    읽기·파일 쓰기는 쓰기 트랜잭션 밖에서 하고, 쓰기 잠금은 manifest 등록 1번 + BATCH_SIZE 씩 삭제할
+    때만 잡는다 (화면·스캐너 저장이 busy_timeout 에 걸리지 않도록). 마감된 달이라 그 사이 수정은 없다고
+    보되, 달의 행 수가 읽은 뒤 바뀌었으면 (다른 프로세스가 먼저 옮겼거나 행이 추가됨) 취소한다.
+    manifest 등록 ~ 삭제 완료 사이에는 같은 행이 hot·cold 양쪽에 있으므로 read_table 이 id 로 거른다.
+    """
+    pd = _pandas()
+    spec = TABLES[table]
+    col = spec["column"]
+    lo, hi = f"{month}-01", f"{_month_shift(month, 1)}-01"
+    df = pd.read_sql_query(
+        f"SELECT t.rowid AS _rowid, t.*, {_brand_sql(spec)} AS _brand "
+        f"FROM {table} t WHERE t.{col} >= ? AND t.{col} < ?",
+        get_connection(), params=(lo, hi),
+    )
+    if df.empty:
+        return 0
+
+    written = []
+    try:
+        stamp = time.strftime("%Y%m%d%H%M%S")
+        manifest = []
+        for brand, part in df.groupby("_brand", sort=False):
+            rel = os.path.join(table, f"month={month}", f"brand={quote(brand, safe='')}",
+                               f"part-{stamp}.parquet")
+            path = os.path.join(COLD_DIR, rel)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            part.drop(columns=["_rowid", "_brand"]).to_parquet(path + ".tmp", index=False)
+            os.replace(path + ".tmp", path)
+            written.append(path)
+            manifest.append((table, month, brand, rel, len(part), part[col].min(), part[col].max(), now_str()))
+        with transaction() as cur:
+            n = cur.execute(f"SELECT COUNT(*) FROM {table} WHERE {col} >= ? AND {col} < ?", (lo, hi)).fetchone()[0]
+            if n != len(df):
+                logger.warning("cold: %s %s 행 수가 바뀌어 취소 (%d → %d)", table, month, len(df), n)
+                raise _Changed()
+            cur.executemany(
+                "INSERT INTO cold_partitions(table_name, month, brand, path, rows, min_at, max_at, created_at) "
+                "VALUES (?,?,?,?,?,?,?,?)", manifest)
+    except BaseException as e:
+        for path in written:                           # manifest 에 못 올린 파일은 지움
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        if isinstance(e, _Changed):
+            return 0
+        raise
+
+    rowids = [(int(r),) for r in df["_rowid"]]
+    for i in range(0, len(rowids), BATCH_SIZE):
+        with transaction() as cur:
+            cur.executemany(f"DELETE FROM {table} WHERE rowid=?", rowids[i:i + BATCH_SIZE])
+        if i + BATCH_SIZE < len(rowids):
+            time.sleep(BATCH_PAUSE)
+    logger.info("cold: %s %s → %d행", table, month, len(df))
+    return len(df)
+
+
+class _Changed(Exception):
+    """tier_month: 읽은 뒤 달의 행이 바뀜"""
+
+
+def restore(table):
+    """table 의 콜드 파티션을 SQLite 로 되돌리고 파일·manifest 삭제 → 되돌린 행 수 (이미 있는 id 는 건너뜀)"""
+    pd = _pandas()
+    cur = get_connection().cursor()
+    parts = cur.execute("SELECT id, month, path FROM cold_partitions WHERE table_name=? ORDER BY id",
+                        (table,)).fetchall()
+    kind = _ROLLUP_KIND.get(table)
+    total = 0
+    for part_id, month, rel in parts:
+        path = os.path.join(COLD_DIR, rel)
+        df = pd.read_parquet(path)
+        df = df.astype(object).where(df.notna(), None)
+        cols = ",".join(df.columns)
+        rows = [tuple(r) for r in df.itertuples(index=False)]
+        for i in range(0, len(rows), BATCH_SIZE):
+            with transaction() as tx:
+                tx.executemany(f"INSERT OR IGNORE INTO {table}({cols}) VALUES ({','.join('?' * len(df.columns))})",
+                               rows[i:i + BATCH_SIZE])
+                if kind:                                 # 보관 월 집계는 이동 전에 계산된 그대로 유지
+                    tx.execute("DELETE FROM rollup_dirty WHERE kind=? AND day >= ? AND day < ?",
+                               (kind, f"{month}-01", f"{_month_shift(month, 1)}-01"))
+                if i + BATCH_SIZE >= len(rows):          # 마지막 배치와 함께 manifest 제거
+                    tx.execute("DELETE FROM cold_partitions WHERE id=?", (part_id,))
+        if not rows:
+            with transaction() as tx:
+                tx.execute("DELETE FROM cold_partitions WHERE id=?", (part_id,))
+        os.remove(path)
+        total += len(rows)
+    logger.info("cold: %s 복원 %d행", table, total)
+    return total
+
+
+def tier_closed_months(now=None):
+    """HOT_MONTHS 이전 달을 테이블별로 이동 → {테이블: {월: 건수}}"""
+    cutoff = f"{hot_start(now)}-01"
+    cur = get_connection().cursor()
+    # 이제 옮기지 않는 테이블(work_orders)을 예전에 옮겨 둔 파티션은 SQLite 로 되돌림
+    for (table,) in cur.execute("SELECT DISTINCT table_name FROM cold_partitions").fetchall():
+        if table not in TABLES:
+            restore(table)
+    report = {}
+    for table, spec in TABLES.items():
+        col = spec["column"]
+        months = [m for (m,) in cur.execute(
+            f"SELECT DISTINCT substr({col}, 1, 7) FROM {table} WHERE {col} >= '0' AND {col} < ? ORDER BY 1",
+            (cutoff,),
+        )]
+        report[table] = {m: tier_month(table, m) for m in months}
+    return report
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+#  hot + cold 통합 조회
+# ══════════════════════════════════════════════════════════════════════════════
+def partitions(table, start=None, end=None, brands=None):
+    """조건에 걸리는 manifest 행 [(month, brand, path, rows), ...] – 월·브랜드로 파티션 제외"""
+    sql = "SELECT month, brand, path, rows FROM cold_partitions WHERE table_name=?"
+    params = [table]
+    if start:
+        sql += " AND month >= ?"
+        params.append(start[:7])
+    if end:
+        sql += " AND month < ?"                         # end 는 반열린 구간 상한 (날짜)
+        params.append(end[:7] if end[8:10] == "01" or len(end) == 7 else _month_shift(end[:7], 1))
+    if brands is not None:
+        sql += f" AND brand IN ({','.join('?' * len(brands))})"
+        params += [b or "" for b in brands]
+    return get_connection().execute(sql + " ORDER BY month, brand, id", params).fetchall()
+
+
+def read_table(table, start=None, end=None, brands=None, hot=True, cold=True):
+    """hot(SQLite) + cold(Parquet) 행을 하나의 DataFrame 으로 (_tier 컬럼: 'hot' / 'cold')
+
+    start/end : 시각 컬럼 반열린 구간 [start, end) 문자열 (day_range 결과 그대로)
+    brands    : 브랜드 목록 (None 이면 전체, '' 는 브랜드 없음)
+    """
+    pd = _pandas()
+    spec = TABLES[table]
+    col = spec["column"]
+
+    where, params = [], []
+    if start:
+        where.append(f"t.{col} >= ?"); params.append(start)
+    if end:
+        where.append(f"t.{col} < ?"); params.append(end)
+    if brands is not None:
+        where.append(f"{_brand_sql(spec)} IN ({','.join('?' * len(brands))})")
+        params += [b or "" for b in brands]
+    sql = f"SELECT t.* FROM {table} t" + (" WHERE " + " AND ".join(where) if where else "")
+    if not hot:
+        sql += " LIMIT 0"                               # 컬럼 구성만 맞춤
+    frames = [pd.read_sql_query(sql, get_connection(), params=params)]
+    frames[0]["_tier"] = "hot"
+
+    if cold:
+        for _month, _brand, rel, _rows in partitions(table, start, end, brands):
+            part = pd.read_parquet(os.path.join(COLD_DIR, rel))
+            # 경계 달은 일 단위까지 다시 거름
+            if start:
+                part = part[part[col] >= start]
+            if end:
+                part = part[part[col] < end]
+            if len(part):
+                frames.append(part.assign(_tier="cold"))
+    if len(frames) == 1:
+        return frames[0]
+    df = pd.concat(frames, ignore_index=True)
+    # 이동 중(manifest 등록 ~ 배치 삭제 완료)에는 같은 행이 양쪽에 있음 → hot 쪽을 남김
+    return df.drop_duplicates("id", keep="first", ignore_index=True) if "id" in df.columns else df
+
+
+def lookup(table, ids, column, end=None):
+    """cold 파티션에서 id → column 값 {id: 값} (두 컬럼만 읽음, end 이후 달의 파티션은 제외)"""
+    pd = _pandas()
+    want, out = set(ids), {}
+    for _month, _brand, rel, _rows in partitions(table, end=end):
+        part = pd.read_parquet(os.path.join(COLD_DIR, rel), columns=["id", column])
+        part = part[part["id"].isin(want)]
+        out.update(zip(part["id"].astype(int), part[column]))
+        if len(out) == len(want):
+            break
+    return out
+
+
+if __name__ == "__main__":
+    init_db()
+    cmd = sys.argv[1] if len(sys.argv) > 1 else "list"
+    if cmd == "tier":
+        for table, months in tier_closed_months().items():
+            for month, n in months.items():
+                print(f"{table} {month}: {n} rows → cold")
+    elif cmd == "restore" and len(sys.argv) > 2:
+        print(f"{sys.argv[2]}: {restore(sys.argv[2])} rows → SQLite")
+    elif cmd == "list":
+        for table in ("work_orders", *TABLES):
+            for month, brand, rel, rows in partitions(table):
+                print(f"{table:20} {month} {brand or '-':15} {rows:>8}  {rel}")
+    else:
+        print("usage: python cold_storage.py [tier|list|restore <table>]")
+        sys.exit(2)
@@ -1,30 +1,141 @@
 import sqlite3
 import os
-from datetime import datetime
+import atexit
+import logging
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from migrations import run_migrations
+import sql_trace
 
-DB_PATH = "inspection_data.db"
+DB_PATH = os.environ.get("INSPECTION_DB", "inspection_data.db")   # 벤치마크 등은 환경변수로 다른 DB 지정
+
+# 커넥션 설정
+POOL_SIZE = 8                      # 유휴 커넥션 보관 개수
+BUSY_TIMEOUT_MS = 5000             # 쓰기 잠금 대기
+MMAP_SIZE = 256 * 1024 * 1024      # 256MB
+STATEMENT_CACHE_SIZE = 256         # 커넥션별 prepared statement 캐시
+
+# 감사 로그(activity_log) 비동기 기록
+LOG_QUEUE_SIZE = 10000             # 가득 차면 호출부가 잠시 대기 (backpressure)
+LOG_BATCH_SIZE = 200               # 이 개수가 모이면 즉시 기록
+LOG_FLUSH_INTERVAL = 1.0           # 또는 이 시간(초)이 지나면 기록
+
+logger = logging.getLogger(__name__)
+
+_db_ready = False
+_idle = queue.LifoQueue(maxsize=POOL_SIZE)
+_local = threading.local()
 
 
 def now_str():
     return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
 
+def day_range(start, end=None):
+    """[start, end] 날짜 구간 → 시각 컬럼 비교용 반열린 구간 (lo, hi) 문자열
+
+    WHERE col >= lo AND col < hi 형태로 쓰면 인덱스를 그대로 탄다.
+    """
+    end = end or start
+    return start.strftime("%Y-%m-%d"), (end + timedelta(days=1)).strftime("%Y-%m-%d")
+
+
+def _open_connection():
+    con = sqlite3.connect(
+        DB_PATH,
+        timeout=BUSY_TIMEOUT_MS / 1000,
+        isolation_level=None,          # autocommit – 쓰기는 transaction() 으로 묶는다
+        check_same_thread=False,       # 스레드 종료 후 다른 스레드가 풀에서 재사용
+        cached_statements=STATEMENT_CACHE_SIZE,
+        factory=sql_trace.TracingConnection if sql_trace.enabled() else sqlite3.Connection,
+    )
+    con.execute("PRAGMA journal_mode=WAL")
+    con.execute("PRAGMA synchronous=NORMAL")
+    con.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+    con.execute(f"PRAGMA mmap_size={MMAP_SIZE}")
+    return con
+
+
+def _release(con):
+    """커넥션을 풀로 반납 (열린 트랜잭션은 롤백, 풀이 가득 차면 닫음)"""
+    try:
+        if con.in_transaction:
+            con.rollback()
+        _idle.put_nowait(con)
+    except (queue.Full, sqlite3.Error):
+        con.close()
+
+
+def reset_pool():
+    """현재 스레드 커넥션 반납 + 유휴 커넥션 모두 닫기 – SQL 추적 on/off 를 새 커넥션부터 반영
+
+    다른 스레드가 쓰는 중인 커넥션은 그 스레드가 끝나 반납될 때까지 그대로 쓰인다.
+    """
+    _local.lease = None
+    while True:
+        try:
+            _idle.get_nowait().close()
+        except queue.Empty:
+            return
+
+
+class _Lease:
+    """스레드 로컬에 보관되는 커넥션 대여증 – 스레드가 끝나면 GC 되면서 풀로 반납"""
+
+    def __init__(self, con):
+        self.con = con
+
+    def __del__(self):
+        _release(self.con)
+
+
 def get_connection():
-    return sqlite3.connect(DB_PATH, check_same_thread=False)
+    """현재 스레드 전용 커넥션. 스레드 안에서는 같은 커넥션을 재사용하고 스레드 간에는 공유하지 않는다."""
+    lease = getattr(_local, "lease", None)
+    if lease is None:
+        try:
+            con = _idle.get_nowait()
+        except queue.Empty:
+            con = _open_connection()
+        lease = _local.lease = _Lease(con)
+    return lease.con
 
 
-def ensure_column_exists(table, column, col_type):
+@contextmanager
+def transaction():
+    """with transaction() as cur: ... – 정상 종료 시 COMMIT, 예외(st.stop/st.rerun 포함) 시 ROLLBACK
+
+    중첩 호출은 SAVEPOINT 로 처리한다.
+    """
     con = get_connection()
     cur = con.cursor()
-    cols = cur.execute(f"PRAGMA table_info({table})").fetchall()
-    col_names = [c[1] for c in cols]
-    if column not in col_names:
-        cur.execute(f"ALTER TABLE {table} ADD COLUMN {column} {col_type}")
-        con.commit()
-    con.close()
+    if con.in_transaction:
+        cur.execute("SAVEPOINT nested")
+        try:
+            yield cur
+        except BaseException:
+            cur.execute("ROLLBACK TO nested")
+            cur.execute("RELEASE nested")
+            raise
+        cur.execute("RELEASE nested")
+        return
+    cur.execute("BEGIN IMMEDIATE")
+    try:
+        yield cur
+    except BaseException:
+        cur.execute("ROLLBACK")
+        raise
+    cur.execute("COMMIT")
 
 
 def init_db():
+    """테이블 생성 + 스키마 마이그레이션. 프로세스당 1회만 실행되며 적용된 마이그레이션 목록 반환"""
+    global _db_ready
+    if _db_ready:
+        return []
     con = get_connection()
     cur = con.cursor()
     cur.executescript("""
@@ -115,13 +226,8 @@ def init_db():
       size TEXT DEFAULT ''
     );
     """)
-    con.commit()
 
-    ensure_column_exists("inspection_results", "inspected_at", "TEXT")
-    ensure_column_exists("inspection_results", "status", "TEXT")
-    ensure_column_exists("inspection_results", "barcode", "TEXT")
-    ensure_column_exists("skus", "color", "TEXT")
-    ensure_column_exists("skus", "size", "TEXT")
+    applied = run_migrations(con)
 
     count = cur.execute("SELECT count(*) FROM users").fetchone()[0]
     if count == 0:
@@ -132,16 +238,96 @@ def init_db():
         ('insp1','insp1','inspector','{now_str()}'),
         ('worker1','worker1','worker','{now_str()}');
         """)
-        con.commit()
-    con.close()
+    _db_ready = True
+    return applied
+
+
+_LOG_INSERT = """
+    INSERT INTO activity_log(user_id, action_type, table_name, record_id, old_data, new_data, created_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+"""
+_STOP = object()
+
+
+class ActivityLogWriter:
+    """activity_log 행을 bounded queue 에 모아 백그라운드 스레드가 executemany 로 일괄 기록"""
+
+    def __init__(self, maxsize=LOG_QUEUE_SIZE, batch_size=LOG_BATCH_SIZE, interval=LOG_FLUSH_INTERVAL):
+        self.batch_size = batch_size
+        self.interval = interval
+        self._q = queue.Queue(maxsize)
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="activity-log-writer", daemon=True)
+                self._thread.start()
+
+    def put(self, row):
+        self._ensure_started()
+        self._q.put(row)
+
+    def queue_depth(self):
+        """아직 DB 에 기록되지 않은 행 수"""
+        return self._q.unfinished_tasks
+
+    def flush(self):
+        """지금까지 넣은 행이 모두 기록될 때까지 대기"""
+        if self._thread is not None:
+            self._q.join()
+
+    def close(self):
+        """남은 행을 기록하고 스레드 종료 (atexit)"""
+        if self._thread is not None and self._thread.is_alive():
+            self._q.put(_STOP)
+            self._thread.join()
+
+    def _write(self, batch):
+        try:
+            with transaction() as cur:
+                cur.executemany(_LOG_INSERT, batch)
+        except sqlite3.Error:
+            logger.exception("activity_log %d건 기록 실패", len(batch))
+        finally:
+            for _ in batch:
+                self._q.task_done()
+
+    def _run(self):
+        batch, deadline = [], None
+        while True:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                item = self._q.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+            if item is _STOP:
+                if batch:
+                    self._write(batch)
+                self._q.task_done()
+                return
+            if item is not None:
+                batch.append(item)
+                if deadline is None:
+                    deadline = time.monotonic() + self.interval
+            if batch and (len(batch) >= self.batch_size or time.monotonic() >= deadline):
+                self._write(batch)
+                batch, deadline = [], None
+
+
+_log_writer = ActivityLogWriter()
+atexit.register(_log_writer.close)
 
 
 def log_activity(user_id, action_type, table_name, record_id, old_data, new_data):
-    con = get_connection()
-    cur = con.cursor()
-    cur.execute("""
-        INSERT INTO activity_log(user_id, action_type, table_name, record_id, old_data, new_data, created_at)
-        VALUES (?, ?, ?, ?, ?, ?, ?)
-    """, (user_id, action_type, table_name, record_id, old_data, new_data, now_str()))
-    con.commit()
-    con.close()
+    """감사 로그를 큐에 넣고 즉시 반환 (기록은 백그라운드 스레드가 일괄 처리)"""
+    _log_writer.put((user_id, action_type, table_name, record_id, old_data, new_data, now_str()))
+
+
+def flush_activity_log():
+    _log_writer.flush()
+
+
+def activity_log_queue_depth():
+    return _log_writer.queue_depth()
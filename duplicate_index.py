@@ -0,0 +1,196 @@
+################################################################################
+# duplicate_index.py  –  중복 상품 감지 (대표 이미지 pHash → BK-tree 해밍 거리 검색)
+#
+#   python duplicate_index.py sync                # 아직 해시가 없는 product_images 추가
+#   python duplicate_index.py check <사진> [반경]  # 중복 후보 출력
+#
+#   해시·트리는 DB(image_hashes / phash_bk, m010)에 있어 프로세스 간 공유된다.
+#   새 이미지는 저장 직후 index_product() 로, 그 밖의 경로(일괄 등록·다른 프로세스)로 들어온
+#   이미지는 백그라운드 sync() 로 트리에 하나씩 끼워 넣는다 (전체 재구성 없음).
+#   화면의 중복 조회(find_duplicates)는 읽기만 한다.
+################################################################################
+import logging
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from common import get_connection, init_db, transaction
+from image_store import resolve_images
+from image_similarity import phash
+
+RADIUS = 10                  # 해밍 거리 ≤ 이 값이면 중복 후보 (64비트 중)
+SYNC_BATCH = 500
+SYNC_WORKERS = 4
+SYNC_INTERVAL = 10 * 60      # 초 – 백그라운드 동기화 주기
+_MASK = (1 << 64) - 1
+
+logger = logging.getLogger(__name__)
+
+_started = False
+_start_lock = threading.Lock()
+_stop = threading.Event()
+_sync_lock = threading.Lock()   # 같은 프로세스에서 동시에 돌면 같은 이미지를 두 번 해시
+
+
+def _signed(h):
+    """64비트 부호 없는 해시 → SQLite INTEGER 범위"""
+    return h - (1 << 64) if h >= 1 << 63 else h
+
+
+def distance(a, b):
+    return bin((a ^ b) & _MASK).count("1")
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+#  BK-tree (phash_bk 테이블)
+# ══════════════════════════════════════════════════════════════════════════════
+def bk_insert(cur, h):
+    """해시 노드 추가 – 루트부터 같은 거리의 자식을 따라 내려가 빈 자리에 붙임"""
+    if cur.execute("SELECT 1 FROM phash_bk WHERE hash=?", (h,)).fetchone():
+        return
+    root = cur.execute("SELECT hash FROM phash_bk WHERE parent IS NULL").fetchone()
+    if root is None:
+        cur.execute("INSERT INTO phash_bk(hash, parent, dist) VALUES (?, NULL, NULL)", (h,))
+        return
+    node = root[0]
+    while True:
+        d = distance(node, h)
+        child = cur.execute("SELECT hash FROM phash_bk WHERE parent=? AND dist=?", (node, d)).fetchone()
+        if child is None:
+            cur.execute("INSERT INTO phash_bk(hash, parent, dist) VALUES (?,?,?)", (h, node, d))
+            return
+        node = child[0]
+
+
+def bk_query(cur, h, radius=RADIUS):
+    """반경 안의 노드 [(hash, 거리)] – 삼각부등식으로 |d - r| 밖의 가지는 건너뜀"""
+    root = cur.execute("SELECT hash FROM phash_bk WHERE parent IS NULL").fetchone()
+    if root is None:
+        return []
+    found, stack = [], [root[0]]
+    while stack:
+        node = stack.pop()
+        d = distance(node, h)
+        if d <= radius:
+            found.append((node, d))
+        stack.extend(r[0] for r in cur.execute(
+            "SELECT hash FROM phash_bk WHERE parent=? AND dist BETWEEN ? AND ?", (node, d - radius, d + radius)))
+    return found
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+#  동기화 / 조회
+# ══════════════════════════════════════════════════════════════════════════════
+def _hash_or_none(path):
+    """해시 실패(깨진 파일·디코딩 폭탄 등)는 NULL 로 기록 – 한 장 때문에 배치 전체가 매번 다시 실패하지 않도록"""
+    try:
+        return _signed(phash(path)) if path else None
+    except Exception as e:
+        logger.warning("duplicate_index: 해시 실패 %s (%s)", path, e)
+        return None
+
+
+_UNHASHED = """
+    SELECT pi.id, COALESCE(pi.image_path, pi.file_name) FROM product_images pi
+     WHERE NOT EXISTS (SELECT 1 FROM image_hashes ih WHERE ih.image_id = pi.id)
+"""
+
+
+def _add(rows, pool=None):
+    """[(image_id, 이미지 이름)] 해시 → image_hashes + 트리 (해시 계산은 트랜잭션 밖에서)"""
+    paths = resolve_images([name for _iid, name in rows])
+    files = [paths.get(name) for _iid, name in rows]
+    hashes = list(pool.map(_hash_or_none, files) if pool else map(_hash_or_none, files))
+    with transaction() as tx:
+        for (iid, _name), h in zip(rows, hashes):
+            if tx.execute("INSERT OR IGNORE INTO image_hashes(image_id, hash) VALUES (?,?)", (iid, h)).rowcount \
+                    and h is not None:
+                bk_insert(tx, h)
+
+
+def index_product(product_id):
+    """상품 저장 직후 호출 – 그 상품의 새 이미지만 트리에 추가 (최대 몇 장)"""
+    rows = get_connection().execute(_UNHASHED + " AND pi.product_id = ? ORDER BY pi.id", (product_id,)).fetchall()
+    if rows:
+        _add(rows)
+    return len(rows)
+
+
+def sync(limit=None):
+    """아직 해시가 없는 product_images 행을 해시해 트리에 추가 → 처리한 행 수"""
+    if not _sync_lock.acquire(blocking=False):
+        return 0
+    try:
+        sql = _UNHASHED + " ORDER BY pi.id" + (" LIMIT ?" if limit else "")
+        rows = get_connection().execute(sql, (limit,) if limit else ()).fetchall()
+        with ThreadPoolExecutor(max_workers=SYNC_WORKERS) as pool:
+            for i in range(0, len(rows), SYNC_BATCH):
+                _add(rows[i:i + SYNC_BATCH], pool)
+        return len(rows)
+    finally:
+        _sync_lock.release()
+
+
+def _loop():
+    while True:
+        try:
+            n = sync()
+            if n:
+                logger.info("duplicate_index: %d장 해시 추가", n)
+        except Exception:
+            logger.exception("duplicate_index: 동기화 실패")
+        if _stop.wait(SYNC_INTERVAL):
+            return
+
+
+def start_background_sync():
+    """백그라운드 동기화 스레드 시작 (프로세스당 1회, 중복 호출 무시) – 시작하자마자 1회 실행"""
+    global _started
+    with _start_lock:
+        if _started:
+            return False
+        threading.Thread(target=_loop, name="duplicate-index", daemon=True).start()
+        _started = True
+        return True
+
+
+def find_duplicates(src, radius=RADIUS, exclude_product=None, limit=5):
+    """사진(경로 또는 바이트) → 중복 후보 상품 [(product_id, product_name, image_path, 거리)] 가까운 순
+
+    읽기 전용 – 아직 해시되지 않은 이미지는 백그라운드 동기화 후에 잡힌다.
+    """
+    cur = get_connection().cursor()
+    nodes = dict(bk_query(cur, _signed(phash(src)), radius))
+    best = {}
+    keys = list(nodes)
+    for i in range(0, len(keys), 500):
+        part = keys[i:i + 500]
+        for h, pid, name, path in cur.execute(
+            f"SELECT ih.hash, pi.product_id, p.product_name, COALESCE(pi.image_path, pi.file_name) "
+            f"  FROM image_hashes ih "
+            f"  JOIN product_images pi ON pi.id = ih.image_id "
+            f"  JOIN products p ON p.id = pi.product_id "
+            f" WHERE ih.hash IN ({','.join('?' * len(part))})", part):
+            if pid == exclude_product:
+                continue
+            d = nodes[h]
+            if pid not in best or d < best[pid][3]:
+                best[pid] = (pid, name, path, d)
+    return sorted(best.values(), key=lambda r: (r[3], r[0]))[:limit]
+
+
+def main(argv):
+    if not argv or argv[0] not in ("sync", "check") or (argv[0] == "check" and len(argv) < 2):
+        print("usage: python duplicate_index.py sync | check <image> [radius]")
+        return 2
+    init_db()
+    if argv[0] == "sync":
+        print(f"{sync():,} images hashed")
+        return 0
+    radius = int(argv[2]) if len(argv) > 2 else RADIUS
+    for pid, name, path, d in find_duplicates(argv[1], radius):
+        print(f"  product {pid}  distance {d:2d}  {name}  ({path})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,143 @@
+################################################################################
+# grid_store.py  –  st.data_editor 편집 결과 저장 (스냅샷 대비 변경분만, 낙관적 동시성 검사)
+################################################################################
+import numpy as np
+import pandas as pd
+from common import transaction
+
+
+class GridConflict(Exception):
+    """불러온 뒤 다른 사용자가 같은 행을 바꾸거나 지워서 저장을 취소한 경우"""
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+#  스냅샷 (편집 시작 시점의 원본)
+# ══════════════════════════════════════════════════════════════════════════════
+def has_pending_edits(state, editor_key):
+    """data_editor 에 아직 저장하지 않은 수정·추가·삭제가 있는지"""
+    delta = state.get(editor_key) or {}
+    return any(delta.get(k) for k in ("edited_rows", "added_rows", "deleted_rows"))
+
+
+def snapshot(state, state_key, params, load, editor_key):
+    """편집 중에는 처음 불러온 DataFrame 을 유지, 아니면 매번 새로 읽음 (state: st.session_state)
+
+    data_editor 의 편집 내용은 행 위치 기준이라, 편집 도중 원본이 바뀌면 다른 행에 적용된다.
+    편집기에 넘기는 원본과 저장 시 비교 기준을 같게 유지해야 동시성 검사도 의미가 있다.
+    """
+    saved = state.get(state_key)
+    if saved is None or saved[0] != params or not has_pending_edits(state, editor_key):
+        saved = state[state_key] = (params, load())
+    return saved[1]
+
+
+def drop_snapshot(state, state_key, editor_key):
+    """저장·충돌 후 호출 – 편집 내용을 비우고 다음 rerun 에서 DB 를 다시 읽음"""
+    state.pop(state_key, None)
+    state.pop(editor_key, None)
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+#  비교 / 저장
+# ══════════════════════════════════════════════════════════════════════════════
+def _py(v):
+    """numpy/pandas 값 → sqlite3 바인딩 값 (결측은 None)"""
+    if v is None or (not isinstance(v, (list, tuple)) and pd.isna(v)):
+        return None
+    return v.item() if isinstance(v, np.generic) else v
+
+
+def _align(original, edited, key):
+    """key 컬럼을 인덱스로 → (원본, 기존 행 편집본, 새로 추가된 행)"""
+    orig = original.set_index(key)
+    new_mask = edited[key].isna()
+    kept = edited[~new_mask].set_index(key)
+    kept.index = kept.index.astype(orig.index.dtype)
+    return orig, kept, edited[new_mask]
+
+
+def diff_frames(original, edited, key, columns):
+    """원본·편집본을 key 컬럼으로 맞춰 비교 → (추가 행 DataFrame, 수정 {변경 컬럼 tuple: 행 key Index}, 삭제 key Index)"""
+    cols = list(columns)
+    orig, kept, inserts = _align(original, edited, key)
+
+    deletes = orig.index.difference(kept.index)
+    common = kept.index.intersection(orig.index)
+    a, b = orig.loc[common, cols], kept.loc[common, cols]
+    changed = ~((a == b) | (a.isna() & b.isna()))
+
+    # 변경 컬럼 조합을 비트마스크로 묶어 조합별로 한 번에 executemany
+    codes = changed.to_numpy(dtype=np.int64) @ (1 << np.arange(len(cols), dtype=np.int64))
+    updates = {}
+    for code in np.unique(codes[codes > 0]):
+        changed_cols = tuple(c for i, c in enumerate(cols) if code >> i & 1)
+        updates[changed_cols] = common[codes == code]
+    return inserts, updates, deletes
+
+
+def save_grid(original, edited, table, key, columns, *, id_column="id", scope=None,
+              insert_columns=None, insert_defaults=None, allow_delete=False):
+    """편집본을 DB 에 반영 (단일 트랜잭션, 변경된 컬럼만)
+
+    columns         : {DataFrame 컬럼: DB 컬럼} 수정 가능한 컬럼
+    scope           : {DB 컬럼: 값} 모든 UPDATE/DELETE 에 붙는 조건 (예: 본인 작업만)
+    insert_columns  : {DataFrame 컬럼: DB 컬럼} 새 행에서 추가로 받는 컬럼 – None 이면 행 추가 불가
+    insert_defaults : {DB 컬럼: 값} 새 행 고정값
+    수정·삭제는 원본 값이 그대로일 때만 적용되고, 한 건이라도 어긋나면 전부 취소하고 GridConflict.
+    반환: {"inserted", "updated", "deleted", "changed_keys", "rejected"}
+    """
+    scope = scope or {}
+    inserts, updates, deletes = diff_frames(original, edited, key, columns)
+    orig, kept, _ = _align(original, edited, key)
+
+    scope_sql = "".join(f" AND {c}=?" for c in scope)
+    scope_vals = [_py(v) for v in scope.values()]
+    report = {"inserted": 0, "updated": 0, "deleted": 0, "changed_keys": [], "rejected": 0}
+    if insert_columns is None:
+        report["rejected"] += len(inserts)
+        inserts = inserts.iloc[0:0]
+    if not allow_delete:
+        report["rejected"] += len(deletes)
+        deletes = deletes[:0]
+
+    with transaction() as cur:
+        for cols, keys in updates.items():
+            db_cols = [columns[c] for c in cols]
+            sql = (f"UPDATE {table} SET {', '.join(f'{c}=?' for c in db_cols)} "
+                   f"WHERE {id_column}=?{scope_sql} AND " + " AND ".join(f"{c} IS ?" for c in db_cols))
+            params = [
+                [_py(v) for v in new] + [_py(k)] + scope_vals + [_py(v) for v in old]
+                for k, new, old in zip(keys,
+                                       kept.loc[keys, list(cols)].itertuples(index=False),
+                                       orig.loc[keys, list(cols)].itertuples(index=False))
+            ]
+            cur.executemany(sql, params)
+            if cur.rowcount != len(params):
+                raise GridConflict(f"{len(params) - cur.rowcount}건이 다른 사용자에 의해 변경되었습니다")
+            report["updated"] += len(params)
+            report["changed_keys"] += [_py(k) for k in keys]
+
+        if len(deletes):
+            db_cols = list(columns.values())
+            sql = (f"DELETE FROM {table} WHERE {id_column}=?{scope_sql} AND "
+                   + " AND ".join(f"{c} IS ?" for c in db_cols))
+            params = [[_py(k)] + scope_vals + [_py(v) for v in old]
+                      for k, old in zip(deletes, orig.loc[deletes, list(columns)].itertuples(index=False))]
+            cur.executemany(sql, params)
+            if cur.rowcount != len(params):
+                raise GridConflict(f"{len(params) - cur.rowcount}건이 다른 사용자에 의해 변경되었습니다")
+            report["deleted"] += len(params)
+            report["changed_keys"] += [_py(k) for k in deletes]
+
+        if len(inserts):
+            src = {**columns, **insert_columns}
+            defaults = insert_defaults or {}
+            db_cols = list(src.values()) + list(defaults)
+            sql = (f"INSERT INTO {table}({', '.join(db_cols)}) "
+                   f"VALUES({', '.join('?' * len(db_cols))})")
+            cur.executemany(sql, [
+                [_py(v) for v in row] + [_py(v) for v in defaults.values()]
+                for row in inserts[list(src)].itertuples(index=False)
+            ])
+            report["inserted"] += len(inserts)
+    return report
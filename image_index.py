@@ -0,0 +1,89 @@
+################################################################################
+# image_index.py  –  이미지 파일 위치 메모리 색인 (렌더링마다 os.path.exists 하지 않도록)
+################################################################################
+import os
+import threading
+import time
+
+INDEX_MAX_AGE = 15 * 60        # 이 시간(초)이 지나면 다음 조회 때 다시 스캔 (외부에서 지운 파일 반영)
+SKIP_DIRS = {".thumbs"}        # 파생 이미지 캐시는 색인하지 않음
+
+_lock = threading.Lock()
+_by_name = None                # {파일명(basename): 실제 경로}
+_built_at = 0.0
+_roots = ()
+_digests = {}                  # {실제 경로: 내용 해시} – 색인 항목에 딸린 값, 다시 스캔하면 함께 버림
+
+
+def configure(roots):
+    """색인할 폴더 목록 (앞쪽 폴더가 같은 파일명에서 우선)"""
+    global _roots, _by_name
+    with _lock:
+        _roots = tuple(roots)
+        _by_name = None
+        _digests.clear()
+
+
+def _scan():
+    found = {}
+    for root in reversed(_roots):                # 앞쪽 폴더가 덮어쓰도록 뒤에서부터
+        for dirpath, dirnames, filenames in os.walk(root):
+            dirnames[:] = [d for d in dirnames if d not in SKIP_DIRS]
+            for fn in filenames:
+                found[fn] = os.path.join(dirpath, fn)
+    return found
+
+
+def _index():
+    global _by_name, _built_at
+    if _by_name is None or time.monotonic() - _built_at > INDEX_MAX_AGE:
+        found = _scan()
+        with _lock:
+            _by_name, _built_at = found, time.monotonic()
+            _digests.clear()
+    return _by_name
+
+
+def add(path):
+    """파일을 새로 썼을 때 호출"""
+    with _lock:
+        _digests.pop(path, None)
+        if _by_name is not None:
+            _by_name[os.path.basename(path)] = path
+
+
+def remove(path):
+    """파일을 지웠을 때 호출"""
+    with _lock:
+        _digests.pop(path, None)
+        if _by_name is not None and _by_name.get(os.path.basename(path)) == path:
+            del _by_name[os.path.basename(path)]
+
+
+def lookup(name):
+    """파일명(또는 경로의 파일명)으로 실제 경로 조회 – 없으면 None"""
+    return _index().get(os.path.basename(name)) if name else None
+
+
+def lookup_many(names):
+    """한 페이지 분량 이름을 한 번에 조회 → {이름: 경로 또는 None}"""
+    idx = _index()
+    return {n: (idx.get(os.path.basename(n)) if n else None) for n in names}
+
+
+def digest(path, compute):
+    """색인된 파일의 내용 해시 – 색인 항목이 살아 있는 동안 compute(path) 를 1회만 호출 (stat 없음)
+
+    색인에 없는 경로면 None.
+    """
+    idx = _index()
+    if idx.get(os.path.basename(path)) != path:
+        return None
+    with _lock:
+        d = _digests.get(path)
+    if d is None:
+        d = compute(path)
+        with _lock:
+            if _by_name is idx:                  # 계산 중 다시 스캔됐으면 버림
+                _digests[path] = d
+    return d
@@ -0,0 +1,151 @@
+################################################################################
+# image_ingest.py  –  업로드 이미지 병렬 처리 (EXIF 회전 보정 + 미리보기, 메모리 상한)
+################################################################################
+import hashlib
+import io
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from PIL import Image, ImageOps
+from thumbnails import thumbnail_for_bytes
+
+INGEST_WORKERS = 4
+INGEST_MEMORY_CAP = 256 * 1024 * 1024     # 동시에 디코딩 중인 픽셀 버퍼 합계 상한(추정치)
+RESULT_CACHE_SIZE = 32                    # rerun 마다 같은 업로드를 다시 처리하지 않도록 (크기·미리보기 경로만)
+
+EXIF_ORIENTATION = 0x0112
+
+_results = OrderedDict()                  # {(sha256, 미리보기 크기): (data 를 뺀 결과, 회전 보정한 바이트 또는 None)}
+_results_lock = threading.Lock()
+
+
+class MemoryBudget:
+    """디코딩 버퍼 바이트 예산 – 상한을 넘으면 다른 작업이 끝날 때까지 대기 (단독이면 초과 허용)"""
+
+    def __init__(self, cap):
+        self.cap = cap
+        self.used = 0
+        self._cond = threading.Condition()
+
+    def acquire(self, n):
+        with self._cond:
+            while self.used and self.used + n > self.cap:
+                self._cond.wait()
+            self.used += n
+
+    def try_acquire(self, n):
+        """대기 없이 예약 – 남은 예산이 없으면 False"""
+        with self._cond:
+            if self.used + n > self.cap:
+                return False
+            self.used += n
+            return True
+
+    def release(self, n):
+        with self._cond:
+            self.used -= n
+            self._cond.notify_all()
+
+
+# 프로세스 전체에서 공유 – 여러 세션이 동시에 올려도 작업자 수·메모리 상한이 함께 적용됨
+_budget = MemoryBudget(INGEST_MEMORY_CAP)
+_pool = ThreadPoolExecutor(max_workers=INGEST_WORKERS, thread_name_prefix="image-ingest")
+
+
+def _draft_bytes(w, h, size, fmt):
+    """JPEG draft 축소(1/2·1/4·1/8) 후 디코딩 버퍼 크기 추정 – JPEG 외 형식은 원본 크기 전체"""
+    if fmt != "JPEG":
+        return w * h * 4
+    scale = 1
+    while scale < 8 and min(w, h) // (scale * 2) >= size:
+        scale *= 2
+    return (w // scale) * (h // scale) * 4
+
+
+def _process(data, filename, preview_sizes, budget):
+    with Image.open(io.BytesIO(data)) as im:          # 헤더만 읽음 (아직 디코딩 전)
+        w, h = im.size
+        fmt = im.format
+        orientation = im.getexif().get(EXIF_ORIENTATION, 1)
+
+        if orientation != 1:
+            # 회전 정보가 있는 사진만 전체 디코딩해서 바로 세운 원본으로 다시 저장
+            need = w * h * 4
+            budget.acquire(need)
+            try:
+                fixed = ImageOps.exif_transpose(im)
+                buf = io.BytesIO()
+                if fmt == "PNG":
+                    fixed.save(buf, "PNG", optimize=True)
+                else:
+                    fixed.convert("RGB").save(buf, "JPEG", quality=90)
+                    fmt = "JPEG"
+                data = buf.getvalue()
+                w, h = fixed.size
+            finally:
+                budget.release(need)
+
+    previews = {}
+    for size in preview_sizes:
+        need = _draft_bytes(w, h, size, fmt)
+        budget.acquire(need)
+        try:
+            previews[size] = thumbnail_for_bytes(data, size)
+        finally:
+            budget.release(need)
+
+    if fmt == "JPEG" and not filename.lower().endswith((".jpg", ".jpeg")):
+        filename = filename.rsplit(".", 1)[0] + ".jpg"
+    return {"data": data, "filename": filename, "size": (w, h), "previews": previews, "error": None}
+
+
+def _safe_process(data, filename, preview_sizes, budget):
+    try:
+        return _process(data, filename, preview_sizes, budget)
+    except (OSError, Image.DecompressionBombError) as e:
+        return {"data": None, "filename": filename, "size": None, "previews": {}, "error": str(e)}
+
+
+def ingest(files, preview_sizes=(256,)):
+    """업로드 파일들 → 결과 dict 목록 (입력 순서 유지)
+
+    결과: {"data": 저장할 바이트, "filename", "size": (w, h), "previews": {크기: 경로}, "error"}
+    같은 내용의 업로드는 최근 RESULT_CACHE_SIZE 건까지 다시 처리하지 않는다.
+    캐시는 업로드 바이트를 들고 있지 않고 (적중 시 이번 업로드 바이트를 그대로 씀),
+    회전 보정으로 새로 만든 바이트만 메모리 예산(MemoryBudget)에 잡힌 만큼 보관한다.
+    """
+    items = [(f.getvalue(), f.name) for f in files]
+    keys = [(hashlib.sha256(data).hexdigest(), tuple(preview_sizes)) for data, _name in items]
+
+    out = [None] * len(items)
+    todo = []
+    with _results_lock:
+        for i, key in enumerate(keys):
+            if key in _results:
+                _results.move_to_end(key)
+                meta, own = _results[key]
+                data = own if own is not None else (None if meta["error"] else items[i][0])
+                out[i] = dict(meta, data=data, filename=items[i][1] if own is None else meta["filename"])
+            else:
+                todo.append(i)
+
+    if todo:
+        futures = {i: _pool.submit(_safe_process, *items[i], preview_sizes, _budget) for i in todo}
+        for i, fut in futures.items():                 # 디코딩을 기다리는 동안 다른 세션 조회를 막지 않음
+            out[i] = fut.result()
+        with _results_lock:
+            for i in todo:
+                if any(not isinstance(p, str) for p in out[i]["previews"].values()):
+                    continue                           # 미리보기가 원본 바이트로 대체된 건은 캐시하지 않음
+                own = out[i]["data"] if out[i]["data"] is not items[i][0] else None
+                if own is not None and not _budget.try_acquire(len(own)):
+                    continue                           # 예산이 없으면 캐시하지 않음 (다음 rerun 에 다시 처리)
+                old = _results.pop(keys[i], None)
+                if old and old[1] is not None:
+                    _budget.release(len(old[1]))
+                _results[keys[i]] = ({k: v for k, v in out[i].items() if k != "data"}, own)
+                while len(_results) > RESULT_CACHE_SIZE:
+                    _key, (_meta, dropped) = _results.popitem(last=False)
+                    if dropped is not None:
+                        _budget.release(len(dropped))
+    return out
@@ -0,0 +1,384 @@
+################################################################################
+# image_similarity.py  –  상품 이미지 유사도 색인 (CPU, NumPy memmap) → similarity_pct
+#
+#   python image_similarity.py sync            # 새 product_images 만 임베딩 추가 (처음이면 전체)
+#   python image_similarity.py rebuild         # 색인 파일을 지우고 전체 재생성
+#   python image_similarity.py query <사진>    # 상위 5개 상품과 유사도
+#
+#   임베딩 128차원 = pHash 64비트(±1) + HSV 색 히스토그램 48 + 에지 방향 히스토그램 16.
+#   블록별 단위벡터에 가중치를 곱해 이어 붙여 전체 길이 1 → 내적 = 가중 코사인 유사도.
+#   50만 장 × 128 float32 = 256MB memmap, 질의 1회는 행렬-벡터 곱 1번 (수십 ms).
+################################################################################
+import io
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:                                      # Windows
+    fcntl = None
+    import msvcrt
+
+import numpy as np
+from PIL import Image, ImageOps
+
+from common import get_connection, init_db
+from image_store import resolve_images
+
+EMB_DIR = os.path.join(os.getcwd(), "embeddings")
+VEC_PATH = os.path.join(EMB_DIR, "vectors.f32")
+IDS_PATH = os.path.join(EMB_DIR, "ids.i64")           # 행마다 (product_images.id, product_id)
+META_PATH = os.path.join(EMB_DIR, "meta.json")
+LOCK_PATH = os.path.join(EMB_DIR, "index.lock")
+
+DIM = 128
+SIDE = 64                       # 특징 추출용 축소 크기 (px)
+HASH_SIDE = 32                  # pHash DCT 입력 크기
+W_HASH, W_COLOR, W_EDGE = 0.5, 0.35, 0.15
+INITIAL_CAPACITY = 4096
+SYNC_WORKERS = 4
+SYNC_CHUNK = 1000               # 이만큼 추가할 때마다 meta 저장 (중단돼도 이어서)
+PRUNE_INTERVAL = 600            # 초 – 삭제된 이미지 행 정리 주기
+SYNC_INTERVAL = 5 * 60          # 초 – 백그라운드 동기화 주기 (검색 요청은 색인을 읽기만 함)
+
+_lock = threading.Lock()
+_sync_lock = threading.Lock()   # 동기화는 한 번에 하나 (동시에 돌면 같은 행을 두 번 추가)
+_state = {"vec": None, "ids": None, "meta": None, "meta_key": None, "pruned_at": 0.0}
+_started = False
+_start_lock = threading.Lock()
+_stop = threading.Event()
+
+logger = logging.getLogger(__name__)
+
+# DCT-II 행렬 (pHash)
+_n = np.arange(HASH_SIDE)
+_DCT = np.cos(np.pi * (2 * _n[None, :] + 1) * _n[:, None] / (2 * HASH_SIDE)).astype(np.float32)
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+#  특징 추출
+# ══════════════════════════════════════════════════════════════════════════════
+def _load(src):
+    """경로 또는 바이트 → (RGB, HSV) SIDE×SIDE uint8 배열"""
+    fp = io.BytesIO(src) if isinstance(src, (bytes, bytearray)) else src
+    with Image.open(fp) as im:
+        im.draft("RGB", (SIDE * 2, SIDE * 2))            # JPEG 는 축소 디코딩
+        im = ImageOps.exif_transpose(im).convert("RGB").resize((SIDE, SIDE), Image.BILINEAR)
+        return np.asarray(im), np.asarray(im.convert("HSV"))
+
+
+def _gray(rgb):
+    return rgb.astype(np.float32) @ np.array([0.299, 0.587, 0.114], dtype=np.float32)
+
+
+def _phash_block(gray):
+    """32×32 DCT 저주파 8×8 → 중앙값 기준 64비트 (bool 배열)"""
+    f = SIDE // HASH_SIDE
+    small = gray.reshape(HASH_SIDE, f, HASH_SIDE, f).mean(axis=(1, 3))
+    low = (_DCT @ small @ _DCT.T)[:8, :8].ravel()
+    return low > np.median(low[1:])
+
+
+def phash(src):
+    """이미지 → 64비트 perceptual hash (int)"""
+    bits = _phash_block(_gray(_load(src)[0]))
+    return int("".join("1" if b else "0" for b in bits), 2)
+
+
+def _color_block(hsv):
+    """색상 12 × 채도 2 × 명도 2 히스토그램 (Hellinger: 제곱근 후 단위벡터)"""
+    h = hsv[..., 0].astype(np.int32) * 12 // 256
+    s = (hsv[..., 1] >= 96).astype(np.int32)
+    v = (hsv[..., 2] >= 128).astype(np.int32)
+    hist = np.bincount((h * 4 + s * 2 + v).ravel(), minlength=48).astype(np.float32)
+    return _unit(np.sqrt(hist))
+
+
+def _edge_block(gray):
+    """그래디언트 방향 8구간 × 위/아래 절반 (크기 가중)"""
+    gx = gray[1:-1, 2:] - gray[1:-1, :-2]
+    gy = gray[2:, 1:-1] - gray[:-2, 1:-1]
+    mag = np.hypot(gx, gy)
+    ang = ((np.arctan2(gy, gx) % np.pi) / np.pi * 8).astype(np.int32).clip(0, 7)
+    half = (np.arange(gx.shape[0]) >= gx.shape[0] // 2).astype(np.int32)[:, None]
+    hist = np.bincount((half * 8 + ang).ravel(), weights=mag.ravel(), minlength=16).astype(np.float32)
+    return _unit(np.sqrt(hist))
+
+
+def _unit(v):
+    n = float(np.linalg.norm(v))
+    return v / n if n else v
+
+
+def embed(src):
+    """이미지(경로 또는 바이트) → 길이 1 의 float32[DIM] 벡터"""
+    rgb, hsv = _load(src)
+    gray = _gray(rgb)
+    bits = np.where(_phash_block(gray), 1.0, -1.0).astype(np.float32) / 8.0   # 64차원 → 길이 1
+    return np.concatenate([
+        np.sqrt(W_HASH) * bits,
+        np.sqrt(W_COLOR) * _color_block(hsv),
+        np.sqrt(W_EDGE) * _edge_block(gray),
+    ]).astype(np.float32)
+
+
+def _embed_or_none(path):
+    try:
+        return embed(path)
+    except (OSError, ValueError, Image.DecompressionBombError):
+        return None
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+#  memmap 색인
+#    앱과 CLI(sync·rebuild)가 같은 파일을 쓰므로 모든 접근은 _index() 안에서:
+#    프로세스 간 파일 잠금(읽기 공유·쓰기 배타) → meta.json 이 바뀌었으면 다시 읽고 재매핑.
+# ══════════════════════════════════════════════════════════════════════════════
+@contextmanager
+def _file_lock(shared=False):
+    os.makedirs(EMB_DIR, exist_ok=True)
+    with open(LOCK_PATH, "a+b") as f:
+        if fcntl:
+            fcntl.flock(f, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        else:                                            # Windows – 공유 잠금 없음, 첫 바이트 배타 잠금
+            f.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:                          # LK_LOCK 은 10초 재시도 후 실패 → 계속 대기
+                    continue
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(f, fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def _meta_key():
+    """meta.json 식별값 – _write_meta 는 새 파일로 교체하므로 쓸 때마다 바뀜"""
+    try:
+        st = os.stat(META_PATH)
+    except FileNotFoundError:
+        return None
+    return st.st_ino, st.st_mtime_ns, st.st_size
+
+
+def _write_meta(meta):
+    tmp = META_PATH + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+    os.replace(tmp, META_PATH)
+    _state["meta_key"] = _meta_key()
+
+
+def _map(capacity):
+    _state.update(vec=None, ids=None)                    # 기존 매핑부터 해제
+    for path, width in ((VEC_PATH, DIM * 4), (IDS_PATH, 16)):
+        with open(path, "ab") as f:                      # 파일 크기를 용량에 맞춤 (늘리기만)
+            if f.tell() < capacity * width:
+                f.truncate(capacity * width)
+    _state["vec"] = np.memmap(VEC_PATH, dtype=np.float32, mode="r+", shape=(capacity, DIM))
+    _state["ids"] = np.memmap(IDS_PATH, dtype=np.int64, mode="r+", shape=(capacity, 2))
+
+
+def _refresh():
+    """다른 프로세스가 meta.json 을 바꿨으면 다시 읽고 재매핑 → meta (없거나 형식이 다르면 None)"""
+    key = _meta_key()
+    if key is not None and key == _state["meta_key"]:
+        return _state["meta"]
+    _state.update(vec=None, ids=None, meta=None, meta_key=None)
+    if key is None:
+        return None
+    with open(META_PATH, encoding="utf-8") as f:
+        meta = json.load(f)
+    if meta.get("dim") != DIM:                           # 특징 구성이 바뀌면 재생성 필요
+        return None
+    _map(meta["capacity"])
+    _state.update(meta=meta, meta_key=key)
+    return meta
+
+
+def _reset(capacity=INITIAL_CAPACITY):
+    """빈 색인 – 파일은 지우지 않고 count 만 0 으로 (다른 프로세스가 memmap 중일 수 있음)"""
+    meta = {"dim": DIM, "count": 0, "capacity": capacity, "last_image_id": 0}
+    _map(capacity)
+    _write_meta(meta)
+    _state["meta"] = meta
+    return meta
+
+
+@contextmanager
+def _index(write=False):
+    """잠금 + 최신 meta (쓰기면 색인이 없을 때 새로 만듦, 읽기면 None)"""
+    with _lock, _file_lock(shared=not write):
+        meta = _refresh()
+        if meta is None and write:
+            meta = _reset()
+        yield meta
+
+
+def _append(meta, rows):
+    """[(image_id, product_id, 벡터 또는 None)] 추가 → 추가한 행 수 – _index(write=True) 안에서 호출"""
+    rows = [r for r in rows if r[0] > meta["last_image_id"]]   # 다른 프로세스가 먼저 넣은 행은 건너뜀
+    if not rows:
+        return 0
+    need = meta["count"] + len(rows)
+    if need > meta["capacity"]:
+        _state["vec"].flush(); _state["ids"].flush()
+        meta["capacity"] = max(need, int(meta["capacity"] * 1.5))
+        _map(meta["capacity"])
+    n = meta["count"]
+    for i, (iid, pid, vec) in enumerate(rows):
+        _state["ids"][n + i] = (iid, pid if vec is not None else -1)   # 읽을 수 없는 이미지는 검색 제외
+        _state["vec"][n + i] = vec if vec is not None else 0.0
+    _state["vec"].flush(); _state["ids"].flush()
+    meta["count"] = need
+    meta["last_image_id"] = max(meta["last_image_id"], max(r[0] for r in rows))
+    _write_meta(meta)                                    # 데이터를 쓴 뒤 count 갱신
+    return len(rows)
+
+
+def prune(cur=None):
+    """삭제된 product_images 행 · 바뀐 product_id 반영 → 제외한 행 수"""
+    cur = cur or get_connection().cursor()
+    live = np.array(cur.execute("SELECT id, COALESCE(product_id, -1) FROM product_images ORDER BY id").fetchall(),
+                    dtype=np.int64).reshape(-1, 2)
+    with _index(write=True) as meta:
+        ids = _state["ids"][:meta["count"]]
+        pos = np.searchsorted(live[:, 0], ids[:, 0]).clip(0, max(len(live) - 1, 0))
+        found = (live[pos, 0] == ids[:, 0]) if len(live) else np.zeros(len(ids), dtype=bool)
+        active = ids[:, 1] >= 0
+        gone = int((active & ~found).sum())
+        ids[:, 1] = np.where(active & found, live[pos, 1] if len(live) else -1, -1)
+        _state["ids"].flush()
+        _state["pruned_at"] = time.time()
+    return gone
+
+
+def sync(cur=None, limit=None, progress=None):
+    """마지막 색인 이후 추가된 product_images 임베딩 → 추가한 행 수"""
+    if not _sync_lock.acquire(blocking=False):
+        return 0
+    try:
+        return _sync(cur or get_connection().cursor(), limit, progress)
+    finally:
+        _sync_lock.release()
+
+
+def _sync(cur, limit, progress):
+    with _index(write=True) as meta:
+        last = meta["last_image_id"]
+    sql = "SELECT id, product_id, COALESCE(image_path, file_name) FROM product_images WHERE id > ? ORDER BY id"
+    rows = cur.execute(sql + (" LIMIT ?" if limit else ""), (last, limit) if limit else (last,)).fetchall()
+    added = 0
+    with ThreadPoolExecutor(max_workers=SYNC_WORKERS) as pool:
+        for i in range(0, len(rows), SYNC_CHUNK):
+            chunk = rows[i:i + SYNC_CHUNK]
+            paths = resolve_images([r[2] for r in chunk])
+            memo = {}                                    # 같은 내용 파일(해시 저장소)은 1번만
+            todo = {paths[r[2]] for r in chunk if paths.get(r[2])}
+            for path, vec in zip(todo, pool.map(_embed_or_none, todo)):
+                memo[path] = vec
+            with _index(write=True) as meta:             # 임베딩은 잠금 밖에서, 쓰기만 잠금 안에서
+                added += _append(meta, [(iid, pid, memo.get(paths.get(name))) for iid, pid, name in chunk])
+            if progress:
+                progress(i + len(chunk), len(rows))
+    if time.time() - _state["pruned_at"] > PRUNE_INTERVAL:
+        prune(cur)
+    return added
+
+
+def rebuild(progress=None):
+    with _index(write=True) as meta:
+        _reset(meta["capacity"])
+    return sync(progress=progress)
+
+
+def search(vec, k=5):
+    """질의 벡터 → [(product_id, image_id, 유사도 %)] 상품별 최고 점수 상위 k"""
+    with _index() as meta:
+        n = meta["count"] if meta else 0
+        if not n:
+            return []
+        mat, ids = _state["vec"][:n], _state["ids"][:n]
+        scores = mat @ vec                               # (n,) – 행렬-벡터 곱 1번
+        scores[ids[:, 1] < 0] = -1.0
+        kk = min(n, k * 8)                               # 상품당 이미지 여러 장 → 넉넉히 뽑아 상품별로 묶음
+        top = np.argpartition(-scores, kk - 1)[:kk]
+        out, seen = [], set()
+        for row in top[np.argsort(-scores[top])]:
+            pid = int(ids[row, 1])
+            if pid < 0 or pid in seen:
+                continue
+            seen.add(pid)
+            out.append((pid, int(ids[row, 0]), round(max(0.0, float(scores[row])) * 100, 1)))
+            if len(out) >= k:
+                break
+    return out
+
+
+def match(src, k=5):
+    """새 사진(경로 또는 바이트) → 유사 상품 상위 k [(product_id, image_id, 유사도 %)]
+
+    읽기 전용 – 새 이미지 임베딩·삭제 반영은 백그라운드 동기화(start_background_sync)가 한다.
+    """
+    return search(embed(src), k)
+
+
+def _loop():
+    while True:
+        try:
+            n = sync()                                   # PRUNE_INTERVAL 마다 prune 포함
+            if n:
+                logger.info("image_similarity: %d장 임베딩 추가", n)
+        except Exception:
+            logger.exception("image_similarity: 동기화 실패")
+        if _stop.wait(SYNC_INTERVAL):
+            return
+
+
+def start_background_sync():
+    """백그라운드 동기화 스레드 시작 (프로세스당 1회, 중복 호출 무시) – 시작하자마자 1회 실행"""
+    global _started
+    with _start_lock:
+        if _started:
+            return False
+        threading.Thread(target=_loop, name="image-similarity", daemon=True).start()
+        _started = True
+        return True
+
+
+def main(argv):
+    if not argv or argv[0] not in ("sync", "rebuild", "query"):
+        print("usage: python image_similarity.py sync | rebuild | query <image>")
+        return 2
+    init_db()
+
+    def report(done, total):
+        print(f"\r  {done:,}/{total:,}", end="", flush=True)
+
+    if argv[0] == "query":
+        t0 = time.perf_counter()
+        vec = embed(argv[1])
+        hits = search(vec, 5)
+        print(f"{(time.perf_counter() - t0) * 1000:.1f} ms")
+        for pid, iid, pct in hits:
+            print(f"  product {pid}  image {iid}  {pct:.1f}%")
+        return 0
+    n = (rebuild if argv[0] == "rebuild" else sync)(progress=report)
+    print(f"\n{n:,} images indexed")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,147 @@
+################################################################################
+# image_store.py  –  내용 주소(SHA-256) 기반 이미지 저장소 (중복 제거 + 참조 카운트)
+################################################################################
+import hashlib
+import os
+import time
+import image_index
+from common import get_connection, transaction, now_str
+
+IMG_DIR = os.path.join(os.getcwd(), "db_images")
+# 저장소 도입 전 파일이 있을 수 있는 폴더 (파일명만 DB 에 남아 있는 경우)
+LEGACY_DIRS = (IMG_DIR, os.path.join(os.getcwd(), "product_images"))
+ALLOWED_EXT = {"jpg", "jpeg", "png", "webp"}
+ORPHAN_GRACE = 60 * 60       # 초 – 이보다 오래된 파일만 고아로 삭제 (커밋 전 트랜잭션이 쓴 파일 보호)
+
+image_index.configure(LEGACY_DIRS)
+
+
+def _ext(filename):
+    ext = filename.rsplit(".", 1)[-1].lower() if "." in filename else ""
+    return "jpg" if ext == "jpeg" or ext not in ALLOWED_EXT else ext
+
+
+def store_name(digest, ext):
+    """DB 에 저장하는 이름: ab/cd/<sha256>.<ext> (IMG_DIR 기준 상대 경로, '/' 구분)"""
+    return f"{digest[:2]}/{digest[2:4]}/{digest}.{ext}"
+
+
+def is_store_name(name):
+    return bool(name) and name.count("/") == 2 and len(os.path.basename(name).split(".")[0]) == 64
+
+
+def _abs(name):
+    return os.path.join(IMG_DIR, *name.split("/"))
+
+
+def _write_atomic(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.tmp{os.getpid()}"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+    image_index.add(path)
+
+
+def store_image(cur, data, filename):
+    """이미지 바이트 저장 → 저장소 이름 반환. 같은 내용이면 파일은 1개, 참조 수만 +1
+
+    cur 는 transaction() 커서 – product_images INSERT 와 같은 트랜잭션에서 호출할 것.
+    """
+    digest = hashlib.sha256(data).hexdigest()
+    name = store_name(digest, _ext(filename))
+    cur.execute(
+        """
+        INSERT INTO image_blobs(hash, name, size, ref_count, created_at) VALUES (?, ?, ?, 1, ?)
+        ON CONFLICT(hash) DO UPDATE SET ref_count = ref_count + 1
+        """,
+        (digest, name, len(data), now_str()),
+    )
+    # 확장자가 다른 같은 내용이 먼저 저장돼 있으면 그 이름을 그대로 사용
+    name = cur.execute("SELECT name FROM image_blobs WHERE hash=?", (digest,)).fetchone()[0]
+    # 쓰기 잠금을 잡은 뒤 확인 → collect_garbage() 가 막 지운 파일도 다시 쓴다
+    path = _abs(name)
+    if not os.path.exists(path):
+        _write_atomic(path, data)
+    else:
+        os.utime(path)                                 # sweep_orphans 유예 시간을 새로 시작
+    return name
+
+
+def release_image(cur, name):
+    """참조 수 -1 (0 이 된 파일은 collect_garbage() 가 커밋 후 삭제). 저장소 밖 legacy 파일은 무시"""
+    if is_store_name(name):
+        cur.execute(
+            "UPDATE image_blobs SET ref_count = ref_count - 1 WHERE hash=? AND ref_count > 0",
+            (os.path.basename(name).split(".")[0],),
+        )
+
+
+def release_product_images(cur, product_ids):
+    """상품 삭제 전에 호출 – 해당 상품들의 product_images 참조 해제"""
+    if not product_ids:
+        return
+    qmarks = ",".join("?" * len(product_ids))
+    for (name,) in cur.execute(
+        f"SELECT COALESCE(image_path, file_name) FROM product_images WHERE product_id IN ({qmarks})",
+        list(product_ids),
+    ).fetchall():
+        release_image(cur, name)
+
+
+def collect_garbage():
+    """참조 0 인 파일·행 삭제 (별도 트랜잭션 – 쓰기 잠금 동안 store_image 와 겹치지 않음)"""
+    with transaction() as cur:
+        rows = cur.execute("SELECT hash, name FROM image_blobs WHERE ref_count <= 0").fetchall()
+        for digest, name in rows:
+            path = _abs(name)
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            image_index.remove(path)
+            cur.execute("DELETE FROM image_blobs WHERE hash=?", (digest,))
+    return len(rows)
+
+
+def sweep_orphans(grace=ORPHAN_GRACE):
+    """image_blobs 행이 없는 저장소 파일 삭제 → 삭제 수
+
+    store_image 는 호출부 트랜잭션 안에서 파일을 먼저 쓰므로, 그 트랜잭션이 롤백되면 파일만 남는다.
+    """
+    known = {name for (name,) in get_connection().execute("SELECT name FROM image_blobs")}
+    cutoff = time.time() - grace
+    removed = 0
+    for root, _dirs, files in os.walk(IMG_DIR):
+        for fn in files:
+            path = os.path.join(root, fn)
+            name = os.path.relpath(path, IMG_DIR).replace(os.sep, "/")
+            partial = ".tmp" in fn and fn.rsplit(".tmp", 1)[1].isdigit()   # _write_atomic 중단 잔여물
+            orphan = partial or (is_store_name(name) and name not in known)
+            try:
+                if not orphan or os.path.getmtime(path) > cutoff:
+                    continue
+                os.remove(path)
+            except OSError:
+                continue
+            image_index.remove(path)
+            removed += 1
+    return removed
+
+
+def _resolve(name, found):
+    if found or not name or is_store_name(name) or not os.path.dirname(name):
+        return found
+    # 색인 폴더 밖의 절대/상대 경로로 저장된 옛 값만 직접 확인
+    return name if os.path.exists(name) else None
+
+
+def resolve_image(name):
+    """DB 에 저장된 이미지 이름 → 실제 파일 경로 (없으면 None). 파일 색인으로 조회"""
+    return _resolve(name, image_index.lookup(name))
+
+
+def resolve_images(names):
+    """한 페이지 분량 이미지 이름 → {이름: 경로 또는 None} (색인 1회 조회)"""
+    found = image_index.lookup_many(names)
+    return {n: _resolve(n, p) for n, p in found.items()}
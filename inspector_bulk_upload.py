@@ -0,0 +1,84 @@
+import streamlit as st
+import csv
+import io
+from bulk_import import COLUMNS, CHUNK_SIZE, iter_rows, import_rows
+import profiling
+
+# --------------------------------------------------
+# 유틸
+# --------------------------------------------------
+
+def rejects_csv(rejects):
+    """거부 행 → 다운로드용 CSV (원래 컬럼 + 행 번호/사유)"""
+    buf = io.StringIO()
+    w = csv.writer(buf)
+    keys = list(COLUMNS)
+    w.writerow(["행", "사유"] + keys)
+    for line, reason, row in rejects:
+        w.writerow([line, reason] + [row.get(k, "") for k in keys])
+    return buf.getvalue().encode("utf-8-sig")
+
+# --------------------------------------------------
+# 메인
+# --------------------------------------------------
+
+@profiling.page("inspector_bulk_upload")
+def main():
+    st.title("검수자 – 상품·SKU·검수 수량 대량 등록")
+
+    # 권한 체크
+    if st.session_state.get("user_role") != "inspector":
+        st.warning("접근 권한이 없습니다. (검수자 전용)")
+        st.stop()
+
+    st.markdown(
+        "CSV / XLSX 첫 행은 헤더입니다. 필수: **제품명, 바코드** · 선택: "
+        "도매처, 브랜드, 로케이션, 색상, 사이즈, 정상, 불량, 보류, 코멘트, 검수일시"
+    )
+    st.caption("이미 등록된 바코드는 SKU 를 새로 만들지 않고 검수 수량만 기존 상품으로 기록합니다. "
+               "선택 컬럼 검수일시가 없으면 오늘 날짜로 기록하며, 같은 바코드의 같은 날(일시) 검수 기록이 "
+               "이미 있으면 건너뜁니다 – 같은 파일을 다시 올려도 중복되지 않습니다.")
+
+    up = st.file_uploader("파일 선택", ["csv", "xlsx"])
+    encoding = st.radio("CSV 인코딩", ["utf-8-sig", "cp949"], horizontal=True)
+
+    if up and st.button("⬆️ 등록 시작"):
+        bar = st.progress(0.0, text="읽는 중…")
+
+        def on_progress(n):
+            # 전체 행 수를 미리 세지 않으므로 청크 단위로만 진행 표시
+            bar.progress((n // CHUNK_SIZE) % 10 / 10, text=f"{n:,}행 처리")
+
+        with profiling.span("import"):
+            report = import_rows(
+                iter_rows(up, up.name, encoding),
+                user_id=st.session_state["user_id"],
+                progress=on_progress,
+            )
+        bar.progress(1.0, text="중단" if report["error"] else "완료")
+        st.session_state["bulk_report"] = report
+
+    report = st.session_state.get("bulk_report")
+    if report:
+        st.subheader("결과")
+        if report.get("error"):
+            st.error(f"등록 중단: {report['error']} – {report['saved_rows']:,}행까지 저장됐습니다. "
+                     "문제를 고친 뒤 같은 파일을 다시 올리면 저장된 행은 건너뜁니다.")
+        c = st.columns(5)
+        c[0].metric("읽은 행", f"{report['read']:,}")
+        c[1].metric("신규 상품", f"{report['products']:,}")
+        c[2].metric("신규 SKU", f"{report['skus']:,}")
+        c[3].metric("검수 기록", f"{report['inspections']:,}")
+        c[4].metric("거부", f"{report['rejected']:,}")
+        st.caption(f"기존 상품에 연결 {report['existing_products']:,}건 · "
+                   f"이미 있는 검수 기록 건너뜀 {report['existing_inspections']:,}건")
+        if report["rejects"]:
+            st.dataframe(
+                [{"행": line, "사유": reason, **{k: row.get(k, "") for k in COLUMNS}}
+                 for line, reason, row in report["rejects"][:200]],
+                use_container_width=True,
+            )
+            st.download_button("📥 거부 행 CSV", rejects_csv(report["rejects"]), file_name="rejected_rows.csv")
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,16 @@
 import streamlit as st
-import os
-import sqlite3
-from PIL import Image
-from common import get_connection, now_str, log_activity
-
-def save_image_file(uploaded_file, folder="db_images"):
-    os.makedirs(folder, exist_ok=True)
-    filename = f"{now_str().replace(':', '').replace(' ', '_')}_{uploaded_file.name}"
-    filepath = os.path.join(folder, filename)
-    with open(filepath, "wb") as f:
-        f.write(uploaded_file.getbuffer())
-    return filename
-
+from common import transaction, now_str, log_activity
+from image_ingest import ingest
+from image_store import store_image
+import duplicate_index
+import profiling
+
+@st.cache_data(show_spinner=False, ttl=60, max_entries=16)
+def likely_duplicates(data):
+    """대표 이미지 → 중복 후보 [(product_id, product_name, image_path, 해밍 거리)]"""
+    return duplicate_index.find_duplicates(data)
+
+@profiling.page("inspector_register_product")
 def main():
     st.title("검수자 – 상품 등록")
 
@@ -20,18 +19,20 @@ def main():
         st.warning("접근 권한이 없습니다. (검수자 전용)")
         st.stop()
 
-    con = get_connection()
-    cur = con.cursor()
-
     # 이미지 업로드 및 기준 이미지 선택
     st.subheader("제품 이미지 업로드")
     uploaded_files = st.file_uploader("최대 5장 업로드", type=["jpg", "jpeg", "png"], accept_multiple_files=True)
+    dups, confirm_dup = [], False
 
     if uploaded_files:
         if len(uploaded_files) > 5:
             st.warning("5장까지만 업로드됩니다.")
             uploaded_files = uploaded_files[:5]
 
+        # EXIF 회전 보정 + 미리보기 생성 (병렬)
+        with profiling.span("ingest"):
+            ingested = ingest(uploaded_files, preview_sizes=(512,))
+
         st.subheader("기준 이미지 선택")
         selected_main_idx = st.radio(
             "기준 이미지로 사용할 파일을 선택하세요.",
@@ -41,12 +42,25 @@ def main():
         )
 
         cols = st.columns(len(uploaded_files))
-        for i, (col, file) in enumerate(zip(cols, uploaded_files)):
+        for i, (col, img) in enumerate(zip(cols, ingested)):
             with col:
-                st.image(file, use_container_width=True)
+                if img["error"]:
+                    st.error(f"이미지를 읽을 수 없습니다: {img['filename']}")
+                    continue
+                st.image(img["previews"][512], use_container_width=True)
                 if i == selected_main_idx:
                     st.markdown("✅ 기준 이미지", unsafe_allow_html=True)
 
+        # 중복 상품 확인 (대표 이미지 pHash 가 가까운 기존 상품)
+        if not ingested[selected_main_idx]["error"]:
+            with profiling.span("duplicate_check"):
+                dups = likely_duplicates(ingested[selected_main_idx]["data"])
+        if dups:
+            st.warning("대표 이미지가 이미 등록된 상품과 거의 같습니다. 중복 등록이 아닌지 확인하세요.")
+            for dpid, dname, _path, dist in dups:
+                st.markdown(f"- **{dname}** (ID: {dpid}, 해밍 거리 {dist}/64)")
+            confirm_dup = st.checkbox("중복이 아닙니다 – 그래도 등록", key="confirm_dup")
+
     # 상품 정보 입력
     st.subheader("기본 정보 입력")
     pname = st.text_input("제품명")
@@ -73,35 +87,42 @@ def main():
         if not (pname and uploaded_files):
             st.error("제품명과 이미지 업로드는 필수입니다.")
             st.stop()
+        if any(img["error"] for img in ingested):
+            st.error("읽을 수 없는 이미지를 빼고 다시 업로드하세요.")
+            st.stop()
+        if dups and not confirm_dup:
+            st.error("중복 후보 상품을 확인한 뒤 '그래도 등록' 을 체크하세요.")
+            st.stop()
 
-        main_image_file = uploaded_files[selected_main_idx]
-        main_image_path = save_image_file(main_image_file)
-
-        # products 테이블에 저장
-        cur.execute("""
-            INSERT INTO products(product_name, vendor_id, operator_id, main_image, location, created_at)
-            VALUES (?, ?, ?, ?, ?, ?)
-        """, (pname, vendor, oper, main_image_path, location, now_str()))
-        product_id = cur.lastrowid
-
-        for i, file in enumerate(uploaded_files):
-            saved_name = save_image_file(file)
-            is_main = 1 if i == selected_main_idx else 0
-            cur.execute("""
-                INSERT INTO product_images(product_id, image_path, is_main, uploaded_at)
-                VALUES (?, ?, ?, ?)
-            """, (product_id, saved_name, is_main, now_str()))
+        with profiling.span("save"), transaction() as cur:
+            # 이미지 저장 (내용 해시 저장소 – 기준 이미지도 같은 파일을 가리킴)
+            saved_names = [store_image(cur, img["data"], img["filename"]) for img in ingested]
 
-        for (color, size), barcode in bc_inputs.items():
-            if not barcode.strip():
-                continue
+            # products 테이블에 저장 – 대표 이미지는 product_images.is_main 으로만 표시
+            # (main_image 에 저장소 이름을 두면 참조 수 없이 파일을 가리켜 GC 가 지울 수 있음)
             cur.execute("""
-                INSERT INTO skus(product_id, barcode, vendor, status, created_at, color, size)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            """, (product_id, barcode, vendor, "정상", now_str(), color, size))
+                INSERT INTO products(product_name, vendor_id, operator_id, location, created_at)
+                VALUES (?, ?, ?, ?, ?)
+            """, (pname, vendor, oper, location, now_str()))
+            product_id = cur.lastrowid
+
+            for i, saved_name in enumerate(saved_names):
+                is_main = 1 if i == selected_main_idx else 0
+                cur.execute("""
+                    INSERT INTO product_images(product_id, image_path, is_main, uploaded_at)
+                    VALUES (?, ?, ?, ?)
+                """, (product_id, saved_name, is_main, now_str()))
+
+            for (color, size), barcode in bc_inputs.items():
+                if not barcode.strip():
+                    continue
+                cur.execute("""
+                    INSERT INTO skus(product_id, barcode, vendor, status, created_at, color, size)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                """, (product_id, barcode, vendor, "정상", now_str(), color, size))
 
-        con.commit()
         st.success(f"상품 등록 완료! (ID: {product_id})")
+        duplicate_index.index_product(product_id)        # 다음 등록부터 바로 중복 후보로 잡히도록
 
         log_activity(
             user_id=st.session_state["user_id"],
@@ -1,42 +1,20 @@
 import streamlit as st
 import pandas as pd
-from PIL import Image, ImageDraw, ImageFont
-from barcode import Code128
-from barcode.writer import ImageWriter
-import io
-from common import get_connection
+from datetime import datetime, timedelta
+from common import get_connection, transaction, day_range
+import cold_storage
+import profiling
+import slip_cache
+from grid_store import snapshot, drop_snapshot, save_grid, GridConflict
+from label_engine import render_label, label_png, labels_pdf, labels_zpl
 
 con = get_connection()
 
-# 라벨 생성 함수
-def generate_label_image(product_name, option, barcode_text, location, label_type="정상", width=400, height=200):
-    barcode = Code128(barcode_text, writer=ImageWriter())
-    barcode_buffer = io.BytesIO()
-    barcode.write(barcode_buffer)
-    barcode_buffer.seek(0)
-    barcode_img = Image.open(barcode_buffer).convert("RGB").resize((width - 20, 80))
-
-    label = Image.new("RGB", (width, height), "white")
-    draw = ImageDraw.Draw(label)
-    font = ImageFont.load_default()
-
-    y_offset = 10
-    label_title = f"[{label_type}] 제품명: {product_name}" if label_type != "정상" else f"제품명: {product_name}"
-    draw.text((10, y_offset), label_title, fill="black", font=font)
-    draw.text((10, y_offset + 20), f"옵션: {option}", fill="black", font=font)
-    draw.text((10, y_offset + 40), f"로케이션: {location}", fill="black", font=font)
-    label.paste(barcode_img, (10, y_offset + 70))
-
-    return label
-
-def main():
-    st.title("검수자 – 검수 결과 리스트")
-
-    role = st.session_state.get("user_role", "")
-    if role != "inspector":
-        st.warning("접근 권한이 없습니다. (검수자 전용)")
-        st.stop()
+LABEL_TYPES = ["정상", "불량", "보류"]
+GRID_KEY, SNAP_KEY = "result_grid", "result_grid_snapshot"
+EDITABLE = {"comment": "comment", "status": "status"}        # 그리드 컬럼 → DB 컬럼
 
+def load_results():
     df = pd.read_sql("""
         SELECT ir.id, ir.inspected_at, ir.status,
                p.product_name, p.location,
@@ -48,9 +26,30 @@ def main():
           JOIN products p ON ir.product_id = p.id
       ORDER BY ir.inspected_at DESC
     """, con)
-
     df["similarity_pct"] = df["similarity_pct"].apply(
         lambda v: "검색등록" if pd.isna(v) else f"{v:.1f}%")
+    return df
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def build_print_job(product_name, option_text, barcode_text, location, counts, width, height):
+    """라벨 종류별 수량(counts) → (PDF 바이트, ZPL 문자열). 슬라이더 조작 등 rerun 마다 다시 만들지 않도록 캐시"""
+    jobs = [(t, q, render_label(product_name, option_text, barcode_text, location, t, width, height))
+            for t, q in zip(LABEL_TYPES, counts) if q > 0]
+    return (labels_pdf(jobs),
+            labels_zpl(barcode_text, jobs, width, height))
+
+@profiling.page("inspector_result_list")
+def main():
+    st.title("검수자 – 검수 결과 리스트")
+
+    role = st.session_state.get("user_role", "")
+    if role != "inspector":
+        st.warning("접근 권한이 없습니다. (검수자 전용)")
+        st.stop()
+
+    # 편집 중에는 불러온 시점의 데이터를 유지 (저장 시 이 스냅샷과 비교)
+    with profiling.span("load"):
+        df = snapshot(st.session_state, SNAP_KEY, None, load_results, GRID_KEY)
 
     ops = ["전체"] + sorted(df["operator"].dropna().unique())
     sts = ["전체"] + sorted(df["status"].unique())
@@ -61,25 +60,35 @@ def main():
     if st_f != "전체":
         df = df[df["status"] == st_f]
 
-    selected = st.data_editor(df, num_rows="dynamic", use_container_width=True)
-
-    if st.button("💾 수정 저장") and not selected.empty:
-        for _, row in selected.iterrows():
-            con.execute("""
-                UPDATE inspection_results
-                   SET comment=?, status=?
-                 WHERE id=? """,
-                 (row["comment"], row["status"], int(row["id"])))
-        con.commit()
-        st.success("수정 저장 완료")
+    with profiling.span("grid"):
+        selected = st.data_editor(
+            df, num_rows="dynamic", use_container_width=True, key=GRID_KEY,
+            disabled=[c for c in df.columns if c not in EDITABLE],
+        )
+
+    # 바뀐 셀·삭제한 행만 저장 (행 추가는 검수 등록 화면에서)
+    if st.button("💾 수정 저장"):
+        try:
+            rep = save_grid(df, selected, "inspection_results", "id", EDITABLE, allow_delete=True)
+        except GridConflict as e:
+            drop_snapshot(st.session_state, SNAP_KEY, GRID_KEY)
+            st.error(f"저장 취소: {e}. 최신 데이터로 다시 불러옵니다.")
+            st.stop()
+        slip_cache.invalidate(slip_ids=rep["changed_keys"])
+        drop_snapshot(st.session_state, SNAP_KEY, GRID_KEY)
+        if rep["rejected"]:
+            st.warning(f"추가한 행 {rep['rejected']}건은 저장하지 않았습니다.")
+        st.success(f"수정 {rep['updated']}건 · 삭제 {rep['deleted']}건 저장 완료")
         st.rerun()
 
     if st.button("🗑️ 선택 행 삭제") and not selected.empty:
         ids = tuple(selected["id"].tolist())
-        con.execute(
-            f"DELETE FROM inspection_results WHERE id IN ({','.join('?'*len(ids))})",
-            ids)
-        con.commit()
+        with transaction() as cur:
+            cur.execute(
+                f"DELETE FROM inspection_results WHERE id IN ({','.join('?'*len(ids))})",
+                ids)
+        slip_cache.invalidate(slip_ids=ids)
+        drop_snapshot(st.session_state, SNAP_KEY, GRID_KEY)
         st.success("삭제 완료")
         st.rerun()
 
@@ -96,11 +105,12 @@ def main():
         width = st.slider("라벨 너비(px)", 300, 800, 400)
         height = st.slider("라벨 높이(px)", 150, 400, 200)
 
-        for label_type, qty in zip(["정상", "불량", "보류"], [row['normal_qty'], row['defect_qty'], row['pending_qty']]):
+        counts = tuple(int(q) for q in (row['normal_qty'], row['defect_qty'], row['pending_qty']))
+        for label_type, qty in zip(LABEL_TYPES, counts):
             if qty > 0:
-                st.markdown(f"#### ▶️ {label_type} 수량: {qty} (출력 라벨 미리보기)")
-                for i in range(int(qty)):
-                    label_img = generate_label_image(
+                # 같은 종류 라벨은 내용이 동일 → 1장만 렌더링해서 수량만큼 출력
+                with profiling.span("label_render"):
+                    label_img = render_label(
                         product_name=row['product_name'],
                         option=option_text,
                         barcode_text=row['barcode'],
@@ -109,15 +119,64 @@ def main():
                         width=width,
                         height=height
                     )
-                    st.image(label_img, caption=f"{label_type} 라벨 {i+1}", use_column_width=False)
-
-                    img_buffer = io.BytesIO()
-                    label_img.save(img_buffer, format="PNG")
-                    st.download_button(
-                        f"📥 {label_type} 라벨 {i+1} 다운로드",
-                        img_buffer.getvalue(),
-                        file_name=f"{label_type}_label_{i+1}.png"
-                    )
+                st.markdown(f"#### ▶️ {label_type} 수량: {qty} (출력 라벨 미리보기)")
+                st.image(label_img, caption=f"{label_type} 라벨 × {qty}", use_column_width=False)
+                st.download_button(
+                    f"📥 {label_type} 라벨 PNG 다운로드",
+                    label_png(label_img),
+                    file_name=f"{label_type}_label.png"
+                )
+
+        n_labels = sum(counts)
+        if n_labels:
+            with profiling.span("print_job"):
+                pdf, zpl = build_print_job(row['product_name'], option_text, row['barcode'], row['location'],
+                                           counts, width, height)
+            c1, c2 = st.columns(2)
+            c1.download_button(
+                f"🖨️ 전체 {n_labels}장 PDF",
+                pdf,
+                file_name=f"labels_{row['barcode']}.pdf",
+                mime="application/pdf"
+            )
+            c2.download_button(
+                f"🖨️ 전체 {n_labels}장 ZPL (Zebra)",
+                zpl,
+                file_name=f"labels_{row['barcode']}.zpl",
+                mime="text/plain"
+            )
+
+    # 보관(콜드) 데이터 – 지난 달 이전 결과는 Parquet 로 옮겨져 위 목록에 없음
+    st.divider()
+    if st.checkbox("🗄️ 보관된 이전 검수 결과 조회 (읽기 전용)"):
+        if not cold_storage.available():
+            st.info("보관 데이터 조회에는 pyarrow 가 필요합니다.")
+            return
+        c1, c2 = st.columns(2)
+        start = c1.date_input("시작일", value=datetime.now() - timedelta(days=365), key="cold_start")
+        end = c2.date_input("종료일", value=datetime.now(), key="cold_end")
+        lo, hi = day_range(start, end)
+        # 브랜드 필터는 파티션 단위로 걸러져 해당 브랜드 파일만 읽음
+        with profiling.span("cold_read"):
+            cold = cold_storage.read_table("inspection_results", lo, hi,
+                                           brands=None if op_f == "전체" else [op_f], hot=False)
+        if cold.empty:
+            st.info("해당 기간에 보관된 결과가 없습니다.")
+            return
+        pids = [int(p) for p in cold["product_id"].dropna().unique()]
+        if pids:
+            names = pd.read_sql(
+                f"SELECT id AS product_id, product_name, location FROM products "
+                f"WHERE id IN ({','.join('?' * len(pids))})", con, params=pids)
+            cold = cold.merge(names, on="product_id", how="left")
+        else:
+            cold = cold.assign(product_name=None, location=None)
+        st.dataframe(
+            cold[["id", "inspected_at", "status", "product_name", "location", "barcode", "operator",
+                  "normal_qty", "defect_qty", "pending_qty", "total_qty", "comment"]]
+            .sort_values("inspected_at", ascending=False),
+            use_container_width=True,
+        )
 
 if __name__ == "__main__":
     main()
@@ -1,38 +1,27 @@
 import streamlit as st
-import os, uuid
-from PIL import Image
-from common import get_connection, now_str
-
-# ───────── DB & 폴더 준비 ─────────
-con = get_connection()
-cur = con.cursor()
-IMG_DIR = "product_images"
-os.makedirs(IMG_DIR, exist_ok=True)
+from image_ingest import ingest
+import services
+import image_similarity
+import duplicate_index
+import profiling
 
 # ───────── helper ─────────
 
-def save_image(file):
-    """업로드 이미지를 디스크에 저장하고 파일명을 반환"""
-    ext = file.name.split(".")[-1]
-    fname = f"{uuid.uuid4()}.{ext}"
-    with open(os.path.join(IMG_DIR, fname), "wb") as f:
-        f.write(file.getbuffer())
-    return fname
-
-def ensure_img_table():
-    cur.execute(
-        """CREATE TABLE IF NOT EXISTS product_images(
-            id          INTEGER PRIMARY KEY AUTOINCREMENT,
-            product_id  INT,
-            file_name   TEXT,
-            is_main     INT,
-            uploaded_at TEXT)"""
-    )
-
 HR = "<hr style='margin:0.4rem 0;border:0;border-top:1px dashed #ccc;'>"
 
+@st.cache_data(show_spinner=False, max_entries=16)
+def match_photo(data):
+    """사진 → [(product_id, image_id, 유사도 %)] (같은 사진으로 rerun 할 때 다시 계산하지 않음)"""
+    return image_similarity.match(data, k=5)
+
+@st.cache_data(show_spinner=False, ttl=60, max_entries=16)
+def likely_duplicates(data):
+    """업로드 이미지 → 중복 후보 [(product_id, product_name, image_path, 해밍 거리)]"""
+    return duplicate_index.find_duplicates(data)
+
 # ───────── main ─────────
 
+@profiling.page("inspector_text_search")
 def main():
     st.title("검수자 – 텍스트 검색 ▸ 상품·SKU 등록 & 검수")
 
@@ -52,18 +41,15 @@ def main():
 
     # ① 검색 -------------------------------------------------- --------------------------------------------------
     q = st.text_input("🔍 검색어 (제품명·바코드)", key="search_q")
+    photo = st.file_uploader("📸 또는 사진으로 찾기", ["jpg", "jpeg", "png"], key="match_photo")
     pid = st.session_state.get("pid")
+    similarity = None                  # 사진 검색으로 고른 상품이면 유사도 → similarity_pct
 
     if q:
-        rows = cur.execute(
-            "SELECT p.id, p.product_name, GROUP_CONCAT(s.barcode) "
-            "FROM products p LEFT JOIN skus s ON s.product_id = p.id "
-            "WHERE p.product_name LIKE ? OR s.barcode LIKE ? "
-            "GROUP BY p.id LIMIT 30",
-            (f"%{q}%", f"%{q}%"),
-        ).fetchall()
+        with profiling.span("search"):
+            rows = services.search_products(q, limit=30)
         if rows:
-            mapping = {f"{r[1]} (바코드:{(r[2] or '').split(',')[0]})": r[0] for r in rows}
+            mapping = {f"{r[1]} (바코드:{(r[3] or '').split(',')[0]})": r[0] for r in rows}
             sel = st.selectbox("검색 결과", list(mapping.keys()))
             pid = mapping[sel]
             st.session_state["pid"] = pid
@@ -71,15 +57,28 @@ def main():
             st.info("검색 결과 없음 — 신규 상품으로 계속 진행합니다.")
             st.session_state.pop("pid", None)
             pid = None
+    elif photo:
+        with profiling.span("image_match"):
+            hits = match_photo(photo.getvalue())
+        mapping = {}
+        for hit_pid, _iid, pct in hits:
+            info = services.product_info(hit_pid)
+            if info:
+                mapping[f"{info[0]} (유사도 {pct:.1f}%)"] = (hit_pid, pct)
+        if mapping:
+            sel = st.selectbox("사진 검색 결과", list(mapping.keys()))
+            pid, similarity = mapping[sel]
+            st.session_state["pid"] = pid
+        else:
+            st.info("비슷한 상품 이미지가 없습니다 — 신규 상품으로 계속 진행합니다.")
+            st.session_state.pop("pid", None)
+            pid = None
 
     # ② 상품 기본 정보 ---------------------------------------
     st.markdown("---")
     st.subheader("📦 상품 정보")
     if pid:
-        pname_d, vendor_d, oper_d, loc_d = cur.execute(
-            "SELECT product_name,vendor_id,operator_id,location FROM products WHERE id=?",
-            (pid,),
-        ).fetchone()
+        pname_d, vendor_d, oper_d, loc_d = services.product_info(pid)
     else:
         pname_d = vendor_d = oper_d = loc_d = ""
 
@@ -112,7 +111,7 @@ def main():
     else:
         st.markdown("#### 기존 SKU 1차 검수 수량 입력")
         for idx, (c, s, bc) in enumerate(
-            cur.execute("SELECT color,size,barcode FROM skus WHERE product_id=? GROUP BY barcode", (pid,)), 1):
+            services.product_skus(pid), 1):
             st.markdown(f"**{idx}. {c or '-'} / {s or '-'} — 바코드:{bc}**")
             nc, dc, pc = st.columns(3)
             n = nc.number_input("정상", 0, key=f"n_{bc}")
@@ -128,58 +127,48 @@ def main():
     if files and len(files) > 5:
         st.warning("5장까지만 업로드됩니다.")
         files = files[:5]
-    if files:
-        st.image([Image.open(f) for f in files], width=120)
+    # EXIF 회전 보정 + 미리보기 생성 (병렬)
+    with profiling.span("ingest"):
+        ingested = [img for img in ingest(files or [], preview_sizes=(256,)) if not img["error"]]
+    if files and len(ingested) < len(files):
+        st.warning("읽을 수 없는 이미지는 제외됩니다.")
+    if ingested:
+        st.image([img["previews"][256] for img in ingested], width=120)
+
+    # 신규 상품이면 업로드 이미지와 pHash 가 가까운 기존 상품부터 보여 줌
+    dups = {}
+    if not pid:
+        with profiling.span("duplicate_check"):
+            for img in ingested:
+                for dpid, dname, _path, dist in likely_duplicates(img["data"]):
+                    if dpid not in dups or dist < dups[dpid][1]:
+                        dups[dpid] = (dname, dist)
+    confirm_dup = False
+    if dups:
+        st.warning("업로드한 이미지가 이미 등록된 상품과 거의 같습니다. 검색으로 기존 상품을 선택하거나 중복이 아닌지 확인하세요.")
+        for dpid, (dname, dist) in sorted(dups.items(), key=lambda kv: kv[1][1]):
+            st.markdown(f"- **{dname}** (ID: {dpid}, 해밍 거리 {dist}/64)")
+        confirm_dup = st.checkbox("중복이 아닙니다 – 신규 상품으로 등록", key="confirm_dup")
 
     # ⑤ 저장 --------------------------------------------------
     if st.button("✅ 저장"):
-        if not pname.strip():
-            st.error("제품명을 입력하세요"); st.stop()
-
-        # products 테이블 (신규일 때)
-        if not pid:
-            cur.execute(
-                "INSERT INTO products(product_name,vendor_id,operator_id,location,created_at) "
-                "VALUES(?,?,?,?,?)",
-                (pname, vendor, oper, location, now_str()),
-            )
-            pid = cur.lastrowid
-
-        # SKU & inspection_results
-        inserted = 0
-        for c, s, bc, n, d, p, cm in sku_records:
-            if not bc:
-                continue
-            cur.execute(
-                "INSERT OR IGNORE INTO skus(product_id,barcode,vendor,status,created_at,color,size) "
-                "VALUES(?,?,?,?,?,?,?)",
-                (pid, bc, vendor, "정상", now_str(), c, s),
-            )
-            total = n + d + p
-            if total:
-                status = "보류" if p else "불량" if d else "정상"
-                cur.execute(
-                    "INSERT INTO inspection_results("\
-                    "image_name,product_id,barcode,operator,similarity_pct,"\
-                    "normal_qty,defect_qty,pending_qty,total_qty,comment,inspected_at,status) "\
-                    "VALUES(?,?,?,?,?,?,?,?,?,?,?,?)",
-                    ("", pid, bc, oper, None, int(n), int(d), int(p), int(total), cm, now_str(), status),
+        if dups and not confirm_dup:
+            st.error("중복 후보 상품을 확인한 뒤 체크하세요."); st.stop()
+        try:
+            with profiling.span("save"):
+                pid, inserted = services.record_inspection(
+                    pid, sku_records,
+                    product={"product_name": pname, "vendor": vendor, "operator": oper, "location": location},
+                    images=ingested,
+                    similarity_pct=similarity,
                 )
-                inserted += 1
-
-        # 이미지 저장
-        ensure_img_table()
-        for f in files or []:
-            fname = save_image(f)
-            cur.execute(
-                "INSERT INTO product_images(product_id,file_name,is_main,uploaded_at) VALUES(?,?,0,?)",
-                (pid, fname, now_str()),
-            )
-
-        con.commit()
+        except services.ServiceError as e:
+            st.error(str(e)); st.stop()
+        if ingested:
+            duplicate_index.index_product(pid)           # 다음 등록부터 바로 중복 후보로 잡히도록
 
         # UI 초기화 & 메시지
-        for k in ("pid", "img_up"):
+        for k in ("pid", "img_up", "match_photo", "confirm_dup"):
             st.session_state.pop(k, None)
         st.session_state["reset_search"] = True
         st.session_state["save_msg"] = f"검수 레코드 {inserted}건 저장 완료!"
@@ -1,22 +1,166 @@
 import streamlit as st
 import pandas as pd
+import time
+import sqlite3
 from datetime import datetime
-from common import get_connection, now_str
+import services
+import profiling
 
-con = get_connection()
-cur = con.cursor()
+BATCH_MAX_SCANS = 50      # 연속 스캔: 이만큼 쌓이면 자동 저장
+BATCH_MAX_AGE = 120       # 연속 스캔: 첫 스캔 후 이 시간(초)이 지나면 자동 저장
 
 # --------------------------------------------------
-# 유틸
+# 연속 스캔 (전표별 집계를 세션에 모았다가 한 번에 저장)
 # --------------------------------------------------
 
-def get_today():
-    return datetime.now().strftime("%Y-%m-%d")
+def batch_tally():
+    """{전표 id: {'slip': 전표 튜플, 'base': 스캔 시작 시점 누적, 'qty': 정상, 'defect': 추가불량}}"""
+    return st.session_state.setdefault("batch_tally", {})
+
+def batch_scans():
+    return sum(t["qty"] + t["defect"] for t in batch_tally().values())
+
+def batch_due():
+    started = st.session_state.get("batch_started")
+    return bool(started) and (batch_scans() >= BATCH_MAX_SCANS or time.time() - started >= BATCH_MAX_AGE)
+
+def on_batch_scan():
+    """바코드 입력 콜백 – DB 쓰기 없이 세션 집계만 늘리고 입력칸을 비움"""
+    bc = st.session_state.get("batch_scan", "").strip()
+    st.session_state["batch_scan"] = ""
+    if not bc:
+        return
+    slip = services.find_today_slip(bc)              # 오늘 전표 캐시
+    if slip is None:
+        st.session_state["batch_msg"] = ("warning", f"{bc}: 오늘 전표를 찾을 수 없습니다.")
+        return
+    tally = batch_tally()
+    t = tally.get(slip[0])
+    if t is None:
+        prog = services.slip_progress(slip[0])        # 전표당 첫 스캔에서만 조회
+        t = tally[slip[0]] = {"slip": slip, "base": prog["done"] + prog["defect"], "qty": 0, "defect": 0}
+    remaining = slip[5] - t["base"] - t["qty"] - t["defect"]
+    if remaining <= 0:
+        st.session_state["batch_msg"] = ("error", f"{slip[2]}: 검수 수량 초과 – 집계하지 않았습니다.")
+        return
+    field = "defect" if st.session_state.get("batch_as_defect") else "qty"
+    t[field] += 1
+    st.session_state.setdefault("batch_started", time.time())
+    st.session_state.setdefault("batch_undo", []).append((slip[0], field))
+    st.session_state["batch_msg"] = ("success", f"{slip[2]} +1 (남은 수량 {remaining - 1})")
+
+def clear_batch():
+    for k in ("batch_tally", "batch_started", "batch_undo"):
+        st.session_state.pop(k, None)
+
+def flush_batch(worker_id):
+    """집계 저장 (트랜잭션 1번) – 실패하면 집계를 그대로 두고 False
+
+    실패하면 자동 저장 타이머를 멈춘다 (다음 스캔이나 저장 버튼에서 다시 시도).
+    수량 초과(409)면 다른 작업자 기록을 반영해 전표별 기존 누적량을 다시 읽어 남은 수량을 바로잡는다.
+    """
+    tally = batch_tally()
+    scans = batch_scans()
+    try:
+        with profiling.span("batch_save"):
+            n = services.record_work_batch(
+                worker_id, {sid: (t["qty"], t["defect"]) for sid, t in tally.items()},
+                st.session_state.get("batch_difficulty", services.DIFFICULTIES[0]),
+                st.session_state.get("batch_extras", ()),
+            )
+    except services.ServiceError as e:
+        if e.status == 409:
+            try:
+                for sid, t in tally.items():
+                    prog = services.slip_progress(sid)
+                    t["base"] = prog["done"] + prog["defect"]
+                e = f"{e} – 남은 수량을 다시 불러왔습니다. 초과분을 취소한 뒤 저장하세요."
+            except sqlite3.OperationalError:
+                pass
+        st.session_state.pop("batch_started", None)
+        st.session_state["batch_msg"] = ("error", f"저장 실패: {e}")
+        return False
+    except sqlite3.OperationalError as e:
+        st.session_state.pop("batch_started", None)
+        st.session_state["batch_msg"] = ("error", f"저장 실패 (DB 사용 중일 수 있습니다. 잠시 후 다시 저장하세요): {e}")
+        return False
+    clear_batch()
+    st.session_state["batch_msg"] = ("success", f"스캔 {scans}회 → 작업 기록 {n}건 저장 완료")
+    return True
+
+if hasattr(st, "fragment"):
+    @st.fragment(run_every=10)
+    def batch_timer(worker_id):
+        """스캔이 멈춰도 BATCH_MAX_AGE 가 지나면 저장되도록 주기 점검"""
+        if batch_due() and flush_batch(worker_id):
+            st.rerun()
+else:
+    def batch_timer(worker_id):
+        pass
+
+def batch_scan(worker_id):
+    st.subheader("📷 연속 스캔")
+    c1, c2, c3 = st.columns([2, 3, 2])
+    c1.selectbox("작업 난이도", services.DIFFICULTIES, key="batch_difficulty")
+    c2.multiselect("추가 작업", services.EXTRA_TASKS, key="batch_extras")
+    c3.checkbox("추가 불량으로 집계", key="batch_as_defect")
+    st.text_input("바코드를 연속으로 스캔하세요 (스캔마다 1장)", key="batch_scan", on_change=on_batch_scan)
+
+    msg = st.session_state.pop("batch_msg", None)
+    if msg:
+        getattr(st, msg[0])(msg[1])
+
+    if batch_due() and flush_batch(worker_id):        # 개수·시간 기준 자동 저장
+        st.rerun()
+
+    tally = batch_tally()
+    if not tally:
+        st.caption(f"스캔한 수량은 여기 모였다가 {BATCH_MAX_SCANS}회 또는 {BATCH_MAX_AGE}초마다, "
+                   "또는 저장 버튼으로 한 번에 저장됩니다.")
+        return
+
+    st.dataframe(pd.DataFrame([{
+        "전표": sid, "제품명": t["slip"][2], "위치": t["slip"][4], "검수 수량": t["slip"][5],
+        "정상": t["qty"], "추가불량": t["defect"],
+        "남은 수량": t["slip"][5] - t["base"] - t["qty"] - t["defect"],
+    } for sid, t in tally.items()]), use_container_width=True, hide_index=True)
+
+    scans = batch_scans()
+    b1, b2, b3 = st.columns(3)
+    if b1.button(f"💾 일괄 저장 (스캔 {scans}회)", type="primary"):
+        flush_batch(worker_id)
+        st.rerun()
+    if b2.button("↩️ 마지막 스캔 취소"):
+        undo = st.session_state.get("batch_undo")
+        if undo:
+            sid, field = undo.pop()
+            tally[sid][field] -= 1
+            if not tally[sid]["qty"] and not tally[sid]["defect"]:
+                del tally[sid]
+            if not tally:
+                clear_batch()
+        st.rerun()
+    if b3.button("🗑️ 비우기"):
+        clear_batch()
+        st.rerun()
+    batch_timer(worker_id)
+
+def today_log():
+    st.divider()
+    st.subheader("🧑‍🔧 오늘 작업 내역")
+    with profiling.span("today_log"):
+        logs = services.today_work_log(20)
+    df = pd.DataFrame(
+        logs,
+        columns=["전표", "작업자", "정상", "추가불량", "난이도", "추가작업", "시간"],
+    )
+    st.dataframe(df, use_container_width=True)
 
 # --------------------------------------------------
 # 메인
 # --------------------------------------------------
 
+@profiling.page("inspector_worker_task")
 def main():
     st.title("작업자 – 바코드 기반 작업 기록")
 
@@ -35,6 +179,13 @@ def main():
     for k, v in defaults.items():
         st.session_state.setdefault(k, v)
 
+    # 같은 SKU 를 랙 단위로 처리할 때는 연속 스캔 – 스캔마다 저장하지 않고 모아서 한 번에
+    mode = st.radio("작업 방식", ["단건", "연속 스캔"], horizontal=True, key="scan_mode")
+    if mode == "연속 스캔":
+        batch_scan(st.session_state["user_id"])
+        today_log()
+        return
+
     # --------------------------------------------------
     # 바코드 입력
     # --------------------------------------------------
@@ -42,18 +193,8 @@ def main():
     barcode_input = st.text_input("바코드를 입력 또는 스캔하세요")
 
     if barcode_input and barcode_input != st.session_state["last_barcode"]:
-        today_like = f"%{get_today()}%"
-        today_row = cur.execute(
-            """
-            SELECT ir.id, ir.product_id, p.product_name, p.operator_id, p.location,
-                   ir.total_qty, ir.status, ir.inspected_at
-              FROM inspection_results ir
-              JOIN products p ON ir.product_id = p.id
-             WHERE ir.barcode = ? AND ir.inspected_at LIKE ?
-             ORDER BY ir.id DESC LIMIT 1
-            """,
-            (barcode_input, today_like),
-        ).fetchone()
+        with profiling.span("lookup"):
+            today_row = services.find_today_slip(barcode_input)      # 오늘 전표 캐시 (미스일 때만 DB)
 
         if today_row:
             st.session_state.update(
@@ -84,11 +225,10 @@ def main():
             inspected_at,
         ) = result
 
-        # 누적 작업량
-        total_done, total_defect = cur.execute(
-            "SELECT COALESCE(SUM(repaired_qty),0), COALESCE(SUM(additional_defect_qty),0) FROM work_orders WHERE inspection_id=?",
-            (ir_id,),
-        ).fetchone()
+        # 누적 작업량 (work_orders 트리거가 유지하는 합계)
+        with profiling.span("progress"):
+            progress = services.slip_progress(ir_id)
+        total_done, total_defect, workers = progress["done"], progress["defect"], progress["workers"]
 
         # 전표 요약
         st.markdown(f"**제품명:** {pname}")
@@ -99,15 +239,6 @@ def main():
         # 작업자별 현황
         st.divider()
         my_id = st.session_state["user_id"]
-        workers = cur.execute(
-            """
-            SELECT worker_id, SUM(repaired_qty), SUM(additional_defect_qty)
-              FROM work_orders
-             WHERE inspection_id=?
-             GROUP BY worker_id
-            """,
-            (ir_id,),
-        ).fetchall()
         for wid, normal, defect in workers:
             color = "red" if wid == my_id else "blue"
             st.markdown(
@@ -136,8 +267,8 @@ def main():
             st.stop()
 
         # 작업 상세
-        difficulty = st.selectbox("작업 난이도", ["양품화1", "양품화2", "프리미엄양품화1"])
-        extras = st.multiselect("추가 작업", ["스팀", "수선", "세탁"])
+        difficulty = st.selectbox("작업 난이도", services.DIFFICULTIES)
+        extras = st.multiselect("추가 작업", services.EXTRA_TASKS)
         comment = st.text_area("작업 코멘트")
 
         # 저장
@@ -147,24 +278,13 @@ def main():
                 st.warning("정상·추가 불량 수량이 모두 0입니다. 최소 1 이상 입력해 주세요.")
                 st.stop()
 
-            cur.execute(
-                """
-                INSERT INTO work_orders
-                    (inspection_id, worker_id, additional_defect_qty, repaired_qty,
-                     repaired_approved, difficulty, extra_tasks, created_at)
-                VALUES (?,?,?,?,0,?,?,?)
-                """,
-                (
-                    ir_id,
-                    my_id,
-                    defect_qty,
-                    scan_qty,
-                    difficulty,
-                    ",".join(extras),
-                    now_str(),
-                ),
-            )
-            con.commit()
+            # 남은 수량 재확인은 저장 트랜잭션 안에서 (다른 작업자·스캐너와 동시 저장 대비)
+            try:
+                with profiling.span("save"):
+                    services.record_work(ir_id, my_id, scan_qty, defect_qty, difficulty, extras)
+            except services.ServiceError as e:
+                st.error(str(e))
+                st.stop()
             st.success("작업 완료가 저장되었습니다!")
                         # 세션 리셋: scan_qty 는 위젯이 이미 생성된 상태라 직접 재할당하면 오류가 납니다.
             st.session_state.pop("scan_qty", None)            # 제거 후 다음 rerun 에서 defaults 로 초기화
@@ -175,25 +295,7 @@ def main():
     # --------------------------------------------------
     # 오늘 작업 로그
     # --------------------------------------------------
-    st.divider()
-    st.subheader("🧑‍🔧 오늘 작업 내역")
-    logs = cur.execute(
-        """
-        SELECT w.inspection_id, u.username, w.repaired_qty, w.additional_defect_qty,
-               w.difficulty, w.extra_tasks, w.created_at
-          FROM work_orders w
-          JOIN users u ON w.worker_id = u.id
-         WHERE DATE(w.created_at)=DATE(?)
-         ORDER BY w.created_at DESC
-         LIMIT 20
-        """,
-        (get_today(),),
-    ).fetchall()
-    df = pd.DataFrame(
-        logs,
-        columns=["전표", "작업자", "정상", "추가불량", "난이도", "추가작업", "시간"],
-    )
-    st.dataframe(df, use_container_width=True)
+    today_log()
 
 if __name__ == "__main__":
     main()
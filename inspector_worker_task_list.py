@@ -1,11 +1,18 @@
 import streamlit as st
 import pandas as pd
 from datetime import datetime, timedelta
-from common import get_connection
+from common import get_connection, day_range
+from grid_store import snapshot, drop_snapshot, save_grid, GridConflict
+import cold_storage
+import profiling
 
 con = get_connection()
 cur = con.cursor()
 
+GRID_KEY, SNAP_KEY = "work_grid", "work_grid_snapshot"
+# 그리드 컬럼 → work_orders 컬럼 (수정 가능 항목)
+EDITABLE = {"정상": "repaired_qty", "추가불량": "additional_defect_qty", "난이도": "difficulty", "추가작업": "extra_tasks"}
+
 # --------------------------------------------------
 # 유틸
 # --------------------------------------------------
@@ -13,32 +20,56 @@ cur = con.cursor()
 def today_dt() -> datetime:
     return datetime.now()
 
-def get_today_str() -> str:
-    return today_dt().strftime("%Y-%m-%d")
-
-def first_day_of_month(dt: datetime) -> str:
-    return dt.replace(day=1).strftime("%Y-%m-%d")
+def first_day_of_month(dt: datetime) -> datetime:
+    return dt.replace(day=1)
 
-def first_day_prev_month(dt: datetime) -> str:
+def first_day_prev_month(dt: datetime) -> datetime:
     prev = dt.replace(day=1) - timedelta(days=1)
-    return prev.replace(day=1).strftime("%Y-%m-%d")
+    return prev.replace(day=1)
 
-def last_day_prev_month(dt: datetime) -> str:
-    return (dt.replace(day=1) - timedelta(days=1)).strftime("%Y-%m-%d")
+def last_day_prev_month(dt: datetime) -> datetime:
+    return dt.replace(day=1) - timedelta(days=1)
 
-def prune_old_records(worker_id: int):
-    """90일(≈3 개월) 초과된 work_orders 자동 삭제"""
-    limit_date = (today_dt() - timedelta(days=90)).strftime("%Y-%m-%d")
-    cur.execute(
-        "DELETE FROM work_orders WHERE worker_id=? AND DATE(created_at) < DATE(?)",
-        (worker_id, limit_date),
+def load_work_rows(worker_id, lo, hi) -> pd.DataFrame:
+    """작업자 본인의 [lo, hi) 기간 작업 내역"""
+    rows = cur.execute(
+        """
+        SELECT w.id, w.inspection_id, p.product_name,
+               w.repaired_qty, w.additional_defect_qty,
+               w.difficulty, w.extra_tasks, w.created_at, ir.id
+          FROM work_orders w
+          LEFT JOIN inspection_results ir ON w.inspection_id = ir.id
+          LEFT JOIN products p ON ir.product_id = p.id
+         WHERE w.worker_id=? AND w.created_at >= ? AND w.created_at < ?
+         ORDER BY w.created_at DESC
+        """,
+        (worker_id, lo, hi),
+    ).fetchall()
+    # 전표가 콜드 보관(Parquet)으로 옮겨진 작업은 상품명을 보관 파티션에서 찾음
+    cold_ids = {r[1] for r in rows if r[8] is None and r[1] is not None}
+    names = {}
+    if cold_ids and cold_storage.available():
+        pids = {sid: int(p) for sid, p in
+                cold_storage.lookup("inspection_results", cold_ids, "product_id", end=hi).items() if pd.notna(p)}
+        if pids:
+            uniq = sorted(set(pids.values()))
+            prod = dict(cur.execute(f"SELECT id, product_name FROM products WHERE id IN ({','.join('?' * len(uniq))})",
+                                    uniq).fetchall())
+            names = {sid: prod.get(pid) for sid, pid in pids.items()}
+    rows = [r[:2] + (r[2] if r[8] is not None else names.get(r[1]),) + r[3:8] for r in rows]
+    return pd.DataFrame(
+        rows,
+        columns=[
+            "작업ID", "전표ID", "상품명", "정상", "추가불량",
+            "난이도", "추가작업", "시간",
+        ],
     )
-    con.commit()
 
 # --------------------------------------------------
 # 메인
 # --------------------------------------------------
 
+@profiling.page("inspector_worker_task_list")
 def main():
     st.title("작업자 – 내 작업 리스트 · 수정")
 
@@ -49,9 +80,6 @@ def main():
 
     my_id = st.session_state["user_id"]
 
-    # ▶︎ 90일 초과 기록 자동 정리
-    prune_old_records(my_id)
-
     # ---------------- 기간 필터 ----------------
     period = st.radio(
         "조회 기간",
@@ -59,32 +87,21 @@ def main():
         horizontal=True,
     )
 
-    where = ""
-    params = [my_id]
-    today = get_today_str()
     now_dt = today_dt()
 
+    # 모든 기간은 [시작일 00:00, 종료일+1 00:00) 반열린 구간으로 변환
     if period == "오늘":
-        where = "AND DATE(w.created_at)=DATE(?)"
-        params.append(today)
+        start, end = now_dt, now_dt
     elif period == "어제":
-        where = "AND DATE(w.created_at)=DATE(?,'-1 day')"
-        params.append(today)
+        start = end = now_dt - timedelta(days=1)
     elif period == "이번달":
-        first = first_day_of_month(now_dt)
-        where = "AND DATE(w.created_at) >= DATE(?)"
-        params.append(first)
+        start, end = first_day_of_month(now_dt), now_dt
     elif period == "지난달":
-        first_prev = first_day_prev_month(now_dt)
-        last_prev  = last_day_prev_month(now_dt)
-        where = "AND DATE(w.created_at) BETWEEN DATE(?) AND DATE(?)"
-        params.extend([first_prev, last_prev])
+        start, end = first_day_prev_month(now_dt), last_day_prev_month(now_dt)
     elif period == "최근 7일":
-        where = "AND w.created_at>=DATE(?,'-6 day')"
-        params.append(today)
+        start, end = now_dt - timedelta(days=6), now_dt
     elif period == "최근 30일":
-        where = "AND w.created_at>=DATE(?,'-29 day')"
-        params.append(today)
+        start, end = now_dt - timedelta(days=29), now_dt
     elif period == "날짜 지정":
         col1, col2 = st.columns(2)
         start = col1.date_input("시작일", value=now_dt-timedelta(days=6))
@@ -92,58 +109,35 @@ def main():
         if start > end:
             st.error("시작일이 종료일보다 클 수 없습니다.")
             st.stop()
-        where = "AND DATE(w.created_at) BETWEEN DATE(?) AND DATE(?)"
-        params.extend([start.strftime("%Y-%m-%d"), end.strftime("%Y-%m-%d")])
 
-    # ---------------- 데이터 조회 ----------------
-    rows = cur.execute(
-        f"""
-        SELECT w.id, w.inspection_id, p.product_name,
-               w.repaired_qty, w.additional_defect_qty,
-               w.difficulty, w.extra_tasks, w.created_at
-          FROM work_orders w
-          JOIN inspection_results ir ON w.inspection_id = ir.id
-          JOIN products p ON ir.product_id = p.id
-         WHERE w.worker_id=? {where}
-         ORDER BY w.created_at DESC
-        """,
-        tuple(params),
-    ).fetchall()
+    lo, hi = day_range(start, end)
+    params = (my_id, lo, hi)
 
-    if not rows:
+    # ---------------- 데이터 조회 ----------------
+    # 편집 중에는 불러온 시점의 데이터를 유지 (저장 시 이 스냅샷과 비교)
+    with profiling.span("load"):
+        df = snapshot(st.session_state, SNAP_KEY, params, lambda: load_work_rows(*params), GRID_KEY)
+    if df.empty:
         st.info("해당 기간에 작업 내역이 없습니다.")
         return
 
-    df = pd.DataFrame(
-        rows,
-        columns=[
-            "작업ID", "전표ID", "상품명", "정상", "추가불량",
-            "난이도", "추가작업", "시간",
-        ],
-    )
-
     st.subheader("내 작업 내역 (수정 가능, 삭제 불가)")
-    edited = st.data_editor(df, use_container_width=True, num_rows="dynamic")
+    with profiling.span("grid"):
+        edited = st.data_editor(
+            df, use_container_width=True, num_rows="fixed", key=GRID_KEY,
+            disabled=[c for c in df.columns if c not in EDITABLE],
+        )
 
     if st.button("💾 수정 저장"):
-        for _, r in edited.iterrows():
-            cur.execute(
-                """
-                UPDATE work_orders
-                   SET repaired_qty=?, additional_defect_qty=?, difficulty=?, extra_tasks=?
-                 WHERE id=? AND worker_id=?
-                """,
-                (
-                    int(r["정상"]),
-                    int(r["추가불량"]),
-                    r["난이도"],
-                    r["추가작업"],
-                    int(r["작업ID"]),
-                    my_id,
-                ),
-            )
-        con.commit()
-        st.success("수정 내용이 저장되었습니다!")
+        try:
+            with profiling.span("save"):
+                rep = save_grid(df, edited, "work_orders", "작업ID", EDITABLE, scope={"worker_id": my_id})
+        except GridConflict as e:
+            drop_snapshot(st.session_state, SNAP_KEY, GRID_KEY)
+            st.error(f"저장 취소: {e}. 최신 데이터로 다시 불러옵니다.")
+            st.stop()
+        drop_snapshot(st.session_state, SNAP_KEY, GRID_KEY)
+        st.success(f"{rep['updated']}건 수정 내용이 저장되었습니다!")
         st.rerun()
 
     # ---------------- 통계 요약 ----------------
@@ -0,0 +1,117 @@
+################################################################################
+# label_engine.py  –  바코드 라벨 렌더링 (래스터 캐시) + 일괄 출력(PDF / ZPL)
+################################################################################
+import io
+import os
+from functools import lru_cache
+from PIL import Image, ImageDraw, ImageFont, ImageOps
+from barcode import Code128
+from barcode.writer import ImageWriter
+
+BARCODE_HEIGHT = 80          # 라벨 안 바코드 영역 높이(px)
+PRINTER_DPI = 203            # 일반 감열 라벨 프린터 해상도 (PDF 페이지 크기 계산용)
+TEXT_HEIGHT = 70             # 라벨 위쪽 글자 영역 높이(px) – ZPL 은 이 영역을 그림(^GF)으로 보냄
+# 한글 글리프가 있는 글꼴 – LABEL_FONT 로 지정하거나 OS 기본 한글 글꼴
+FONT_CANDIDATES = (
+    os.environ.get("LABEL_FONT", ""),
+    "C:/Windows/Fonts/malgun.ttf",
+    "/usr/share/fonts/truetype/nanum/NanumGothic.ttf",
+    "/usr/share/fonts/opentype/noto/NotoSansCJK-Regular.ttc",
+    "/System/Library/Fonts/AppleSDGothicNeo.ttc",
+)
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+#  래스터
+# ══════════════════════════════════════════════════════════════════════════════
+@lru_cache(maxsize=1)
+def _font():
+    """한글 TTF (없으면 PIL 기본 글꼴 – 한글이 깨짐)"""
+    for path in FONT_CANDIDATES:
+        if path and os.path.exists(path):
+            try:
+                return ImageFont.truetype(path, 16)
+            except OSError:
+                continue
+    return ImageFont.load_default()
+
+
+@lru_cache(maxsize=512)
+def barcode_raster(barcode_text, width):
+    """Code128 바코드 이미지 (PNG 인코딩/디코딩 없이 writer 에서 바로 PIL 이미지로)
+
+    반환 이미지는 캐시에 공유되므로 호출부에서 수정하지 말 것 (paste 로만 사용).
+    """
+    img = Code128(barcode_text, writer=ImageWriter()).render()
+    return img.convert("RGB").resize((width - 20, BARCODE_HEIGHT))
+
+
+@lru_cache(maxsize=256)
+def render_label(product_name, option, barcode_text, location, label_type="정상", width=400, height=200):
+    """라벨 1장 이미지 – 같은 내용은 한 번만 그린다 (공유 이미지, 수정 금지)"""
+    label = Image.new("RGB", (width, height), "white")
+    draw = ImageDraw.Draw(label)
+    font = _font()
+
+    y_offset = 10
+    label_title = f"[{label_type}] 제품명: {product_name}" if label_type != "정상" else f"제품명: {product_name}"
+    draw.text((10, y_offset), label_title, fill="black", font=font)
+    draw.text((10, y_offset + 20), f"옵션: {option}", fill="black", font=font)
+    draw.text((10, y_offset + 40), f"로케이션: {location}", fill="black", font=font)
+    label.paste(barcode_raster(barcode_text, width), (10, y_offset + 70))
+
+    return label
+
+
+def label_png(label_img):
+    buf = io.BytesIO()
+    label_img.save(buf, format="PNG")
+    return buf.getvalue()
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+#  일괄 출력 – jobs: [(label_type, qty, 라벨 이미지), ...]
+# ══════════════════════════════════════════════════════════════════════════════
+def labels_pdf(jobs):
+    """N장 라벨을 한 장 = 한 페이지인 PDF 하나로"""
+    pages = [img for _type, qty, img in jobs for _ in range(int(qty))]
+    if not pages:
+        return b""
+    buf = io.BytesIO()
+    pages[0].save(buf, format="PDF", save_all=True, append_images=pages[1:], resolution=PRINTER_DPI)
+    return buf.getvalue()
+
+
+def _zpl_field(text):
+    # ^ 와 ~ 는 ZPL 명령 문자
+    return str(text).replace("^", " ").replace("~", " ")
+
+
+def _zpl_graphic(img):
+    """이미지 → ^GFA 필드 (1비트, 검정 = 1)"""
+    mono = ImageOps.invert(img.convert("L")).point(lambda p: 255 if p >= 128 else 0, "1")
+    data = mono.tobytes()                              # 행마다 바이트 단위로 채움, MSB 먼저
+    row = (mono.width + 7) // 8
+    return f"^GFA,{len(data)},{len(data)},{row},{data.hex().upper()}"
+
+
+def labels_zpl(barcode_text, jobs, width=400, height=200):
+    """Zebra ZPL 인쇄 작업 – 라벨 종류별 포맷 1개 + ^PQ 수량
+
+    프린터 내장 글꼴(^A0)에는 한글이 없으므로 글자 영역은 렌더링한 라벨 이미지를 그림(^GF)으로 보내고,
+    바코드만 프린터가 직접 그린다.
+    """
+    out = []
+    for label_type, qty, img in jobs:
+        qty = int(qty)
+        if qty <= 0:
+            continue
+        out.append("\n".join([
+            "^XA",
+            f"^PW{width}^LL{height}",
+            f"^FO0,0{_zpl_graphic(img.crop((0, 0, width, TEXT_HEIGHT)))}^FS",
+            f"^FO10,80^BY2^BCN,{BARCODE_HEIGHT},Y,N,N^FD{_zpl_field(barcode_text)}^FS",
+            f"^PQ{qty}",
+            "^XZ",
+        ]))
+    return "\n".join(out)
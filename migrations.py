@@ -0,0 +1,432 @@
+################################################################################
+# migrations.py  –  버전 기반 스키마 마이그레이션 (schema_version)
+################################################################################
+from datetime import datetime
+
+# ══════════════════════════════════════════════════════════════════════════════
+#  helper
+# ══════════════════════════════════════════════════════════════════════════════
+def add_column_if_missing(cur, table, column, col_type):
+    """컬럼이 없을 때만 ALTER TABLE ADD COLUMN 실행 (같은 커서/트랜잭션 사용)"""
+    cols = [c[1] for c in cur.execute(f"PRAGMA table_info({table})").fetchall()]
+    if column not in cols:
+        cur.execute(f"ALTER TABLE {table} ADD COLUMN {column} {col_type}")
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+#  마이그레이션 정의 (버전 순서대로 추가만 할 것 – 기존 항목 수정 금지)
+# ══════════════════════════════════════════════════════════════════════════════
+def m001_legacy_columns(cur):
+    """기존 ensure_column_exists() 로 보강하던 컬럼들"""
+    add_column_if_missing(cur, "inspection_results", "inspected_at", "TEXT")
+    add_column_if_missing(cur, "inspection_results", "status", "TEXT")
+    add_column_if_missing(cur, "inspection_results", "barcode", "TEXT")
+    add_column_if_missing(cur, "skus", "color", "TEXT")
+    add_column_if_missing(cur, "skus", "size", "TEXT")
+    add_column_if_missing(cur, "product_images", "file_name", "TEXT")
+
+
+def m002_lookup_indexes(cur):
+    """핫 경로 조회용 인덱스 (커버링 위주)"""
+    # 작업자 스캔: barcode → 최신 전표 (ORDER BY id DESC 는 rowid 로 커버)
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_ir_barcode ON inspection_results(barcode)")
+    # 라벨 옵션 조회 / 바코드 검색: barcode → color,size
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_skus_barcode ON skus(barcode, color, size)")
+    # 상품별 SKU 목록 (GROUP BY barcode 포함)
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_skus_product ON skus(product_id, barcode, color, size)")
+    # 썸네일 1장: ORDER BY is_main DESC, id ASC
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_pimg_product ON product_images(product_id, is_main, id)")
+    # 전표별 누적 작업량 / 작업자별 현황 (SUM 두 컬럼까지 커버)
+    cur.execute(
+        "CREATE INDEX IF NOT EXISTS idx_wo_inspection "
+        "ON work_orders(inspection_id, worker_id, repaired_qty, additional_defect_qty)"
+    )
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_wo_worker ON work_orders(worker_id)")
+
+
+def m003_sargable_timestamps(cur):
+    """시각 컬럼을 'YYYY-MM-DD HH:MM:SS' 로 정규화하고 범위 조회용 인덱스 생성"""
+    # 문자열 비교(>=, <)가 시간 순서와 일치하도록 기존 행 백필
+    for table, col in (("inspection_results", "inspected_at"),
+                       ("work_orders", "created_at"),
+                       ("products", "created_at"),
+                       ("activity_log", "created_at")):
+        cur.execute(f"""
+            UPDATE {table}
+               SET {col} = strftime('%Y-%m-%d %H:%M:%S', {col})
+             WHERE {col} IS NOT NULL
+               AND strftime('%Y-%m-%d %H:%M:%S', {col}) IS NOT NULL
+               AND {col} <> strftime('%Y-%m-%d %H:%M:%S', {col})
+        """)
+    # 오늘 전표 조회: barcode = ? AND inspected_at >= ? AND inspected_at < ?
+    cur.execute("DROP INDEX IF EXISTS idx_ir_barcode")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_ir_barcode_inspected ON inspection_results(barcode, inspected_at)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_ir_inspected ON inspection_results(inspected_at)")
+    # 작업자 기간 조회 / 오늘 작업 로그
+    cur.execute("DROP INDEX IF EXISTS idx_wo_worker")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_wo_worker_created ON work_orders(worker_id, created_at)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_wo_created ON work_orders(created_at)")
+
+
+# product_search 한 행(rowid = products.id)을 다시 만드는 SQL – {pid} 는 트리거의 NEW/OLD 참조
+_SEARCH_REFRESH = """
+    DELETE FROM product_search WHERE rowid = {pid};
+    INSERT INTO product_search(rowid, pid, product_name, options, barcodes, location)
+    SELECT p.id, p.id, p.product_name,
+           (SELECT GROUP_CONCAT(DISTINCT color||'/'||size) FROM skus WHERE product_id = p.id),
+           (SELECT GROUP_CONCAT(DISTINCT barcode)          FROM skus WHERE product_id = p.id),
+           p.location
+      FROM products p
+     WHERE p.id = {pid};
+"""
+
+
+def m004_product_search(cur):
+    """제품명·옵션·바코드·로케이션·ID 전문 검색용 FTS5 (trigram → 부분일치 LIKE 대체, SQLite ≥ 3.34)"""
+    cur.execute("""
+        CREATE VIRTUAL TABLE IF NOT EXISTS product_search USING fts5(
+          pid, product_name, options, barcodes, location,
+          tokenize = 'trigram'
+        )
+    """)
+    triggers = {
+        "trg_products_ai_search": ("AFTER INSERT ON products", _SEARCH_REFRESH.format(pid="NEW.id")),
+        "trg_products_au_search": ("AFTER UPDATE OF id, product_name, location ON products",
+                                   _SEARCH_REFRESH.format(pid="OLD.id") + _SEARCH_REFRESH.format(pid="NEW.id")),
+        "trg_products_ad_search": ("AFTER DELETE ON products",
+                                   "DELETE FROM product_search WHERE rowid = OLD.id;"),
+        "trg_skus_ai_search": ("AFTER INSERT ON skus", _SEARCH_REFRESH.format(pid="NEW.product_id")),
+        "trg_skus_au_search": ("AFTER UPDATE OF product_id, barcode, color, size ON skus",
+                               _SEARCH_REFRESH.format(pid="OLD.product_id") + _SEARCH_REFRESH.format(pid="NEW.product_id")),
+        "trg_skus_ad_search": ("AFTER DELETE ON skus", _SEARCH_REFRESH.format(pid="OLD.product_id")),
+    }
+    for name, (event, body) in triggers.items():
+        cur.execute(f"CREATE TRIGGER IF NOT EXISTS {name} {event} BEGIN {body} END")
+
+    # 기존 상품 전체 색인
+    cur.execute("DELETE FROM product_search")
+    cur.execute("""
+        INSERT INTO product_search(rowid, pid, product_name, options, barcodes, location)
+        SELECT p.id, p.id, p.product_name, s.options, s.barcodes, p.location
+          FROM products p
+          LEFT JOIN (
+                SELECT product_id,
+                       GROUP_CONCAT(DISTINCT color||'/'||size) AS options,
+                       GROUP_CONCAT(DISTINCT barcode)          AS barcodes
+                  FROM skus
+                 GROUP BY product_id
+          ) s ON s.product_id = p.id
+    """)
+
+
+def m005_product_paging(cur):
+    """상품 목록 keyset 페이지네이션: ORDER BY created_at DESC, id DESC"""
+    # NULL 은 행 값 비교((created_at, id) <= (?, ?))에서 빠지므로 빈 문자열로 (가장 오래된 쪽 정렬)
+    cur.execute("UPDATE products SET created_at = '' WHERE created_at IS NULL")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_products_created ON products(created_at)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_products_vendor ON products(vendor_id, created_at)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_products_operator ON products(operator_id, created_at)")
+
+
+def m006_image_blobs(cur):
+    """내용 해시 이미지 저장소 참조 카운트"""
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS image_blobs (
+          hash       TEXT PRIMARY KEY,
+          name       TEXT,
+          size       INT,
+          ref_count  INT DEFAULT 0,
+          created_at TEXT
+        )
+    """)
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_image_blobs_unref ON image_blobs(hash) WHERE ref_count <= 0")
+
+
+# 작업 기록 1건을 전표 합계 / 전표·작업자 합계에 반영 ({r}=NEW|OLD, {sign}=+|-)
+_PROGRESS_APPLY = """
+    INSERT INTO slip_progress(inspection_id, repaired_qty, defect_qty, orders)
+    SELECT {r}.inspection_id, {sign}COALESCE({r}.repaired_qty, 0), {sign}COALESCE({r}.additional_defect_qty, 0), {sign}1
+     WHERE {r}.inspection_id IS NOT NULL
+    ON CONFLICT(inspection_id) DO UPDATE SET
+       repaired_qty = repaired_qty + excluded.repaired_qty,
+       defect_qty   = defect_qty   + excluded.defect_qty,
+       orders       = orders       + excluded.orders;
+    INSERT INTO slip_worker_progress(inspection_id, worker_id, repaired_qty, defect_qty, orders)
+    SELECT {r}.inspection_id, {r}.worker_id, {sign}COALESCE({r}.repaired_qty, 0), {sign}COALESCE({r}.additional_defect_qty, 0), {sign}1
+     WHERE {r}.inspection_id IS NOT NULL AND {r}.worker_id IS NOT NULL
+    ON CONFLICT(inspection_id, worker_id) DO UPDATE SET
+       repaired_qty = repaired_qty + excluded.repaired_qty,
+       defect_qty   = defect_qty   + excluded.defect_qty,
+       orders       = orders       + excluded.orders;
+"""
+# 마지막 작업 기록이 빠진 행은 삭제 (GROUP BY 결과와 같은 행 집합 유지)
+_PROGRESS_PRUNE = """
+    DELETE FROM slip_progress WHERE inspection_id = OLD.inspection_id AND orders <= 0;
+    DELETE FROM slip_worker_progress
+     WHERE inspection_id = OLD.inspection_id AND worker_id = OLD.worker_id AND orders <= 0;
+"""
+
+
+def rebuild_slip_progress(cur):
+    """work_orders 전체에서 진행 합계 재계산 (마이그레이션·복구용)"""
+    cur.execute("DELETE FROM slip_progress")
+    cur.execute("DELETE FROM slip_worker_progress")
+    cur.execute("""
+        INSERT INTO slip_progress(inspection_id, repaired_qty, defect_qty, orders)
+        SELECT inspection_id, COALESCE(SUM(repaired_qty), 0), COALESCE(SUM(additional_defect_qty), 0), COUNT(*)
+          FROM work_orders
+         WHERE inspection_id IS NOT NULL
+         GROUP BY inspection_id
+    """)
+    cur.execute("""
+        INSERT INTO slip_worker_progress(inspection_id, worker_id, repaired_qty, defect_qty, orders)
+        SELECT inspection_id, worker_id, COALESCE(SUM(repaired_qty), 0), COALESCE(SUM(additional_defect_qty), 0), COUNT(*)
+          FROM work_orders
+         WHERE inspection_id IS NOT NULL AND worker_id IS NOT NULL
+         GROUP BY inspection_id, worker_id
+    """)
+
+
+def m007_slip_progress(cur):
+    """전표별 / 전표·작업자별 작업 수량 합계 (work_orders 트리거로 유지 → 스캔 화면 O(1) 조회)"""
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS slip_progress (
+          inspection_id INTEGER PRIMARY KEY,
+          repaired_qty  INT NOT NULL DEFAULT 0,
+          defect_qty    INT NOT NULL DEFAULT 0,
+          orders        INT NOT NULL DEFAULT 0
+        )
+    """)
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS slip_worker_progress (
+          inspection_id INT NOT NULL,
+          worker_id     INT NOT NULL,
+          repaired_qty  INT NOT NULL DEFAULT 0,
+          defect_qty    INT NOT NULL DEFAULT 0,
+          orders        INT NOT NULL DEFAULT 0,
+          PRIMARY KEY (inspection_id, worker_id)
+        ) WITHOUT ROWID
+    """)
+    add = _PROGRESS_APPLY.format(r="NEW", sign="")
+    sub = _PROGRESS_APPLY.format(r="OLD", sign="-") + _PROGRESS_PRUNE
+    triggers = {
+        "trg_work_orders_ai_progress": ("AFTER INSERT ON work_orders", add),
+        "trg_work_orders_au_progress": (
+            "AFTER UPDATE OF inspection_id, worker_id, repaired_qty, additional_defect_qty ON work_orders",
+            sub + add),
+        "trg_work_orders_ad_progress": ("AFTER DELETE ON work_orders", sub),
+    }
+    for name, (event, body) in triggers.items():
+        cur.execute(f"CREATE TRIGGER IF NOT EXISTS {name} {event} BEGIN {body} END")
+    rebuild_slip_progress(cur)
+
+
+def m008_cold_partitions(cur):
+    """Parquet 콜드 파티션 목록 (테이블·월·브랜드별 파일) – cold_storage.py"""
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS cold_partitions (
+          id         INTEGER PRIMARY KEY AUTOINCREMENT,
+          table_name TEXT NOT NULL,
+          month      TEXT NOT NULL,       -- 'YYYY-MM'
+          brand      TEXT NOT NULL,       -- 브랜드 없음은 ''
+          path       TEXT NOT NULL,       -- COLD_DIR 기준 상대 경로
+          rows       INT,
+          min_at     TEXT,
+          max_at     TEXT,
+          created_at TEXT
+        )
+    """)
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_cold_partitions ON cold_partitions(table_name, month, brand)")
+
+
+# 일별 집계 재계산 SQL – 시각 구간 [?, ?) 의 원본 행을 (일, 차원) 단위로 묶음
+_ROLLUP_SQL = {
+    "inspection": ("daily_inspection", """
+        INSERT INTO daily_inspection(day, brand, vendor, product_id, results,
+                                     normal_qty, defect_qty, pending_qty, total_qty)
+        SELECT substr(ir.inspected_at, 1, 10), COALESCE(ir.operator, p.operator_id, ''),
+               COALESCE(p.vendor_id, ''), COALESCE(ir.product_id, 0), COUNT(*),
+               SUM(COALESCE(ir.normal_qty, 0)), SUM(COALESCE(ir.defect_qty, 0)),
+               SUM(COALESCE(ir.pending_qty, 0)), SUM(COALESCE(ir.total_qty, 0))
+          FROM inspection_results ir
+          LEFT JOIN products p ON p.id = ir.product_id
+         WHERE ir.inspected_at >= ? AND ir.inspected_at < ?
+         GROUP BY 1, 2, 3, 4
+    """),
+    "work": ("daily_work", """
+        INSERT INTO daily_work(day, worker_id, brand, difficulty, orders, repaired_qty, defect_qty,
+                               steam, repair, wash)
+        SELECT substr(w.created_at, 1, 10), COALESCE(w.worker_id, 0), COALESCE(ir.operator, ''),
+               COALESCE(w.difficulty, ''), COUNT(*),
+               SUM(COALESCE(w.repaired_qty, 0)), SUM(COALESCE(w.additional_defect_qty, 0)),
+               SUM(instr(COALESCE(w.extra_tasks, ''), '스팀') > 0),
+               SUM(instr(COALESCE(w.extra_tasks, ''), '수선') > 0),
+               SUM(instr(COALESCE(w.extra_tasks, ''), '세탁') > 0)
+          FROM work_orders w
+          LEFT JOIN inspection_results ir ON ir.id = w.inspection_id
+         WHERE w.created_at >= ? AND w.created_at < ?
+         GROUP BY 1, 2, 3, 4
+    """),
+}
+
+
+def rebuild_daily_rollup(cur, kind, lo="0", hi="9"):
+    """kind('inspection'|'work') 일별 집계를 [lo, hi) 날짜 구간만 다시 계산 (기본: 전체)"""
+    table, insert = _ROLLUP_SQL[kind]
+    cur.execute(f"DELETE FROM {table} WHERE day >= ? AND day < ?", (lo, hi))
+    cur.execute(insert, (lo, hi))
+
+
+def _mark_dirty(kind, col):
+    return (f"INSERT OR IGNORE INTO rollup_dirty(kind, day) "
+            f"SELECT '{kind}', substr({col}, 1, 10) WHERE {col} >= '0';")
+
+
+def m009_daily_rollups(cur):
+    """분석 화면용 일별 집계 (브랜드·도매처·상품 / 작업자) + 변경된 날짜 표시(rollup_dirty) 트리거"""
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS daily_inspection (
+          day         TEXT NOT NULL,
+          brand       TEXT NOT NULL,
+          vendor      TEXT NOT NULL,
+          product_id  INT  NOT NULL,
+          results     INT, normal_qty INT, defect_qty INT, pending_qty INT, total_qty INT,
+          PRIMARY KEY (day, brand, vendor, product_id)
+        ) WITHOUT ROWID
+    """)
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS daily_work (
+          day         TEXT NOT NULL,
+          worker_id   INT  NOT NULL,
+          brand       TEXT NOT NULL,
+          difficulty  TEXT NOT NULL,
+          orders      INT, repaired_qty INT, defect_qty INT, steam INT, repair INT, wash INT,
+          PRIMARY KEY (day, worker_id, brand, difficulty)
+        ) WITHOUT ROWID
+    """)
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS rollup_dirty (
+          kind TEXT NOT NULL,
+          day  TEXT NOT NULL,
+          PRIMARY KEY (kind, day)
+        ) WITHOUT ROWID
+    """)
+    triggers = {
+        "trg_ir_ai_rollup": ("AFTER INSERT ON inspection_results", _mark_dirty("inspection", "NEW.inspected_at")),
+        "trg_ir_au_rollup": ("AFTER UPDATE ON inspection_results",
+                             _mark_dirty("inspection", "OLD.inspected_at") + _mark_dirty("inspection", "NEW.inspected_at")),
+        "trg_ir_ad_rollup": ("AFTER DELETE ON inspection_results", _mark_dirty("inspection", "OLD.inspected_at")),
+        # 전표 브랜드가 바뀌면 그 전표의 작업 일자도 다시 계산
+        "trg_ir_au_brand_rollup": (
+            "AFTER UPDATE OF operator ON inspection_results WHEN OLD.operator IS NOT NEW.operator",
+            "INSERT OR IGNORE INTO rollup_dirty(kind, day) SELECT 'work', substr(created_at, 1, 10) "
+            "FROM work_orders WHERE inspection_id = NEW.id AND created_at >= '0';"),
+        "trg_wo_ai_rollup": ("AFTER INSERT ON work_orders", _mark_dirty("work", "NEW.created_at")),
+        "trg_wo_au_rollup": ("AFTER UPDATE ON work_orders",
+                             _mark_dirty("work", "OLD.created_at") + _mark_dirty("work", "NEW.created_at")),
+        "trg_wo_ad_rollup": ("AFTER DELETE ON work_orders", _mark_dirty("work", "OLD.created_at")),
+        # 상품의 도매처·브랜드 변경 → 그 상품 검수 일자 전체
+        "trg_products_au_rollup": (
+            "AFTER UPDATE OF vendor_id, operator_id ON products "
+            "WHEN OLD.vendor_id IS NOT NEW.vendor_id OR OLD.operator_id IS NOT NEW.operator_id",
+            "INSERT OR IGNORE INTO rollup_dirty(kind, day) SELECT 'inspection', substr(inspected_at, 1, 10) "
+            "FROM inspection_results WHERE product_id = NEW.id AND inspected_at >= '0';"),
+    }
+    for name, (event, body) in triggers.items():
+        cur.execute(f"CREATE TRIGGER IF NOT EXISTS {name} {event} BEGIN {body} END")
+    rebuild_daily_rollup(cur, "inspection")
+    rebuild_daily_rollup(cur, "work")
+
+
+def m010_image_hashes(cur):
+    """상품 이미지 pHash + BK-tree (중복 상품 감지 – duplicate_index.py)
+
+    image_hashes : product_images 행별 64비트 pHash (SQLite 정수 범위에 맞춰 부호 있는 값으로 저장)
+    phash_bk     : 서로 다른 해시 값 하나가 노드 1개. parent 와의 해밍 거리(dist)로 자식을 구분,
+                   루트는 parent IS NULL. 노드는 지우지 않음 (이미지가 없어진 노드는 조회 시 걸러짐)
+    """
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS image_hashes (
+          image_id INTEGER PRIMARY KEY,     -- product_images.id
+          hash     INTEGER                  -- 읽을 수 없는 이미지는 NULL (다시 시도하지 않음)
+        )
+    """)
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_image_hashes_hash ON image_hashes(hash)")
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS phash_bk (
+          hash   INTEGER PRIMARY KEY,
+          parent INTEGER,
+          dist   INTEGER
+        )
+    """)
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_phash_bk_child ON phash_bk(parent, dist)")
+    cur.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_product_images_ad_hash AFTER DELETE ON product_images
+        BEGIN DELETE FROM image_hashes WHERE image_id = old.id; END
+    """)
+
+
+def m011_main_image_refs(cur):
+    """products.main_image 의 저장소 이름 제거 – 참조 수 없이 저장소 파일을 가리키던 값
+
+    대표 이미지는 product_images.is_main 으로 정한다. 저장소 도입 전 파일명(legacy)은 그대로 둔다.
+    """
+    cur.execute("UPDATE products SET main_image = NULL WHERE main_image LIKE '__/__/%'")
+
+
+def m012_product_name_index(cur):
+    """일괄 등록: 새 바코드를 이름이 같은 기존 상품에 붙일 때 조회 (bulk_import._product_id)"""
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_products_name ON products(product_name)")
+
+
+MIGRATIONS = [
+    (1, "legacy columns", m001_legacy_columns),
+    (2, "lookup indexes", m002_lookup_indexes),
+    (3, "sargable timestamps", m003_sargable_timestamps),
+    (4, "product search fts5", m004_product_search),
+    (5, "product paging indexes", m005_product_paging),
+    (6, "image blob store", m006_image_blobs),
+    (7, "slip progress rollup", m007_slip_progress),
+    (8, "cold partition manifest", m008_cold_partitions),
+    (9, "daily analytics rollups", m009_daily_rollups),
+    (10, "image phash bk-tree", m010_image_hashes),
+    (11, "main image store refs", m011_main_image_refs),
+    (12, "product name index", m012_product_name_index),
+]
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+#  실행기
+# ══════════════════════════════════════════════════════════════════════════════
+def current_version(cur):
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS schema_version (
+          version    INTEGER PRIMARY KEY,
+          name       TEXT,
+          applied_at TEXT
+        )
+    """)
+    return cur.execute("SELECT COALESCE(MAX(version), 0) FROM schema_version").fetchone()[0]
+
+
+def run_migrations(con):
+    """미적용 마이그레이션을 단일 트랜잭션으로 적용하고 [(version, name), ...] 반환"""
+    cur = con.cursor()
+    cur.execute("BEGIN IMMEDIATE")
+    try:
+        version = current_version(cur)
+        applied = []
+        for ver, name, fn in MIGRATIONS:
+            if ver <= version:
+                continue
+            fn(cur)
+            cur.execute(
+                "INSERT INTO schema_version(version, name, applied_at) VALUES (?, ?, ?)",
+                (ver, name, datetime.now().strftime("%Y-%m-%d %H:%M:%S")),
+            )
+            applied.append((ver, name))
+        cur.execute("COMMIT")
+    except Exception:
+        cur.execute("ROLLBACK")
+        raise
+    return applied
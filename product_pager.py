@@ -0,0 +1,84 @@
+################################################################################
+# product_pager.py  –  상품 목록 keyset 페이지네이션 (created_at DESC, id DESC)
+################################################################################
+
+# filter_col 은 호출부에서 고정된 컬럼명(vendor_id / operator_id)만 넘길 것.
+def _filter(filter_col, filter_val):
+    if filter_col:
+        return [f"p.{filter_col} = ?"], [filter_val]
+    return [], []
+
+
+def count_products(cur, filter_col=None, filter_val=None):
+    """전체 행 수 (인덱스만 읽음 – 호출부에서 짧게 캐시해서 사용)"""
+    where, params = _filter(filter_col, filter_val)
+    wsql = "WHERE " + " AND ".join(where) if where else ""
+    return cur.execute(f"SELECT COUNT(*) FROM products p {wsql}", params).fetchone()[0]
+
+
+def page_anchor(cur, page_idx, per_page, filter_col=None, filter_val=None):
+    """page_idx(0부터) 페이지 첫 행의 (created_at, id) – 페이지 점프용, 커버링 인덱스 OFFSET 스캔"""
+    if page_idx <= 0:
+        return None
+    where, params = _filter(filter_col, filter_val)
+    wsql = "WHERE " + " AND ".join(where) if where else ""
+    row = cur.execute(
+        f"""
+        SELECT p.created_at, p.id
+          FROM products p
+          {wsql}
+         ORDER BY p.created_at DESC, p.id DESC
+         LIMIT 1 OFFSET ?
+        """,
+        params + [page_idx * per_page],
+    ).fetchone()
+    return tuple(row) if row else None
+
+
+def fetch_page(cur, anchor, per_page, filter_col=None, filter_val=None):
+    """anchor(포함)부터 per_page 행을 읽고 (rows, 다음 페이지 anchor) 반환
+
+    rows: [(id, product_name, options, barcodes, location, created_at), ...]
+    """
+    where, params = _filter(filter_col, filter_val)
+    if anchor:
+        where.append("(p.created_at, p.id) <= (?, ?)")
+        params += list(anchor)
+    wsql = "WHERE " + " AND ".join(where) if where else ""
+    rows = cur.execute(
+        f"""
+        SELECT p.id,
+               p.product_name,
+               IFNULL(s.options,'-')   AS option_text,
+               IFNULL(s.barcodes,'-')  AS barcode_text,
+               p.location,
+               p.created_at
+          FROM products p
+          LEFT JOIN product_search s ON s.rowid = p.id
+          {wsql}
+         ORDER BY p.created_at DESC, p.id DESC
+         LIMIT ?
+        """,
+        params + [per_page + 1],
+    ).fetchall()
+    next_anchor = (rows[per_page][5], rows[per_page][0]) if len(rows) > per_page else None
+    return rows[:per_page], next_anchor
+
+
+def main_images(cur, product_ids):
+    """상품별 대표 이미지 1장 {product_id: 경로} – 메인(is_main) 우선, 없으면 가장 먼저 올린 것"""
+    if not product_ids:
+        return {}
+    qmarks = ",".join("?" * len(product_ids))
+    out = {}
+    for pid, img in cur.execute(
+        f"""
+        SELECT product_id, COALESCE(image_path, file_name)
+          FROM product_images
+         WHERE product_id IN ({qmarks})
+         ORDER BY product_id, is_main DESC, id ASC
+        """,
+        list(product_ids),
+    ):
+        out.setdefault(pid, img)
+    return out
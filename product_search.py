@@ -0,0 +1,55 @@
+################################################################################
+# product_search.py  –  FTS5(product_search) 기반 상품 검색
+################################################################################
+
+# trigram 토크나이저는 3글자 미만 검색어를 MATCH 로 찾을 수 없음 → LIKE 로 대체
+MIN_MATCH_LEN = 3
+# 후보가 이 수를 넘는 흔한 검색어는 bm25 정렬 비용이 커서 최신순(rowid DESC)으로 대체
+RANK_CANDIDATES = 5000
+SEARCH_COLUMNS = ("pid", "product_name", "options", "barcodes", "location")
+
+
+def _match_query(keyword):
+    """검색어 전체를 하나의 구(phrase)로 – 따옴표·연산자 문자를 그대로 검색"""
+    return '"' + keyword.replace('"', '""') + '"'
+
+
+def search_products(cur, keyword, limit=30, filter_col=None, filter_val=None):
+    """검색어가 제품명/옵션/바코드/로케이션/ID 에 포함된 상품을 관련도 순으로 반환
+
+    반환: [(id, product_name, options, barcodes, location, created_at), ...]
+    filter_col 은 호출부에서 고정된 컬럼명(vendor_id / operator_id)만 넘길 것.
+    """
+    keyword = (keyword or "").strip()
+    if not keyword:
+        return []
+
+    where, params = [], []
+    order = "ps.rowid DESC"
+    if len(keyword) >= MIN_MATCH_LEN:
+        match = _match_query(keyword)
+        where.append("product_search MATCH ?")
+        params.append(match)
+        n_cand = cur.execute(
+            "SELECT COUNT(*) FROM (SELECT rowid FROM product_search WHERE product_search MATCH ? LIMIT ?)",
+            (match, RANK_CANDIDATES + 1),
+        ).fetchone()[0]
+        if n_cand <= RANK_CANDIDATES:
+            order = "ps.rank"
+    else:
+        like = f"%{keyword}%"
+        where.append("(" + " OR ".join(f"ps.{c} LIKE ?" for c in SEARCH_COLUMNS) + ")")
+        params += [like] * len(SEARCH_COLUMNS)
+    if filter_col:
+        where.append(f"p.{filter_col} = ?")
+        params.append(filter_val)
+
+    sql = f"""
+        SELECT p.id, p.product_name, ps.options, ps.barcodes, p.location, p.created_at
+          FROM product_search ps
+          JOIN products p ON p.id = ps.rowid
+         WHERE {" AND ".join(where)}
+         ORDER BY {order}
+         LIMIT ?
+    """
+    return cur.execute(sql, params + [limit]).fetchall()
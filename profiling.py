@@ -0,0 +1,228 @@
+################################################################################
+# profiling.py  –  페이지 rerun 단위 구간 시간 측정 (JSON-lines 트레이스 + 선택적 cProfile)
+#
+#   @profiling.page("inspector_result_list")
+#   def main():
+#       with profiling.span("load"):
+#           ...
+#
+#   st.stop() / st.rerun() 으로 끝난 rerun 도 기록한다 (outcome = stop / rerun).
+#   PAGE_CPROFILE=1 또는 관리자 화면에서 켜면 rerun 마다 logs/profiles/*.prof 저장
+#   (snakeviz · flameprof 등으로 flame graph 확인).
+################################################################################
+import cProfile
+import functools
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from logging.handlers import RotatingFileHandler
+
+TRACE_PATH = os.path.join(os.getcwd(), "logs", "page_trace.jsonl")
+TRACE_BYTES = 10 * 1024 * 1024
+TRACE_BACKUPS = 3
+PROFILE_DIR = os.path.join(os.getcwd(), "logs", "profiles")
+PROFILE_KEEP = 50                # 보관할 .prof 파일 수
+
+_enabled = os.environ.get("PAGE_TRACE", "1") not in ("", "0")
+_cprofile = os.environ.get("PAGE_CPROFILE", "") not in ("", "0")
+_profile_lock = threading.Lock()  # cProfile 은 프로세스에 하나만 활성화 가능
+_local = threading.local()
+_trace_logger = None
+
+
+def enabled():
+    return _enabled
+
+
+def enable(on=True):
+    global _enabled
+    _enabled = bool(on)
+
+
+def cprofile_enabled():
+    return _cprofile
+
+
+def enable_cprofile(on=True):
+    global _cprofile
+    _cprofile = bool(on)
+
+
+def _trace_log():
+    global _trace_logger
+    if _trace_logger is None:
+        os.makedirs(os.path.dirname(TRACE_PATH), exist_ok=True)
+        log = logging.getLogger("profiling.trace")
+        log.propagate = False
+        log.setLevel(logging.INFO)
+        handler = RotatingFileHandler(TRACE_PATH, maxBytes=TRACE_BYTES,
+                                      backupCount=TRACE_BACKUPS, encoding="utf-8")
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        log.addHandler(handler)
+        _trace_logger = log
+    return _trace_logger
+
+
+def _outcome(exc):
+    """rerun 종료 사유 – streamlit 제어 예외는 이름으로 구분 (streamlit import 없이)"""
+    if exc is None:
+        return "ok"
+    name = type(exc).__name__
+    if name == "StopException":
+        return "stop"
+    if name == "RerunException":
+        return "rerun"
+    return "error"
+
+
+def _write(record):
+    try:
+        _trace_log().info(json.dumps(record, ensure_ascii=False))
+    except OSError:
+        pass
+
+
+def _dump_profile(prof, page):
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    path = os.path.join(PROFILE_DIR, f"{page}-{datetime.now():%Y%m%d-%H%M%S-%f}.prof")
+    prof.dump_stats(path)
+    old = sorted(profiles(), key=os.path.getmtime)[:-PROFILE_KEEP]
+    for p in old:
+        try:
+            os.remove(p)
+        except OSError:
+            pass
+    return path
+
+
+def profiles():
+    """저장된 .prof 파일 경로 목록"""
+    if not os.path.isdir(PROFILE_DIR):
+        return []
+    return [os.path.join(PROFILE_DIR, f) for f in os.listdir(PROFILE_DIR) if f.endswith(".prof")]
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+#  측정
+# ══════════════════════════════════════════════════════════════════════════════
+@contextmanager
+def span(name):
+    """with span("load"): ... – 현재 페이지 rerun 의 구간으로 기록 (중첩 가능)
+
+    페이지 밖(데코레이터 없는 스크립트)에서 쓰면 구간 하나짜리 레코드로 바로 기록한다.
+    이때 이름은 "페이지.구간" 형식 – 앞부분이 페이지 이름이 된다.
+    """
+    if not _enabled:
+        yield
+        return
+    trace = getattr(_local, "trace", None)
+    t0 = time.perf_counter()
+    if trace is None:
+        exc = None
+        try:
+            yield
+        except BaseException as e:
+            exc = e
+            raise
+        finally:
+            ms = (time.perf_counter() - t0) * 1000
+            _write({"ts": datetime.now().strftime("%Y-%m-%d %H:%M:%S"), "kind": "span",
+                    "page": name.split(".", 1)[0], "outcome": _outcome(exc), "total_ms": round(ms, 3),
+                    "spans": [{"name": name, "ms": round(ms, 3), "start_ms": 0.0, "depth": 0}]})
+        return
+    entry = {"name": name, "ms": None, "start_ms": round((t0 - trace["t0"]) * 1000, 3),
+             "depth": trace["depth"]}
+    trace["spans"].append(entry)
+    trace["depth"] += 1
+    try:
+        yield
+    finally:
+        trace["depth"] -= 1
+        entry["ms"] = round((time.perf_counter() - t0) * 1000, 3)
+
+
+def page(name):
+    """페이지 main() 데코레이터 – rerun 1회 = 트레이스 1줄"""
+    def deco(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _enabled or getattr(_local, "trace", None) is not None:
+                return fn(*args, **kwargs)
+            trace = _local.trace = {"t0": time.perf_counter(), "spans": [], "depth": 0}
+            prof = None
+            if _cprofile and _profile_lock.acquire(blocking=False):
+                prof = cProfile.Profile()
+                try:
+                    prof.enable()
+                except ValueError:            # 다른 프로파일러가 이미 활성화
+                    prof = None
+                    _profile_lock.release()
+            exc = None
+            try:
+                return fn(*args, **kwargs)
+            except BaseException as e:
+                exc = e
+                raise
+            finally:
+                total = (time.perf_counter() - trace["t0"]) * 1000
+                _local.trace = None
+                dump = None
+                if prof is not None:
+                    prof.disable()
+                    _profile_lock.release()
+                    try:
+                        dump = _dump_profile(prof, name)
+                    except OSError:
+                        pass
+                _write({"ts": datetime.now().strftime("%Y-%m-%d %H:%M:%S"), "kind": "page",
+                        "page": name, "outcome": _outcome(exc), "total_ms": round(total, 3),
+                        "spans": [s for s in trace["spans"] if s["ms"] is not None], "profile": dump})
+        return wrapper
+    return deco
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+#  조회 / 요약 (관리자 화면)
+# ══════════════════════════════════════════════════════════════════════════════
+def read_trace(limit=5000):
+    """최근 트레이스 레코드 (오래된 것 → 최신)"""
+    if not os.path.exists(TRACE_PATH):
+        return []
+    with open(TRACE_PATH, encoding="utf-8") as f:
+        lines = f.readlines()[-limit:]
+    out = []
+    for line in lines:
+        try:
+            out.append(json.loads(line))
+        except ValueError:
+            continue
+    return out
+
+
+def _pct(sorted_ms, p):
+    k = max(0, min(len(sorted_ms) - 1, int(round(p / 100 * len(sorted_ms) + 0.5)) - 1))
+    return sorted_ms[k]
+
+
+def _stats(values):
+    v = sorted(values)
+    return {"n": len(v), "p50_ms": _pct(v, 50), "p95_ms": _pct(v, 95), "max_ms": v[-1],
+            "total_ms": sum(v)}
+
+
+def summarize(records):
+    """(페이지별 rerun 통계, (페이지, 구간)별 통계) – 각각 p95 내림차순 리스트"""
+    pages, phases = {}, {}
+    for r in records:
+        if r.get("kind") == "page":
+            pages.setdefault(r["page"], []).append(r["total_ms"])
+        for s in r.get("spans", ()):
+            phases.setdefault((r["page"], s["name"]), []).append(s["ms"])
+    page_rows = [dict(_stats(v), page=k) for k, v in pages.items()]
+    phase_rows = [dict(_stats(v), page=k[0], span=k[1]) for k, v in phases.items()]
+    key = lambda r: r["p95_ms"]
+    return sorted(page_rows, key=key, reverse=True), sorted(phase_rows, key=key, reverse=True)
@@ -0,0 +1,189 @@
+################################################################################
+# retention.py  –  보관 기간 지난 행 압축 보관(.jsonl.gz) 후 배치 삭제 (백그라운드 스케줄러)
+#
+#   python retention.py             # 지금 1회 실행
+#   python retention.py --dry-run   # 대상 건수만 출력
+################################################################################
+import gzip
+import json
+import logging
+import os
+import sys
+import threading
+from datetime import datetime, timedelta
+from common import get_connection, transaction, day_range, log_activity, flush_activity_log, init_db
+import cold_storage
+import image_store
+
+ARCHIVE_DIR = os.path.join(os.getcwd(), "archive")
+RETENTION_CONFIG = "retention.json"      # 있으면 아래 기본 정책을 테이블별로 덮어씀
+RUN_INTERVAL = 6 * 60 * 60               # 스케줄러 실행 주기(초)
+FIRST_RUN_DELAY = 5 * 60                 # 앱 시작 직후 부하를 피해서 첫 실행
+BATCH_SIZE = 500                         # 트랜잭션 1개(쓰기 잠금 1회)당 보관·삭제 행 수
+BATCH_PAUSE = 0.2                        # 배치 사이 대기(초) – 화면 쪽 쓰기가 끼어들 수 있게
+
+# 테이블별 정책: 시각 컬럼, 보관 일수(이보다 오래된 행이 대상), 삭제 전 압축 보관 여부
+POLICIES = {
+    "work_orders":        {"column": "created_at",   "keep_days": 3 * 365, "archive": True},   # 급여 정산 이력
+    "inspection_results": {"column": "inspected_at", "keep_days": 3 * 365, "archive": True},
+    "activity_log":       {"column": "created_at",   "keep_days": 365,     "archive": True},
+}
+
+logger = logging.getLogger(__name__)
+
+_started = False
+_start_lock = threading.Lock()
+_stop = threading.Event()
+_last_report = None
+
+
+def load_policies(path=RETENTION_CONFIG):
+    """기본 정책 + retention.json 의 테이블별 덮어쓰기 ({"activity_log": {"keep_days": 180}, ...})"""
+    policies = {t: dict(p) for t, p in POLICIES.items()}
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            for table, override in json.load(f).items():
+                if table in policies:
+                    policies[table].update(override)
+                else:
+                    logger.warning("retention.json: 알 수 없는 테이블 %s 무시", table)
+    return policies
+
+
+def cutoff_for(policy, now=None):
+    """이 값보다 작은 시각 문자열이 삭제 대상 (보관 일수 전 날짜 00:00)"""
+    lo, _ = day_range((now or datetime.now()) - timedelta(days=policy["keep_days"]))
+    return lo
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+#  보관 + 삭제
+# ══════════════════════════════════════════════════════════════════════════════
+def _archive_path(table, stamp):
+    d = os.path.join(ARCHIVE_DIR, table)
+    os.makedirs(d, exist_ok=True)
+    return os.path.join(d, f"{table}_{stamp}.jsonl.gz")
+
+
+def purge_table(table, policy, now=None, dry_run=False):
+    """한 테이블의 만료 행을 BATCH_SIZE 씩 보관 → 삭제. 반환: (처리 건수, 보관 파일 경로 또는 None)"""
+    col = policy["column"]
+    cutoff = cutoff_for(policy, now)
+    select = f"SELECT rowid, * FROM {table} WHERE {col} < ? ORDER BY rowid LIMIT ?"
+    if dry_run:
+        n = get_connection().execute(f"SELECT COUNT(*) FROM {table} WHERE {col} < ?", (cutoff,)).fetchone()[0]
+        return n, None
+
+    path, out, total = None, None, 0
+    try:
+        while not _stop.is_set():
+            # 조회·보관·삭제를 한 트랜잭션에서 → 여러 프로세스가 같은 행을 이중 보관하지 않음
+            with transaction() as cur:
+                rows = cur.execute(select, (cutoff, BATCH_SIZE)).fetchall()
+                if not rows:
+                    break
+                if policy.get("archive", True):
+                    if out is None:
+                        path = _archive_path(table, datetime.now().strftime("%Y%m%d_%H%M%S"))
+                        out = gzip.open(path, "ab")
+                    names = [d[0] for d in cur.description][1:]
+                    out.write("".join(
+                        json.dumps(dict(zip(names, r[1:])), ensure_ascii=False) + "\n" for r in rows
+                    ).encode("utf-8"))
+                    out.flush()
+                    os.fsync(out.fileno())                     # 삭제 커밋 전에 디스크에 남김
+                cur.executemany(f"DELETE FROM {table} WHERE rowid=?", [(r[0],) for r in rows])
+            total += len(rows)
+            if len(rows) < BATCH_SIZE:
+                break
+            _stop.wait(BATCH_PAUSE)
+    finally:
+        if out is not None:
+            out.close()
+    return total, path
+
+
+def run_once(now=None, dry_run=False):
+    """모든 정책 1회 실행 → {테이블: {"cutoff", "rows", "archive"}}"""
+    global _last_report
+    report = {}
+    for table, policy in load_policies().items():
+        try:
+            rows, path = purge_table(table, policy, now, dry_run)
+        except Exception:
+            logger.exception("retention: %s 정리 실패", table)
+            rows, path = None, None
+        report[table] = {"cutoff": cutoff_for(policy, now), "rows": rows, "archive": path}
+    if not dry_run:
+        _last_report = (datetime.now().strftime("%Y-%m-%d %H:%M:%S"), report)
+        if any(r["rows"] for r in report.values()):
+            log_activity(
+                user_id=None,
+                action_type="RETENTION",
+                table_name=",".join(report),
+                record_id=None,
+                old_data="{}",
+                new_data=json.dumps(report, ensure_ascii=False),
+            )
+    return report
+
+
+def last_run():
+    """(실행 시각, 보고서) – 아직 실행 전이면 None"""
+    return _last_report
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+#  스케줄러
+# ══════════════════════════════════════════════════════════════════════════════
+def _tier_cold():
+    """마감된 달을 먼저 Parquet 콜드 보관으로 이동 (pandas/pyarrow 가 있을 때만)"""
+    if not cold_storage.available():
+        return
+    try:
+        import analytics                       # 원본이 빠지기 전에 밀린 일별 집계부터 반영
+        analytics.refresh()
+    except Exception:
+        logger.exception("retention: 일별 집계 갱신 실패")
+    try:
+        cold_storage.tier_closed_months()
+    except Exception:
+        logger.exception("retention: 콜드 보관 이동 실패")
+
+
+def _loop():
+    if _stop.wait(FIRST_RUN_DELAY):
+        return
+    while True:
+        _tier_cold()
+        run_once()
+        try:
+            image_store.sweep_orphans()
+        except Exception:
+            logger.exception("retention: 고아 이미지 파일 정리 실패")
+        if _stop.wait(RUN_INTERVAL):
+            return
+
+
+def start_scheduler():
+    """백그라운드 정리 스레드 시작 (프로세스당 1회, 중복 호출 무시)"""
+    global _started
+    with _start_lock:
+        if _started:
+            return False
+        threading.Thread(target=_loop, name="retention", daemon=True).start()
+        _started = True
+        return True
+
+
+def stop_scheduler():
+    """진행 중 배치를 마친 뒤 멈춤"""
+    _stop.set()
+
+
+if __name__ == "__main__":
+    init_db()
+    dry = "--dry-run" in sys.argv
+    for table, r in run_once(dry_run=dry).items():
+        print(f"{table}: {r['rows']} rows < {r['cutoff']}" + (f" → {r['archive']}" if r["archive"] else ""))
+    flush_activity_log()
@@ -0,0 +1,265 @@
+################################################################################
+# scanner_api.py  –  핸드헬드 스캐너·라벨 프린터용 JSON HTTP API (asyncio, 표준 라이브러리만)
+#
+#   python scanner_api.py [--host 127.0.0.1] [--port 8765] [--workers 8]
+#
+#   GET  /health
+#   GET  /slips/<barcode>                       오늘 전표 + 진행 현황
+#   POST /work         {"barcode" | "inspection_id", "worker_id", "repaired_qty",
+#                       "defect_qty", "difficulty", "extras": [...]}
+#   POST /inspections  {"product_id" | "product": {...}, "skus": [{...}, ...]}
+#   GET  /products/search?q=...&limit=30
+#
+#   SCANNER_API_TOKEN 을 설정하면 Authorization: Bearer <토큰> 헤더 필수.
+#   토큰 없이는 루프백 주소에만 바인드한다 (LAN 에 열려면 토큰 필수).
+#   DB 작업은 스레드 풀에서 실행 (스레드마다 풀 커넥션 1개), 이벤트 루프는 소켓 I/O 만 담당.
+################################################################################
+import argparse
+import asyncio
+import hmac
+import ipaddress
+import json
+import logging
+import os
+import sqlite3
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit, parse_qs, unquote
+
+import common
+import services
+import slip_cache
+from services import ServiceError
+
+MAX_BODY = 1024 * 1024
+HEADER_TIMEOUT = 30          # 초 – keep-alive 유휴 연결 정리
+TOKEN = os.environ.get("SCANNER_API_TOKEN", "")
+
+logger = logging.getLogger(__name__)
+
+_REASONS = {200: "OK", 201: "Created", 400: "Bad Request", 401: "Unauthorized", 403: "Forbidden",
+            404: "Not Found", 405: "Method Not Allowed", 409: "Conflict", 413: "Payload Too Large",
+            500: "Internal Server Error", 503: "Service Unavailable"}
+
+
+class HttpError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+#  핸들러 (스레드 풀에서 실행 – 동기 코드)
+# ══════════════════════════════════════════════════════════════════════════════
+def _int(body, key, default=None):
+    v = body.get(key, default)
+    try:
+        return int(v)
+    except (TypeError, ValueError):
+        raise ServiceError(f"{key} 는 정수여야 합니다.")
+
+
+def _typed(body, key, kind, label):
+    """선택 필드 타입 검사 – 없거나 null 이면 None, 타입이 다르면 ServiceError(400)"""
+    v = body.get(key)
+    if v is not None and not isinstance(v, kind):
+        raise ServiceError(f"{key} 는 {label} 형식이어야 합니다.")
+    return v
+
+
+def get_slip(barcode):
+    return 200, services.slip_status(barcode)
+
+
+def post_work(body):
+    worker_id = _int(body, "worker_id")
+    if services.user_role(worker_id) != "worker":
+        raise ServiceError("작업자 계정이 아닙니다.", status=403)
+    if "inspection_id" in body:
+        inspection_id = _int(body, "inspection_id")
+    else:
+        slip = services.find_today_slip(str(body.get("barcode", "")))
+        if slip is None:
+            raise ServiceError("오늘 전표를 찾을 수 없습니다.", status=404)
+        inspection_id = slip[0]
+    work_id = services.record_work(
+        inspection_id, worker_id,
+        _int(body, "repaired_qty", 1), _int(body, "defect_qty", 0),
+        body.get("difficulty", services.DIFFICULTIES[0]), tuple(_typed(body, "extras", list, "목록") or ()),
+    )
+    prog = services.slip_progress(inspection_id)
+    return 201, {"work_id": work_id, "inspection_id": inspection_id,
+                 "done": prog["done"], "defect": prog["defect"]}
+
+
+def post_inspection(body):
+    rows = _typed(body, "skus", list, "목록") or ()
+    if not all(isinstance(s, dict) for s in rows):
+        raise ServiceError("skus 의 각 항목은 객체여야 합니다.")
+    product = _typed(body, "product", dict, "객체")
+    skus = [(s.get("color", ""), s.get("size", ""), str(s.get("barcode") or ""),
+             _int(s, "normal_qty", 0), _int(s, "defect_qty", 0), _int(s, "pending_qty", 0),
+             s.get("comment", "")) for s in rows]
+    if not skus:
+        raise ServiceError("skus 가 비어 있습니다.")
+    pid = _int(body, "product_id") if body.get("product_id") else None
+    product_id, inserted = services.record_inspection(pid, skus, product)
+    return 201, {"product_id": product_id, "inserted": inserted}
+
+
+def search(query):
+    q = (query.get("q") or [""])[0]
+    limit = min(100, _int({"limit": (query.get("limit") or ["30"])[0]}, "limit"))
+    rows = services.search_products(q, limit=limit)
+    return 200, {"items": [{"product_id": r[0], "product_name": r[1], "options": r[2],
+                            "barcodes": (r[3] or "").split(",") if r[3] else [],
+                            "location": r[4], "created_at": r[5]} for r in rows]}
+
+
+def route(method, path, query, body):
+    """(상태코드, JSON 객체) – 알 수 없는 경로는 HttpError"""
+    parts = [unquote(p) for p in path.strip("/").split("/") if p]
+    if parts == ["health"]:
+        return 200, {"ok": True, "slip_cache": slip_cache.stats()}
+    if len(parts) == 2 and parts[0] == "slips":
+        if method != "GET":
+            raise HttpError(405, "GET 만 지원합니다.")
+        return get_slip(parts[1])
+    if parts == ["work"]:
+        if method != "POST":
+            raise HttpError(405, "POST 만 지원합니다.")
+        return post_work(body)
+    if parts == ["inspections"]:
+        if method != "POST":
+            raise HttpError(405, "POST 만 지원합니다.")
+        return post_inspection(body)
+    if parts == ["products", "search"]:
+        return search(query)
+    raise HttpError(404, "알 수 없는 경로입니다.")
+
+
+def _handle(method, target, raw):
+    url = urlsplit(target)
+    try:
+        body = json.loads(raw) if raw else {}
+    except ValueError:
+        return 400, {"error": "JSON 본문을 읽을 수 없습니다."}
+    if not isinstance(body, dict):
+        return 400, {"error": "JSON 객체여야 합니다."}
+    try:
+        return route(method, url.path, parse_qs(url.query), body)
+    except (ServiceError, HttpError) as e:
+        return e.status, {"error": str(e)}
+    except sqlite3.OperationalError as e:               # 쓰기 잠금 대기 초과 등 – 재시도 가능
+        logger.warning("DB 사용 중: %s %s (%s)", method, target, e)
+        return 503, {"error": "DB 가 사용 중입니다. 잠시 후 다시 시도하세요."}
+    except Exception:
+        logger.exception("처리 실패: %s %s", method, target)
+        return 500, {"error": "서버 오류"}
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+#  HTTP/1.1 (keep-alive) 서버
+# ══════════════════════════════════════════════════════════════════════════════
+def _response(status, obj, keep_alive):
+    payload = json.dumps(obj, ensure_ascii=False).encode("utf-8")
+    head = (f"HTTP/1.1 {status} {_REASONS.get(status, '')}\r\n"
+            f"Content-Type: application/json; charset=utf-8\r\n"
+            f"Content-Length: {len(payload)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+    return head.encode("latin-1") + payload
+
+
+def _is_loopback(host):
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+def _authorized(headers):
+    if not TOKEN:
+        return True
+    return hmac.compare_digest(headers.get("authorization", "").encode("latin-1"),
+                               f"Bearer {TOKEN}".encode("utf-8"))
+
+
+async def _client(reader, writer, executor):
+    loop = asyncio.get_running_loop()
+    try:
+        while True:
+            try:
+                line = await asyncio.wait_for(reader.readline(), HEADER_TIMEOUT)
+            except asyncio.TimeoutError:
+                return
+            if not line:
+                return
+            try:
+                method, target, version = line.decode("latin-1").split()
+            except ValueError:
+                writer.write(_response(400, {"error": "잘못된 요청"}, False))
+                return
+            headers = {}
+            while True:
+                h = await reader.readline()
+                if h in (b"\r\n", b"\n", b""):
+                    break
+                k, _, v = h.decode("latin-1").partition(":")
+                headers[k.strip().lower()] = v.strip()
+            keep_alive = (headers.get("connection", "").lower() != "close"
+                          and version.upper() == "HTTP/1.1")
+            try:
+                length = int(headers.get("content-length") or 0)
+            except ValueError:
+                length = -1
+            if not 0 <= length <= MAX_BODY:
+                writer.write(_response(413 if length > 0 else 400, {"error": "Content-Length 가 잘못되었거나 너무 큽니다."}, False))
+                return
+            raw = await reader.readexactly(length) if length else b""
+
+            if not _authorized(headers):
+                status, obj = 401, {"error": "인증 토큰이 필요합니다."}
+            else:
+                status, obj = await loop.run_in_executor(executor, _handle, method.upper(), target, raw)
+            writer.write(_response(status, obj, keep_alive))
+            await writer.drain()
+            if not keep_alive:
+                return
+    except (ConnectionError, asyncio.IncompleteReadError):
+        pass
+    finally:
+        writer.close()
+
+
+async def serve(host, port, workers):
+    executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="scanner-api")
+    server = await asyncio.start_server(lambda r, w: _client(r, w, executor), host, port)
+    logger.info("scanner API listening on %s:%d (workers=%d)", host, port, workers)
+    async with server:
+        await server.serve_forever()
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="스캐너용 JSON HTTP API")
+    ap.add_argument("--host", default="127.0.0.1", help="LAN 에 열려면 SCANNER_API_TOKEN 필요")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--workers", type=int, default=common.POOL_SIZE, help="DB 작업 스레드 수")
+    args = ap.parse_args(argv)
+    if not TOKEN and not _is_loopback(args.host):
+        ap.error(f"SCANNER_API_TOKEN 없이 {args.host} 에 바인드할 수 없습니다 (루프백만 허용).")
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    common.init_db()
+    slip_cache.warm()
+    slip_cache.start_refresher()
+    try:
+        asyncio.run(serve(args.host, args.port, args.workers))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
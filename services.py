@@ -0,0 +1,242 @@
+################################################################################
+# services.py  –  화면·스캐너 API 공용 데이터 작업 (Streamlit 의존 없음)
+#
+#   전표 조회 / 작업 기록 / 검수 기록 / 상품 검색.
+#   호출한 스레드의 풀 커넥션을 쓰므로 어느 스레드에서나 호출 가능.
+################################################################################
+from datetime import datetime
+from common import get_connection, transaction, now_str, day_range
+from product_search import search_products as _search_products
+from slip_progress import slip_totals, slip_workers
+from image_store import store_image
+import slip_cache
+
+DIFFICULTIES = ("양품화1", "양품화2", "프리미엄양품화1")
+EXTRA_TASKS = ("스팀", "수선", "세탁")
+SLIP_FIELDS = ("inspection_id", "product_id", "product_name", "brand", "location",
+               "total_qty", "status", "inspected_at")
+
+
+class ServiceError(ValueError):
+    """입력 검증 실패 – 화면은 메시지를 그대로 표시, API 는 4xx 로 응답"""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+#  전표 / 작업
+# ══════════════════════════════════════════════════════════════════════════════
+def find_today_slip(barcode):
+    """바코드 → 오늘 최신 전표 튜플 (SLIP_FIELDS 순서, 없으면 None)"""
+    return slip_cache.lookup(get_connection().cursor(), barcode)
+
+
+def slip_progress(inspection_id):
+    """전표 누적 작업량 {'done', 'defect', 'workers': [(worker_id, 정상, 추가불량), ...]}"""
+    cur = get_connection().cursor()
+    done, defect = slip_totals(cur, inspection_id)
+    return {"done": done, "defect": defect, "workers": slip_workers(cur, inspection_id)}
+
+
+def slip_status(barcode):
+    """스캐너용 – 오늘 전표 + 진행 현황 dict (없으면 ServiceError 404)"""
+    slip = find_today_slip(barcode)
+    if slip is None:
+        raise ServiceError("오늘 전표를 찾을 수 없습니다.", status=404)
+    info = dict(zip(SLIP_FIELDS, slip))
+    prog = slip_progress(slip[0])
+    info.update(done=prog["done"], defect=prog["defect"],
+                remaining=slip[5] - prog["done"] - prog["defect"],
+                workers=[{"worker_id": w, "repaired_qty": n or 0, "defect_qty": d or 0}
+                         for w, n, d in prog["workers"]])
+    return info
+
+
+def record_work(inspection_id, worker_id, repaired_qty, defect_qty=0,
+                difficulty=DIFFICULTIES[0], extras=()):
+    """작업 기록 1건 저장 → work_orders.id
+
+    남은 수량 검사는 쓰기 트랜잭션(BEGIN IMMEDIATE) 안에서 하므로
+    여러 단말이 같은 전표를 동시에 스캔해도 검수 수량을 넘지 않는다.
+    """
+    repaired_qty, defect_qty = int(repaired_qty), int(defect_qty)
+    if repaired_qty < 0 or defect_qty < 0:
+        raise ServiceError("수량은 0 이상이어야 합니다.")
+    if repaired_qty == 0 and defect_qty == 0:
+        raise ServiceError("정상·추가 불량 수량이 모두 0입니다. 최소 1 이상 입력해 주세요.")
+    if difficulty not in DIFFICULTIES:
+        raise ServiceError(f"알 수 없는 작업 난이도: {difficulty}")
+    bad = [e for e in extras if e not in EXTRA_TASKS]
+    if bad:
+        raise ServiceError(f"알 수 없는 추가 작업: {', '.join(bad)}")
+
+    with transaction() as tx:
+        row = tx.execute("SELECT total_qty FROM inspection_results WHERE id=?", (inspection_id,)).fetchone()
+        if row is None:
+            raise ServiceError("전표가 없습니다.", status=404)
+        done, defect = slip_totals(tx, inspection_id)
+        if repaired_qty + defect_qty + done + defect > (row[0] or 0):
+            raise ServiceError("합계가 검수 수량을 초과합니다!", status=409)
+        tx.execute(
+            """
+            INSERT INTO work_orders
+                (inspection_id, worker_id, additional_defect_qty, repaired_qty,
+                 repaired_approved, difficulty, extra_tasks, created_at)
+            VALUES (?,?,?,?,0,?,?,?)
+            """,
+            (inspection_id, worker_id, defect_qty, repaired_qty, difficulty, ",".join(extras), now_str()),
+        )
+        return tx.lastrowid
+
+
+def record_work_batch(worker_id, tally, difficulty=DIFFICULTIES[0], extras=()):
+    """연속 스캔 묶음 저장 – 트랜잭션 1번 + executemany 1번 → 저장한 작업 기록 수
+
+    tally : {inspection_id: (정상, 추가불량)}
+    전표 하나라도 검수 수량을 넘으면 전체를 저장하지 않는다 (ServiceError 409).
+    """
+    if difficulty not in DIFFICULTIES:
+        raise ServiceError(f"알 수 없는 작업 난이도: {difficulty}")
+    bad = [e for e in extras if e not in EXTRA_TASKS]
+    if bad:
+        raise ServiceError(f"알 수 없는 추가 작업: {', '.join(bad)}")
+    items = [(int(sid), int(n), int(d)) for sid, (n, d) in tally.items() if n or d]
+    if any(n < 0 or d < 0 for _sid, n, d in items):
+        raise ServiceError("수량은 0 이상이어야 합니다.")
+    if not items:
+        return 0
+
+    ids = [sid for sid, _n, _d in items]
+    qmarks = ",".join("?" * len(ids))
+    with transaction() as tx:
+        left = {r[0]: (r[1] or 0) - r[2] - r[3] for r in tx.execute(
+            f"SELECT ir.id, ir.total_qty, COALESCE(sp.repaired_qty, 0), COALESCE(sp.defect_qty, 0) "
+            f"  FROM inspection_results ir LEFT JOIN slip_progress sp ON sp.inspection_id = ir.id "
+            f" WHERE ir.id IN ({qmarks})", ids)}
+        missing = [sid for sid in ids if sid not in left]
+        if missing:
+            raise ServiceError(f"전표가 없습니다: {', '.join(map(str, missing))}", status=404)
+        over = [sid for sid, n, d in items if n + d > left[sid]]
+        if over:
+            raise ServiceError(f"검수 수량 초과 전표: {', '.join(map(str, over))}", status=409)
+        ts, extra = now_str(), ",".join(extras)
+        tx.executemany(
+            """
+            INSERT INTO work_orders
+                (inspection_id, worker_id, additional_defect_qty, repaired_qty,
+                 repaired_approved, difficulty, extra_tasks, created_at)
+            VALUES (?,?,?,?,0,?,?,?)
+            """,
+            [(sid, worker_id, d, n, difficulty, extra, ts) for sid, n, d in items],
+        )
+    return len(items)
+
+
+def today_work_log(limit=20):
+    """오늘 작업 기록 최신순 [(전표, 작업자명, 정상, 추가불량, 난이도, 추가작업, 시간), ...]"""
+    return get_connection().execute(
+        """
+        SELECT w.inspection_id, u.username, w.repaired_qty, w.additional_defect_qty,
+               w.difficulty, w.extra_tasks, w.created_at
+          FROM work_orders w
+          JOIN users u ON w.worker_id = u.id
+         WHERE w.created_at >= ? AND w.created_at < ?
+         ORDER BY w.created_at DESC
+         LIMIT ?
+        """,
+        (*day_range(datetime.now()), limit),
+    ).fetchall()
+
+
+def user_role(user_id):
+    row = get_connection().execute("SELECT role FROM users WHERE id=?", (user_id,)).fetchone()
+    return row[0] if row else None
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+#  상품 / 검수
+# ══════════════════════════════════════════════════════════════════════════════
+def search_products(keyword, limit=30):
+    """[(id, product_name, options, barcodes, location, created_at), ...] (관련도 순)"""
+    return _search_products(get_connection().cursor(), keyword, limit=limit)
+
+
+def product_info(product_id):
+    """(product_name, vendor_id, operator_id, location) 또는 None"""
+    return get_connection().execute(
+        "SELECT product_name, vendor_id, operator_id, location FROM products WHERE id=?", (product_id,)
+    ).fetchone()
+
+
+def product_skus(product_id):
+    """[(color, size, barcode), ...] – 바코드별 1행"""
+    return get_connection().execute(
+        "SELECT color, size, barcode FROM skus WHERE product_id=? GROUP BY barcode", (product_id,)
+    ).fetchall()
+
+
+def record_inspection(product_id, skus, product=None, images=(), similarity_pct=None):
+    """검수 기록 저장 → (product_id, 기록한 검수 건수)
+
+    product_id : 기존 상품 id, 신규면 None 이고 product 에
+                 {'product_name', 'vendor', 'operator', 'location'} 를 넘긴다
+    skus       : [(color, size, barcode, 정상, 불량, 보류, comment), ...] – 바코드 없는 행은 무시
+    images     : image_ingest.ingest() 결과 중 오류 없는 항목
+    similarity_pct : 사진 검색으로 상품을 찾은 경우 최고 유사도 (텍스트 검색이면 None)
+    """
+    product = product or {}
+    if not product_id and not (product.get("product_name") or "").strip():
+        raise ServiceError("제품명을 입력하세요")
+    for c, s, bc, n, d, p, cm in skus:
+        if min(int(n), int(d), int(p)) < 0:
+            raise ServiceError(f"수량은 0 이상이어야 합니다. (바코드 {bc})")
+
+    with transaction() as tx:
+        if not product_id:
+            tx.execute(
+                "INSERT INTO products(product_name,vendor_id,operator_id,location,created_at) "
+                "VALUES(?,?,?,?,?)",
+                (product["product_name"], product.get("vendor"), product.get("operator"),
+                 product.get("location"), now_str()),
+            )
+            product_id = tx.lastrowid
+            vendor, oper = product.get("vendor"), product.get("operator")
+        else:
+            row = tx.execute("SELECT vendor_id, operator_id FROM products WHERE id=?", (product_id,)).fetchone()
+            if row is None:
+                raise ServiceError("상품이 없습니다.", status=404)
+            vendor, oper = product.get("vendor", row[0]), product.get("operator", row[1])
+
+        inserted = 0
+        for c, s, bc, n, d, p, cm in skus:
+            if not bc:
+                continue
+            tx.execute(
+                "INSERT OR IGNORE INTO skus(product_id,barcode,vendor,status,created_at,color,size) "
+                "VALUES(?,?,?,?,?,?,?)",
+                (product_id, bc, vendor, "정상", now_str(), c, s),
+            )
+            total = int(n) + int(d) + int(p)
+            if total:
+                status = "보류" if p else "불량" if d else "정상"
+                tx.execute(
+                    "INSERT INTO inspection_results("
+                    "image_name,product_id,barcode,operator,similarity_pct,"
+                    "normal_qty,defect_qty,pending_qty,total_qty,comment,inspected_at,status) "
+                    "VALUES(?,?,?,?,?,?,?,?,?,?,?,?)",
+                    ("", product_id, bc, oper, similarity_pct, int(n), int(d), int(p), total, cm, now_str(), status),
+                )
+                inserted += 1
+
+        # 이미지 저장 (내용 해시 저장소)
+        for img in images:
+            fname = store_image(tx, img["data"], img["filename"])
+            tx.execute(
+                "INSERT INTO product_images(product_id,image_path,is_main,uploaded_at) VALUES(?,?,0,?)",
+                (product_id, fname, now_str()),
+            )
+
+    slip_cache.invalidate(barcodes=[r[2] for r in skus if r[2]])
+    return product_id, inserted
@@ -0,0 +1,168 @@
+################################################################################
+# slip_cache.py  –  바코드 → 오늘 전표 캐시 (작업자 스캔용, 프로세스 공유)
+#
+#   inspection_results / products 를 쓰는 곳은 커밋 후 invalidate(...) 호출.
+#   날짜가 바뀌면 전체를 비우고 새로 채운다.
+#   다른 프로세스(스캐너 API, 다른 Streamlit 서버, CLI)의 변경은 백그라운드 갱신 스레드
+#   (start_refresher) 가 PRAGMA data_version 으로 감지해 새 전표만 이어 읽고,
+#   수정·삭제는 REWARM_SEC 마다 전체를 다시 채워 반영한다. lookup 은 dict 조회 + 미스 시 인덱스 조회 1번.
+################################################################################
+import logging
+import threading
+import time
+from datetime import datetime
+from common import get_connection, day_range
+
+# 작업자 화면 latest_result 튜플과 같은 컬럼 순서
+_SLIP_SELECT = """
+    SELECT ir.id, ir.product_id, p.product_name, p.operator_id, p.location,
+           ir.total_qty, ir.status, ir.inspected_at, ir.barcode
+      FROM inspection_results ir
+      JOIN products p ON ir.product_id = p.id
+"""
+
+logger = logging.getLogger(__name__)
+
+REFRESH_SEC = 1      # 백그라운드: 다른 커넥션 커밋 감지 주기
+REWARM_SEC = 10      # 백그라운드: 변경이 있으면 최소 이 간격으로 전체 재적재 (수정·삭제 반영)
+
+_lock = threading.Lock()
+_slips = {}          # {barcode: 전표 튜플 또는 None(오늘 전표 없음 – 갱신 스레드가 돌 때만 저장)}
+_day = None          # 캐시가 담고 있는 날짜 (day_range 하한)
+_max_id = 0          # 캐시에 반영한 마지막 inspection_results.id
+_gen = 0             # 무효화 세대 – 조회 도중 무효화되면 읽은 값을 캐시에 넣지 않음
+_stats = {"hits": 0, "misses": 0, "invalidations": 0, "warmed": 0}
+_started = False
+_start_lock = threading.Lock()
+_stop = threading.Event()
+
+
+def _today():
+    return day_range(datetime.now())
+
+
+def _top_id(cur):
+    return cur.execute("SELECT COALESCE(MAX(id), 0) FROM inspection_results").fetchone()[0]
+
+
+def warm(cur=None):
+    """오늘 전표 전체를 읽어 캐시를 다시 채움 (바코드별 최신 전표) → 적재 건수"""
+    global _slips, _day, _gen, _max_id
+    cur = cur or get_connection().cursor()
+    lo, hi = _today()
+    top = _top_id(cur)
+    slips = {}
+    for row in cur.execute(
+        _SLIP_SELECT + " WHERE ir.inspected_at >= ? AND ir.inspected_at < ? AND ir.id <= ? ORDER BY ir.id",
+        (lo, hi, top),
+    ):
+        slips[row[8]] = row[:8]                        # id 오름차순 → 마지막이 최신
+    with _lock:
+        _slips, _day, _max_id = slips, lo, top
+        _gen += 1
+        _stats["warmed"] = len(slips)
+    return len(slips)
+
+
+def _catch_up(cur):
+    """캐시 이후 추가된 전표(다른 프로세스 포함)만 읽어 반영"""
+    global _max_id
+    lo, hi = _today()
+    top = _top_id(cur)
+    with _lock:
+        start = _max_id
+    if top <= start:
+        return
+    rows = cur.execute(
+        _SLIP_SELECT + " WHERE ir.id > ? AND ir.id <= ? AND ir.inspected_at >= ? AND ir.inspected_at < ?"
+                       " ORDER BY ir.id",
+        (start, top, lo, hi),
+    ).fetchall()
+    with _lock:
+        if _day != lo or _max_id != start:             # 그 사이 다시 적재됨
+            return
+        for row in rows:
+            _slips[row[8]] = row[:8]
+        _max_id = top
+
+
+def lookup(cur, barcode):
+    """바코드 → 오늘 최신 전표 튜플 (없으면 None) – 캐시 적중이면 DB 접근 없음"""
+    lo, hi = _today()
+    with _lock:
+        fresh = _day == lo                             # 날짜가 바뀐 직후엔 갱신 스레드가 다시 채울 때까지 DB 조회
+        if fresh and barcode in _slips:
+            _stats["hits"] += 1
+            return _slips[barcode]
+        _stats["misses"] += 1
+        gen = _gen
+    row = cur.execute(
+        _SLIP_SELECT + " WHERE ir.barcode = ? AND ir.inspected_at >= ? AND ir.inspected_at < ?"
+                       " ORDER BY ir.id DESC LIMIT 1",
+        (barcode, lo, hi),
+    ).fetchone()
+    slip = row[:8] if row else None
+    with _lock:
+        # 없음(None)은 갱신 스레드가 새 전표를 이어 읽어 줄 때만 캐시 (아니면 다른 프로세스 저장을 못 봄)
+        if fresh and _day == lo and _gen == gen and (slip is not None or _started):
+            _slips[barcode] = slip
+    return slip
+
+
+def _refresh_loop():
+    con = get_connection()
+    seen, warmed_at, dirty = None, time.monotonic(), False
+    while not _stop.wait(REFRESH_SEC):
+        try:
+            version = con.execute("PRAGMA data_version").fetchone()[0]   # 다른 커넥션이 커밋하면 바뀜
+            with _lock:
+                stale_day = _day != _today()[0]
+            if stale_day:
+                warm(con.cursor())
+                warmed_at, dirty = time.monotonic(), False
+            elif version != seen:
+                _catch_up(con.cursor())
+                dirty = True
+            if dirty and time.monotonic() - warmed_at >= REWARM_SEC:
+                warm(con.cursor())
+                warmed_at, dirty = time.monotonic(), False
+            seen = version
+        except Exception:
+            logger.exception("slip_cache: 갱신 실패")
+
+
+def start_refresher():
+    """백그라운드 갱신 스레드 시작 (프로세스당 1회, 중복 호출 무시) – 스캔을 받는 프로세스에서 호출"""
+    global _started
+    with _start_lock:
+        if _started:
+            return False
+        threading.Thread(target=_refresh_loop, name="slip-cache", daemon=True).start()
+        _started = True
+        return True
+
+
+def invalidate(barcodes=(), slip_ids=(), product_ids=()):
+    """변경된 전표만 캐시에서 제거 (다음 조회 때 DB 에서 다시 읽음)
+
+    barcodes    : 새 검수 결과를 넣었거나 바코드를 바꾼 경우
+    slip_ids    : inspection_results 수정·삭제 (id 기준)
+    product_ids : 상품명·브랜드·로케이션 수정, 상품 삭제
+    """
+    global _gen
+    slip_ids, product_ids = {int(i) for i in slip_ids}, set(product_ids)
+    with _lock:
+        _gen += 1
+        drop = {bc for bc in barcodes if bc in _slips}
+        if slip_ids or product_ids:
+            drop.update(bc for bc, s in _slips.items()
+                        if s and (s[0] in slip_ids or s[1] in product_ids))
+        for bc in drop:
+            del _slips[bc]
+        _stats["invalidations"] += len(drop)
+
+
+def stats():
+    """{'hits', 'misses', 'invalidations', 'warmed', 'size'}"""
+    with _lock:
+        return dict(_stats, size=len(_slips))
@@ -0,0 +1,81 @@
+################################################################################
+# slip_progress.py  –  전표 작업 진행 합계 조회 / 재계산·검증 (slip_progress 테이블)
+#
+#   python slip_progress.py verify    # work_orders 집계와 비교, 불일치 출력 (있으면 종료코드 1)
+#   python slip_progress.py rebuild   # work_orders 에서 다시 계산
+################################################################################
+import sys
+from common import get_connection, init_db, transaction
+from migrations import rebuild_slip_progress
+
+
+def slip_totals(cur, inspection_id):
+    """전표 누적 (정상, 추가불량) – 작업 기록이 없으면 (0, 0)"""
+    row = cur.execute(
+        "SELECT repaired_qty, defect_qty FROM slip_progress WHERE inspection_id=?", (inspection_id,)
+    ).fetchone()
+    return row or (0, 0)
+
+
+def slip_workers(cur, inspection_id):
+    """전표의 작업자별 [(worker_id, 정상, 추가불량), ...]"""
+    return cur.execute(
+        "SELECT worker_id, repaired_qty, defect_qty FROM slip_worker_progress WHERE inspection_id=?",
+        (inspection_id,),
+    ).fetchall()
+
+
+def verify(cur):
+    """합계 테이블과 work_orders 실제 집계 비교 → 불일치 목록 [(구분, 키, 합계테이블 값, 실제 값), ...]"""
+    actual = {
+        r[0]: r[1:] for r in cur.execute(
+            "SELECT inspection_id, COALESCE(SUM(repaired_qty),0), COALESCE(SUM(additional_defect_qty),0), COUNT(*) "
+            "FROM work_orders WHERE inspection_id IS NOT NULL GROUP BY inspection_id")
+    }
+    stored = {
+        r[0]: r[1:] for r in cur.execute(
+            "SELECT inspection_id, repaired_qty, defect_qty, orders FROM slip_progress")
+    }
+    actual_w = {
+        r[:2]: r[2:] for r in cur.execute(
+            "SELECT inspection_id, worker_id, COALESCE(SUM(repaired_qty),0), COALESCE(SUM(additional_defect_qty),0), COUNT(*) "
+            "FROM work_orders WHERE inspection_id IS NOT NULL AND worker_id IS NOT NULL "
+            "GROUP BY inspection_id, worker_id")
+    }
+    stored_w = {
+        r[:2]: r[2:] for r in cur.execute(
+            "SELECT inspection_id, worker_id, repaired_qty, defect_qty, orders FROM slip_worker_progress")
+    }
+    diffs = []
+    for kind, a, s in (("slip", actual, stored), ("worker", actual_w, stored_w)):
+        for key in sorted(a.keys() | s.keys()):
+            if a.get(key) != s.get(key):
+                diffs.append((kind, key, s.get(key), a.get(key)))
+    return diffs
+
+
+def rebuild():
+    """합계 테이블 전체 재계산 (단일 트랜잭션)"""
+    with transaction() as cur:
+        rebuild_slip_progress(cur)
+        return cur.execute("SELECT COUNT(*) FROM slip_progress").fetchone()[0]
+
+
+def main(argv):
+    cmd = argv[1] if len(argv) > 1 else "verify"
+    if cmd not in ("verify", "rebuild"):
+        print("usage: python slip_progress.py [verify|rebuild]")
+        return 2
+    init_db()
+    if cmd == "rebuild":
+        print(f"rebuilt: {rebuild()} slips")
+        return 0
+    diffs = verify(get_connection().cursor())
+    for kind, key, stored, actual in diffs:
+        print(f"{kind} {key}: stored={stored} actual={actual}")
+    print(f"{len(diffs)} mismatch(es)")
+    return 1 if diffs else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,258 @@
+################################################################################
+# sql_trace.py  –  SQL 실행 추적 (문장별 호출 수·시간·행 수, 느린 문장 EXPLAIN QUERY PLAN + 로그)
+#
+#   SQL_TRACE=1 로 시작하거나 관리자 화면에서 켜면 common 이 새 커넥션을
+#   TracingConnection 으로 연다. 꺼져 있을 때는 일반 sqlite3 커넥션 그대로 (오버헤드 없음).
+################################################################################
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from logging.handlers import RotatingFileHandler
+
+SLOW_QUERY_MS = float(os.environ.get("SQL_SLOW_MS", "50"))
+SLOW_LOG_PATH = os.path.join(os.getcwd(), "logs", "slow_queries.log")
+SLOW_LOG_BYTES = 5 * 1024 * 1024
+SLOW_LOG_BACKUPS = 5
+MAX_STATEMENTS = 2000            # 통계에 보관하는 정규화 문장 수 상한
+
+_enabled = os.environ.get("SQL_TRACE", "") not in ("", "0")
+_lock = threading.Lock()
+_stats = {}                      # {정규화 SQL: {...}}
+_slow_logger = None
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)", re.IGNORECASE)
+_SPACE = re.compile(r"\s+")
+_EXPLAINABLE = ("SELECT", "WITH", "UPDATE", "DELETE", "INSERT", "REPLACE")
+
+
+def enabled():
+    return _enabled
+
+
+def enable(on=True):
+    """추적 켜기/끄기 – 이후 새로 여는 커넥션부터 적용 (common.reset_pool() 과 함께 호출)"""
+    global _enabled
+    _enabled = bool(on)
+
+
+def set_threshold(ms):
+    global SLOW_QUERY_MS
+    SLOW_QUERY_MS = float(ms)
+
+
+def normalize(sql):
+    """리터럴·IN 목록 길이를 지운 문장 (같은 모양의 쿼리를 한 줄로 집계)"""
+    s = _STRING.sub("?", sql)
+    s = _NUMBER.sub("?", s)
+    s = _IN_LIST.sub("IN (…)", s)
+    return _SPACE.sub(" ", s).strip()
+
+
+def _slow_log():
+    global _slow_logger
+    if _slow_logger is None:
+        os.makedirs(os.path.dirname(SLOW_LOG_PATH), exist_ok=True)
+        log = logging.getLogger("sql_trace.slow")
+        log.propagate = False
+        log.setLevel(logging.INFO)
+        handler = RotatingFileHandler(SLOW_LOG_PATH, maxBytes=SLOW_LOG_BYTES,
+                                      backupCount=SLOW_LOG_BACKUPS, encoding="utf-8")
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        log.addHandler(handler)
+        _slow_logger = log
+    return _slow_logger
+
+
+def is_full_scan(plan):
+    """EXPLAIN QUERY PLAN 상세 중 인덱스 없이 테이블 전체를 읽는 단계"""
+    return [d for d in plan
+            if d.startswith("SCAN ") and " USING " not in d
+            and "VIRTUAL TABLE" not in d and d != "SCAN CONSTANT ROW"]
+
+
+def _explain(con, sql, params):
+    try:
+        rows = sqlite3.Cursor(con).execute(f"EXPLAIN QUERY PLAN {sql}", params).fetchall()
+    except sqlite3.Error:
+        return []
+    return [r[3] for r in rows]
+
+
+def _add(key, calls, ms, rows, n_params=None):
+    """집계에 더하고 항목 반환 (상한 초과로 새 문장을 못 넣으면 None)"""
+    with _lock:
+        st = _stats.get(key)
+        if st is None:
+            if len(_stats) >= MAX_STATEMENTS:
+                return None
+            st = _stats[key] = {"sql": key, "calls": 0, "total_ms": 0.0, "max_ms": 0.0,
+                                "rows": 0, "params": 0, "plan": None, "full_scan": []}
+        st["calls"] += calls
+        st["total_ms"] += ms
+        st["rows"] += max(rows, 0)
+        if n_params is not None:
+            st["params"] = n_params
+        return st
+
+
+def _finish(con, key, sql, params, n_params, rows, ms):
+    """문장 1회 종료 (execute + fetch 합계) – 최대값 갱신, 기준 초과 시 실행 계획 + 느린 쿼리 로그"""
+    with _lock:
+        st = _stats.get(key)
+        if st is None:
+            return
+        st["max_ms"] = max(st["max_ms"], ms)
+        need_plan = ms >= SLOW_QUERY_MS and st["plan"] is None
+    if ms < SLOW_QUERY_MS:
+        return
+    head = sql.lstrip().split(None, 1)[0].upper() if sql.strip() else ""
+    if need_plan and head in _EXPLAINABLE and params is not None:
+        plan = _explain(con, sql, params)
+        with _lock:
+            st["plan"], st["full_scan"] = plan, is_full_scan(plan)
+    _slow_log().info(json.dumps({
+        "ts": time.strftime("%Y-%m-%d %H:%M:%S"), "ms": round(ms, 3), "sql": key,
+        "params": n_params, "rows": rows, "plan": st["plan"],
+    }, ensure_ascii=False))
+
+
+def statements(order="total_ms", limit=50):
+    """집계 목록 (기본: 누적 시간 내림차순) – 각 항목에 평균(avg_ms) 포함"""
+    with _lock:
+        items = [dict(s, avg_ms=s["total_ms"] / s["calls"]) for s in _stats.values() if s["calls"]]
+    return sorted(items, key=lambda s: s[order], reverse=True)[:limit]
+
+
+def reset():
+    with _lock:
+        _stats.clear()
+
+
+def _param_count(params):
+    if params is None:
+        return 0
+    return len(params) if isinstance(params, (tuple, list, dict)) else 1
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+#  계측 커넥션 / 커서
+# ══════════════════════════════════════════════════════════════════════════════
+class TracingCursor(sqlite3.Cursor):
+    """호출 수·시간·행 수는 execute / fetch 마다 바로 집계하고,
+    문장 1회의 합계 시간은 다음 execute / 결과 소진 / close 시점에 느린 쿼리 기준과 비교"""
+
+    _pending = None          # [정규화 SQL, sql, params, 인자 수, 누적 ms, 행 수]
+
+    def _finish(self):
+        p, self._pending = self._pending, None
+        if p is not None:
+            _finish(self.connection, p[0], p[1], p[2], p[3], p[5], p[4])
+
+    def _start(self, sql, params, n_params, t0):
+        ms = (time.perf_counter() - t0) * 1000
+        rows = -1 if self.description is not None else self.rowcount
+        key = normalize(sql)
+        if _add(key, 1, ms, rows, n_params) is None:
+            return
+        self._pending = [key, sql, params, n_params, ms, rows]
+        if self.description is None:             # 결과 행이 없는 문장은 바로 종료
+            self._finish()
+
+    def _fetched(self, n, t0, done=False):
+        p = self._pending
+        if p is not None:
+            ms = (time.perf_counter() - t0) * 1000
+            _add(p[0], 0, ms, n)
+            p[4] += ms
+            p[5] = max(p[5], 0) + n
+            if done:
+                self._finish()
+
+    def execute(self, sql, params=()):
+        self._finish()
+        t0 = time.perf_counter()
+        super().execute(sql, params)
+        self._start(sql, params, _param_count(params), t0)
+        return self
+
+    def executemany(self, sql, seq):
+        self._finish()
+        seq = list(seq)
+        t0 = time.perf_counter()
+        super().executemany(sql, seq)
+        self._start(sql, seq[0] if seq else None, _param_count(seq[0]) if seq else 0, t0)
+        return self
+
+    def executescript(self, script):
+        self._finish()
+        t0 = time.perf_counter()
+        super().executescript(script)
+        ms = (time.perf_counter() - t0) * 1000
+        key = normalize(script)
+        if _add(key, 1, ms, 0, 0) is not None:
+            _finish(self.connection, key, script, None, 0, -1, ms)
+        return self
+
+    def fetchone(self):
+        t0 = time.perf_counter()
+        row = super().fetchone()
+        self._fetched(row is not None, t0, done=row is None)
+        return row
+
+    def fetchmany(self, size=None):
+        t0 = time.perf_counter()
+        rows = super().fetchmany(self.arraysize if size is None else size)
+        self._fetched(len(rows), t0, done=not rows)
+        return rows
+
+    def fetchall(self):
+        t0 = time.perf_counter()
+        rows = super().fetchall()
+        self._fetched(len(rows), t0, done=True)
+        return rows
+
+    def __next__(self):
+        t0 = time.perf_counter()
+        try:
+            row = super().__next__()
+        except StopIteration:
+            self._fetched(0, t0, done=True)
+            raise
+        self._fetched(1, t0)
+        return row
+
+    def close(self):
+        self._finish()
+        super().close()
+
+    def __del__(self):
+        try:
+            self._finish()
+        except Exception:
+            pass
+
+
+class TracingConnection(sqlite3.Connection):
+    """cursor() 가 TracingCursor 를 반환.
+
+    sqlite3.Connection.execute 계열은 C 안에서 커서를 만들어 바로 실행하므로 TracingCursor.execute 를
+    거치지 않는다 → 여기서 직접 cursor().execute(...) 로 돌려 같은 집계를 탄다.
+    """
+
+    def cursor(self, factory=TracingCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, params=()):
+        return self.cursor().execute(sql, params)
+
+    def executemany(self, sql, seq):
+        return self.cursor().executemany(sql, seq)
+
+    def executescript(self, script):
+        return self.cursor().executescript(script)
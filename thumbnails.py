@@ -0,0 +1,163 @@
+################################################################################
+# thumbnails.py  –  고정 크기 썸네일(파생 이미지) 캐시 (내용 해시 키 + 용량 제한 LRU)
+################################################################################
+import hashlib
+import io
+import os
+import threading
+from collections import OrderedDict
+from PIL import Image, ImageOps
+import image_index
+
+THUMB_DIR = os.path.join(os.getcwd(), "db_images", ".thumbs")
+THUMB_SIZES = (128, 256, 512)            # 요청 크기는 이 중 가장 가까운 큰 값으로 올림
+THUMB_FORMAT, THUMB_EXT = "WEBP", "webp"
+THUMB_QUALITY = 80
+THUMB_CACHE_MAX_BYTES = 512 * 1024 * 1024
+SRC_DIGEST_MAX = 4096                    # 색인 밖 원본의 해시 메모 최대 건수
+
+_lock = threading.Lock()
+_lru = None            # OrderedDict{파일 경로: 바이트 수} – 오래 안 쓴 것이 앞
+_lru_bytes = 0
+_src_digest = OrderedDict()   # {(원본 경로, mtime_ns, size): 내용 해시} – 색인 밖 파일용 LRU
+
+
+def _bucket(size):
+    for s in THUMB_SIZES:
+        if size <= s:
+            return s
+    return THUMB_SIZES[-1]
+
+
+def _load_lru():
+    """최초 1회 캐시 디렉터리를 훑어 LRU 목록 구성 (mtime 오래된 순)"""
+    global _lru, _lru_bytes
+    entries = []
+    for root, _dirs, files in os.walk(THUMB_DIR):
+        for fn in files:
+            path = os.path.join(root, fn)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            entries.append((st.st_mtime, path, st.st_size))
+    entries.sort()
+    _lru = OrderedDict((path, size) for _m, path, size in entries)
+    _lru_bytes = sum(size for _m, _p, size in entries)
+
+
+def _evict():
+    global _lru_bytes
+    while _lru_bytes > THUMB_CACHE_MAX_BYTES and _lru:
+        path, size = _lru.popitem(last=False)
+        _lru_bytes -= size
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def _cached(path):
+    """캐시 적중 여부 – 적중 시 최근 사용으로 이동"""
+    with _lock:
+        if _lru is None:
+            _load_lru()
+        if path in _lru:
+            _lru.move_to_end(path)
+            return True
+    return False
+
+
+def _store(path, data):
+    global _lru_bytes
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{threading.get_ident()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+    with _lock:
+        _lru_bytes += len(data) - _lru.pop(path, 0)
+        _lru[path] = len(data)
+        _evict()
+
+
+def _render(fp, size):
+    """원본을 size px 상자에 맞춰 축소한 WebP 바이트 (JPEG 는 draft 로 축소 디코딩)"""
+    with Image.open(fp) as im:
+        im.draft("RGB", (size, size))
+        im = ImageOps.exif_transpose(im)
+        im.thumbnail((size, size))
+        if im.mode not in ("RGB", "RGBA"):
+            im = im.convert("RGBA" if "transparency" in im.info else "RGB")
+        buf = io.BytesIO()
+        im.save(buf, THUMB_FORMAT, quality=THUMB_QUALITY)
+    return buf.getvalue()
+
+
+def _thumb_path(digest, size):
+    return os.path.join(THUMB_DIR, digest[:2], f"{digest}_{size}.{THUMB_EXT}")
+
+
+def _file_sha256(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def content_digest(path):
+    """파일 내용 SHA-256
+
+    image_store 파일은 이름이 곧 해시, 색인된 옛 파일은 색인 항목에 붙은 해시를 쓴다 (렌더링마다 stat 없음).
+    색인 밖 경로만 경로·mtime·크기 키로 SRC_DIGEST_MAX 건까지 메모한다.
+    """
+    stem = os.path.basename(path).split(".")[0]
+    if len(stem) == 64 and all(c in "0123456789abcdef" for c in stem):
+        return stem
+    digest = image_index.digest(path, _file_sha256)
+    if digest is not None:
+        return digest
+    st = os.stat(path)
+    key = (os.path.abspath(path), st.st_mtime_ns, st.st_size)
+    with _lock:
+        digest = _src_digest.get(key)
+        if digest is not None:
+            _src_digest.move_to_end(key)
+            return digest
+    digest = _file_sha256(path)
+    with _lock:
+        _src_digest[key] = digest
+        while len(_src_digest) > SRC_DIGEST_MAX:
+            _src_digest.popitem(last=False)
+    return digest
+
+
+def thumbnail_path(src, size=256):
+    """원본 이미지 경로 → size px 썸네일 파일 경로 (처음 요청 시 생성, 실패하면 None)"""
+    if not src:
+        return None
+    size = _bucket(size)
+    try:
+        path = _thumb_path(content_digest(src), size)
+        if not _cached(path):
+            _store(path, _render(src, size))
+        return path
+    except OSError:
+        return None
+
+
+def thumbnail_for_bytes(data, size=256):
+    """업로드 바이트 → 썸네일 경로 (업로드 미리보기용, 저장 후 같은 내용이면 같은 썸네일 재사용)
+
+    썸네일을 만들 수 없으면 (깨진 파일·디코딩 폭탄·디스크 오류) 원본 바이트를 그대로 돌려준다.
+    """
+    size = _bucket(size)
+    path = _thumb_path(hashlib.sha256(data).hexdigest(), size)
+    try:
+        if not _cached(path):
+            _store(path, _render(io.BytesIO(data), size))
+    except (OSError, Image.DecompressionBombError):
+        return data
+    return path
+
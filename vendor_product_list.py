@@ -1,32 +1,24 @@
 ################################################################################
 # vendor_product_list.py  –  제품 목록 / 이미지·정보 관리 (inspector·operator)
 ################################################################################
-import streamlit as st, os, uuid, math
-from PIL import Image
-from common import get_connection, now_str
+import streamlit as st, os, math
+from common import get_connection, now_str, transaction
+from product_search import search_products
+from product_pager import count_products, page_anchor, fetch_page, main_images
+from thumbnails import thumbnail_path
+from image_ingest import ingest
+from image_store import IMG_DIR, store_image, release_image, release_product_images, collect_garbage, resolve_images
+import slip_cache
+import profiling
 
 # ══════════════════════════════════════════════════════════════════════════════
 #  환경 설정 & 연결
 # ══════════════════════════════════════════════════════════════════════════════
-BASE_DIR   = os.getcwd()
-IMG_DIR_DB = os.path.join(BASE_DIR, "db_images")     # 모든 이미지 저장·조회
-os.makedirs(IMG_DIR_DB, exist_ok=True)
+os.makedirs(IMG_DIR, exist_ok=True)                  # 모든 이미지 저장·조회 (image_store)
 
 con = get_connection()
 cur = con.cursor()
 
-# ══════════════════════════════════════════════════════════════════════════════
-#  경로 해석: 절대 → db_images
-# ══════════════════════════════════════════════════════════════════════════════
-def resolve_path(p: str | None):
-    """DB에 저장된 경로/파일명을 실제 파일 경로로 변환."""
-    if not p:
-        return None
-    if os.path.exists(p):                       # 절대/상대 그대로
-        return p
-    cand = os.path.join(IMG_DIR_DB, os.path.basename(p))
-    return cand if os.path.exists(cand) else None
-
 # ══════════════════════════════════════════════════════════════════════════════
 #  권한 체크
 # ══════════════════════════════════════════════════════════════════════════════
@@ -67,57 +59,59 @@ per_page  = col_pp.selectbox("표시수", [30, 50, 100], index=0)
 view_mode = col_view.radio("보기 방식", ["갤러리", "리스트"], horizontal=True, index=1)
 
 # ══════════════════════════════════════════════════════════════════════════════
-#  데이터 로드 (products + 옵션/바코드 + 썸네일 1장)
-# ══════════════════════════════════════════════════════════════════════════════
-@st.cache_data(show_spinner=False)
-def load_products(filter_col, filter_val, keyword):
-    where, params = [], []
-    if role == "operator" or filter_val != "전체":
-        where.append(f"p.{filter_col}=?"); params.append(filter_val)
-    if keyword:
-        like = f"%{keyword}%"
-        where.append("("
-                     "p.product_name LIKE ? OR "
-                     "s.option_text LIKE ? OR "
-                     "s.barcode_text LIKE ? OR "
-                     "p.location LIKE ? OR "
-                     "CAST(p.id AS TEXT) LIKE ?)")
-        params += [like]*5
-    wsql = "WHERE " + " AND ".join(where) if where else ""
-
-    sql = f"""
-    SELECT p.id,
-           p.product_name,
-           IFNULL(s.option_text,'-')   AS option_text,
-           IFNULL(s.barcode_text,'-')  AS barcode_text,
-           p.location,
-           (SELECT COALESCE(image_path, file_name)
-              FROM product_images
-             WHERE product_id = p.id
-             ORDER BY is_main DESC, id ASC
-             LIMIT 1)                  AS thumb,
-           p.created_at
-      FROM products p
-      LEFT JOIN (
-            SELECT product_id,
-                   GROUP_CONCAT(DISTINCT color||'/'||size) AS option_text,
-                   GROUP_CONCAT(DISTINCT barcode)          AS barcode_text
-              FROM skus
-             GROUP BY product_id
-      ) s ON s.product_id = p.id
-      {wsql}
-      ORDER BY p.created_at DESC;
-    """
-    return cur.execute(sql, params).fetchall()
-
-rows = load_products(id_col, sel_id, kw)
-
-# ══════════════════════════════════════════════════════════════════════════════
-#  페이지 나누기
-# ══════════════════════════════════════════════════════════════════════════════
-page_cnt = max(1, math.ceil(len(rows)/per_page))
+#  데이터 로드 (현재 페이지 per_page 행 + 옵션/바코드 + 썸네일 1장)
+# ══════════════════════════════════════════════════════════════════════════════
+SEARCH_LIMIT = 1000   # 검색 결과는 관련도 상위 N건까지
+
+filter_col = id_col if role == "operator" or sel_id != "전체" else None
+
+@st.cache_data(show_spinner=False, ttl=60)
+def search_hits(filter_col, filter_val, keyword):
+    # FTS5 색인 검색 (관련도 순, 최대 SEARCH_LIMIT 건)
+    return search_products(cur, keyword, limit=SEARCH_LIMIT,
+                           filter_col=filter_col, filter_val=filter_val)
+
+@st.cache_data(show_spinner=False, ttl=30)
+def total_count(filter_col, filter_val):
+    return count_products(cur, filter_col, filter_val)
+
+def invalidate_lists():
+    """상품 추가·수정·삭제 후 검색/건수 캐시 비우기"""
+    search_hits.clear(); total_count.clear()
+
+# ══════════════════════════════════════════════════════════════════════════════
+#  페이지 나누기 (검색: 결과 목록 슬라이스 / 전체: keyset)
+# ══════════════════════════════════════════════════════════════════════════════
+with profiling.span("vendor_product_list.count"):
+    if kw:
+        hits = search_hits(filter_col, sel_id, kw)
+        total = len(hits)
+    else:
+        total = total_count(filter_col, sel_id)
+
+page_cnt = max(1, math.ceil(total/per_page))
 page_num = st.number_input("페이지", 1, page_cnt, 1, key="page_num")
-view = rows[(page_num-1)*per_page : page_num*per_page]
+st.caption(f"총 {total:,}건 · {page_num}/{page_cnt} 페이지")
+
+if kw:
+    page_rows = hits[(page_num-1)*per_page : page_num*per_page]
+else:
+    # 페이지별 시작 anchor(created_at, id)를 세션에 기억 – 다음 페이지는 직전 조회에서 바로,
+    # 처음 가는 페이지는 인덱스 OFFSET 스캔 1회로 구한다. 필터·표시수·건수가 바뀌면 초기화.
+    anchor_key = (filter_col, sel_id, per_page, total)
+    if st.session_state.get("page_anchor_key") != anchor_key:
+        st.session_state["page_anchor_key"] = anchor_key
+        st.session_state["page_anchors"] = {}
+    anchors = st.session_state["page_anchors"]
+    with profiling.span("vendor_product_list.page"):
+        if page_num not in anchors:
+            anchors[page_num] = page_anchor(cur, page_num-1, per_page, filter_col, sel_id)
+        page_rows, anchors[page_num+1] = fetch_page(cur, anchors[page_num], per_page, filter_col, sel_id)
+
+with profiling.span("vendor_product_list.thumbs"):
+    thumbs = main_images(cur, [r[0] for r in page_rows])
+view = [(pid, pname, opt or "-", bar or "-", loc, thumbs.get(pid), created)
+        for pid, pname, opt, bar, loc, created in page_rows]
 
 # ══════════════════════════════════════════════════════════════════════════════
 #  목록 표시 (갤러리 / 리스트)
@@ -128,6 +122,8 @@ delete_ids = []
 
 if view_mode == "갤러리":
     GRID = 4
+    with profiling.span("vendor_product_list.resolve"):
+        paths = resolve_images([v[5] for v in view])          # 페이지 전체 이미지 위치를 한 번에
     for r in range(math.ceil(len(view)/GRID)):
         cols = st.columns(GRID)
         for i in range(GRID):
@@ -140,9 +136,9 @@ if view_mode == "갤러리":
                 if st.checkbox("", key=ch_key):
                     delete_ids.append(pid)
 
-                ipath = resolve_path(thumb)
+                ipath = paths[thumb]
                 if ipath:
-                    st.image(ipath, width=130)
+                    st.image(thumbnail_path(ipath, 256) or ipath, width=130)
                 else:
                     st.markdown(
                         "<div style='width:130px;height:130px;border:1px dashed #bbb;"
@@ -171,10 +167,13 @@ else:  # 리스트
 if delete_ids and role == "inspector":
     if st.button(f"🗑️ 선택된 {len(delete_ids)}개 삭제"):
         qmarks = ",".join("?"*len(delete_ids))
-        cur.execute(f"DELETE FROM products        WHERE id IN ({qmarks})", delete_ids)
-        cur.execute(f"DELETE FROM product_images WHERE product_id IN ({qmarks})", delete_ids)
-        cur.execute(f"DELETE FROM skus           WHERE product_id IN ({qmarks})", delete_ids)
-        con.commit(); st.success("삭제 완료"); st.rerun()
+        with transaction() as tx:
+            release_product_images(tx, delete_ids)
+            tx.execute(f"DELETE FROM products        WHERE id IN ({qmarks})", delete_ids)
+            tx.execute(f"DELETE FROM product_images WHERE product_id IN ({qmarks})", delete_ids)
+            tx.execute(f"DELETE FROM skus           WHERE product_id IN ({qmarks})", delete_ids)
+        slip_cache.invalidate(product_ids=delete_ids)
+        collect_garbage(); invalidate_lists(); st.success("삭제 완료"); st.rerun()
 
 # ══════════════════════════════════════════════════════════════════════════════
 #  상세 페이지
@@ -189,11 +188,12 @@ if sel_pid:
     ).fetchall()
 
     st.subheader("📷 이미지 관리")
+    paths = resolve_images([fn for _iid, fn, _m in imgs])
     for iid, fn, is_main in imgs:
         c1, c2, c3 = st.columns([3, 1, 1])
-        ipath = resolve_path(fn)
+        ipath = paths[fn]
         if ipath:
-            c1.image(ipath, width=120)
+            c1.image(thumbnail_path(ipath, 256) or ipath, width=120)
         else:
             c1.markdown(
                 "<div style='width:120px;height:120px;border:1px dashed #bbb;"
@@ -202,25 +202,32 @@ if sel_pid:
 
         if role == "inspector":
             if c2.radio("메인", ["", "★"], index=(1 if is_main else 0), key=f"star_{iid}") == "★":
-                cur.execute("UPDATE product_images SET is_main=0 WHERE product_id=?", (sel_pid,))
-                cur.execute("UPDATE product_images SET is_main=1 WHERE id=?", (iid,))
-                con.commit(); st.rerun()
+                with transaction() as tx:
+                    tx.execute("UPDATE product_images SET is_main=0 WHERE product_id=?", (sel_pid,))
+                    tx.execute("UPDATE product_images SET is_main=1 WHERE id=?", (iid,))
+                st.rerun()
             if c3.button("삭제", key=f"delimg_{iid}"):
-                cur.execute("DELETE FROM product_images WHERE id=?", (iid,))
-                con.commit(); st.rerun()
+                with transaction() as tx:
+                    release_image(tx, fn)
+                    tx.execute("DELETE FROM product_images WHERE id=?", (iid,))
+                collect_garbage(); st.rerun()
 
     # -- 새 이미지 업로드 ------------------------------------------------------
     if role == "inspector":
-        up = st.file_uploader("새 이미지 추가", ["jpg", "jpeg", "png"], accept_multiple_files=True)
+        # 저장 후 키를 바꿔 업로더를 비움 – 그대로 두면 rerun 마다 같은 파일을 다시 저장(참조 수 +1)
+        up_key = f"upload_{sel_pid}_{st.session_state.get('upload_gen', 0)}"
+        up = st.file_uploader("새 이미지 추가", ["jpg", "jpeg", "png"], accept_multiple_files=True, key=up_key)
         if up:
-            for f in up:
-                fname = f"{uuid.uuid4()}.jpg"
-                save_path = os.path.join(IMG_DIR_DB, fname)
-                Image.open(f).convert("RGB").save(save_path, quality=90)
-                cur.execute(
-                    "INSERT INTO product_images(product_id,image_path,is_main,uploaded_at)"
-                    "VALUES(?,?,0,?)", (sel_pid, fname, now_str()))
-            con.commit(); st.rerun()
+            with profiling.span("vendor_product_list.ingest"):
+                imgs = [img for img in ingest(up, preview_sizes=(256,)) if not img["error"]]   # 디코딩은 트랜잭션 밖에서
+            with transaction() as tx:
+                for img in imgs:
+                    fname = store_image(tx, img["data"], img["filename"])
+                    tx.execute(
+                        "INSERT INTO product_images(product_id,image_path,is_main,uploaded_at)"
+                        "VALUES(?,?,0,?)", (sel_pid, fname, now_str()))
+            st.session_state["upload_gen"] = st.session_state.get("upload_gen", 0) + 1
+            st.rerun()
 
     # -- 제품 정보 -------------------------------------------------------------
     if role == "inspector":
@@ -235,15 +242,20 @@ if sel_pid:
             op = st.text_input("브랜드",  p[2] or "")
             lc = st.text_input("로케이션", p[3] or "")
             if st.button("💾 저장"):
-                cur.execute(
-                    "UPDATE products SET product_name=?, vendor_id=?, operator_id=?, location=? "
-                    "WHERE id=?",
-                    (pn, vd or None, op or None, lc or None, sel_pid)
-                )
-                con.commit(); st.success("수정 완료"); st.rerun()
+                with transaction() as tx:
+                    tx.execute(
+                        "UPDATE products SET product_name=?, vendor_id=?, operator_id=?, location=? "
+                        "WHERE id=?",
+                        (pn, vd or None, op or None, lc or None, sel_pid)
+                    )
+                slip_cache.invalidate(product_ids=[sel_pid])
+                invalidate_lists(); st.success("수정 완료"); st.rerun()
             if st.button("🗑️ 제품 삭제"):
-                cur.execute("DELETE FROM products        WHERE id=?", (sel_pid,))
-                cur.execute("DELETE FROM product_images WHERE product_id=?", (sel_pid,))
-                cur.execute("DELETE FROM skus           WHERE product_id=?", (sel_pid,))
-                con.commit(); st.success("삭제 완료")
+                with transaction() as tx:
+                    release_product_images(tx, [sel_pid])
+                    tx.execute("DELETE FROM products        WHERE id=?", (sel_pid,))
+                    tx.execute("DELETE FROM product_images WHERE product_id=?", (sel_pid,))
+                    tx.execute("DELETE FROM skus           WHERE product_id=?", (sel_pid,))
+                slip_cache.invalidate(product_ids=[sel_pid])
+                collect_garbage(); invalidate_lists(); st.success("삭제 완료")
                 st.session_state.pop(sel_key, None); st.rerun()